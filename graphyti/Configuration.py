@@ -88,11 +88,15 @@ class Configuration:
 
     @staticmethod
     def create_default_configs(configs_filename=default("configs"),
-            data_location=default("dataloc")):
+            data_location=default("dataloc"), autotune=False):
         global __configsfile__
         global __datalocationfile__
 
         import os
+        # Tuning rewrites the file, so it doesn't matter if there's one
+        if autotune:
+            return Configuration.autotune(configs_filename, data_location)
+
         if os.path.exists(configs_filename):
             print("Configuration file '{}' already exists!\n".format(
                 configs_filename))
@@ -104,8 +108,6 @@ class Configuration:
             else:
                 return {"configs":configs_filename, "dataloc": c["root_conf"]}
 
-        # TODO Remove assumptions about the hardware
-        # I.E: Memory size, # NUMA nodes, Cache Size
         configs = __default_config__.copy() # shallow copy
         if not os.path.exists(data_location):
             os.makedirs(data_location)
@@ -122,6 +124,63 @@ class Configuration:
 
         return {"configs":__configsfile__, "dataloc":__datalocationfile__}
 
+    @staticmethod
+    def autotune(configs_filename=default("configs"),
+            data_location=default("dataloc"), bench_size="256M"):
+        """
+        Write a configuration tuned for this machine. The NUMA topology,
+        core count and available memory are detected, and a short random
+        read benchmark in `data_location` picks `io_depth` and the RAID
+        mapping. An existing configuration file is overwritten.
+
+        Optional arguments:
+        -------------------
+        configs_filename:
+            - The configuration file to write
+        data_location:
+            - The SAFS data directory, or a file listing one
+                `node_id:directory` per line
+        bench_size:
+            - The size of the file used for the I/O benchmark
+
+        Returns:
+        --------
+        A dict with the configuration file (`configs`), data location
+        (`dataloc`), the tuned settings (`tuned`) and a report on the
+        hardware and expected read throughput (`report`)
+        """
+        global __configsfile__
+        global __datalocationfile__
+
+        import os
+        from .autotune import tune
+        from .utils import parse_size
+
+        if not os.path.exists(data_location):
+            os.makedirs(data_location)
+
+        tuned, report = tune(data_location, parse_size(bench_size))
+
+        configs = __default_config__.copy() # shallow copy
+        configs.update(tuned)
+        configs["root_conf"] = data_location
+        __datalocationfile__ = data_location
+        __configsfile__ = configs_filename
+
+        Configuration.__write_configs(configs)
+
+        print("Configuration file: '{}'\nData Location: '{}'".format(
+            __configsfile__, __datalocationfile__))
+        print("Detected {} NUMA node(s), {} core(s), {:.1f}G available memory"
+                .format(report["num_nodes"], report["cores"],
+                    report["mem_available"] / float(1 << 30)))
+        print("Expected read throughput: {:.1f}MB/s ({:.0f} IOPS) at " \
+                "io_depth={}".format(report["expected_throughput"] / (1 << 20),
+                    report["expected_iops"], tuned["io_depth"]))
+
+        return {"configs":__configsfile__, "dataloc":__datalocationfile__,
+                "tuned":tuned, "report":report}
+
     # Not yet fool proof
     @staticmethod
     def get_configs(configs_filename=__configsfile__):
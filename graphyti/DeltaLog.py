@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+__ops__ = ("add", "remove")
+
+def _edge_array(src, dst):
+    import numpy as np
+
+    src = np.asarray(src)
+    dst = np.asarray(dst)
+    if src.ndim != 1 or src.shape != dst.shape:
+        raise RuntimeError("`src` and `dst` must be 1-D arrays of the " +
+                "same length")
+    for name, ids in (("src", src), ("dst", dst)):
+        if ids.dtype.kind not in "iu":
+            raise RuntimeError("`{}` must hold integer vertex IDs".format(
+                name))
+        if ids.size and (ids.min() < 0 or ids.max() >= 2 ** 32 - 1):
+            raise RuntimeError("`{}` must hold IDs between 0 and {}".format(
+                name, 2 ** 32 - 2))
+    return np.stack((src.astype(np.int64), dst.astype(np.int64)), axis=1)
+
+def _keys(src, dst, directed):
+    # One int64 per edge; undirected edges match in either direction
+    import numpy as np
+
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    if not directed:
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+    return (src << 32) | dst
+
+def _offsets(lengths):
+    # The position of each item of consecutive runs of `lengths` in its run
+    import numpy as np
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) - np.repeat(starts, lengths)
+
+def _merge_rows(first, second):
+    # Append each row of the CSR matrix `second` to that row of `first`
+    import numpy as np
+
+    first_len = np.diff(first[0])
+    second_len = np.diff(second[0])
+    indptr = np.zeros(len(first_len) + 1, dtype=np.int64)
+    np.cumsum(first_len + second_len, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.result_type(first[1], second[1]))
+    indices[np.repeat(indptr[:-1], first_len) + _offsets(first_len)] = first[1]
+    indices[np.repeat(indptr[:-1] + first_len, second_len) +
+            _offsets(second_len)] = second[1]
+    return indptr, indices
+
+class EdgeOverlay(object):
+    def __init__(self, removed, src, dst, directed):
+        """
+        The pending changes of a `DeltaLog` as they apply to a graph's
+        adjacency lists: every copy of the `removed` edges goes from the
+        lists read from the graph's files and the edges (src[i], dst[i])
+        are added to them. Built by `DeltaLog.overlay`, so only the changes
+        are held in memory.
+
+        Positional arguments:
+        --------------------
+        removed:
+            - The sorted keys of the removed edges
+        src:
+            - The source vertex IDs of the added edges
+        dst:
+            - The destination vertex IDs of the added edges
+        directed:
+            - Whether (u, v) and (v, u) are different edges
+        """
+        import numpy as np
+
+        self.removed = removed
+        self.src = src
+        self.dst = dst
+        self.directed = directed
+        # The vertices whose lists change
+        self.touched = np.unique(np.concatenate((removed >> 32,
+            removed & 0xffffffff, src, dst)))
+        self.num_vertices = int(max(src.max(), dst.max())) + 1 \
+                if src.size else 0
+
+    def __list_keys(self, rows, neighbors, edge_type):
+        # The key of the edge behind each entry of a vertex's list
+        if self.directed and edge_type == "in":
+            return _keys(neighbors, rows, True)
+        return _keys(rows, neighbors, self.directed)
+
+    def __added(self, edge_type):
+        # The added edges as (vertex, neighbor) list entries, by vertex
+        import numpy as np
+
+        if not self.directed:
+            rows = np.concatenate((self.src, self.dst))
+            neighbors = np.concatenate((self.dst, self.src))
+        elif edge_type == "in":
+            rows, neighbors = self.dst, self.src
+        else:
+            rows, neighbors = self.src, self.dst
+        order = np.argsort(rows, kind="stable")
+        return rows[order], neighbors[order]
+
+    def neighbors(self, base, num_base, ids, edge_type="out"):
+        """
+        The adjacency lists of vertices with the changes applied
+
+        Positional arguments:
+        --------------------
+        base:
+            - Reads the lists of vertices from the graph's files, called as
+                `base(ids, edge_type)` and returning a CSR matrix like
+                `Graph.neighbors` does
+        num_base:
+            - The number of vertices in the graph's files
+        ids:
+            - The vertex IDs, which may repeat
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "out", "in" or "both" (in-neighbors, then out-neighbors)
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays (indptr, indices) as `Graph.neighbors`
+        returns them, with each vertex's added neighbors after the others
+        """
+        import numpy as np
+
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        if self.directed and edge_type == "both":
+            return _merge_rows(self.neighbors(base, num_base, ids, "in"),
+                    self.neighbors(base, num_base, ids, "out"))
+
+        # Vertices that are only in the added edges have no lists yet
+        in_base = ids < num_base
+        lengths = np.zeros(len(ids), dtype=np.int64)
+        if in_base.any():
+            indptr, indices = base(ids[in_base], edge_type)
+            lengths[in_base] = np.diff(indptr)
+        else:
+            indices = np.empty(0, dtype=np.int32)
+        rows = np.repeat(np.arange(len(ids)), lengths)
+
+        keep = np.ones(len(indices), dtype=bool)
+        changed = np.isin(ids[rows], self.touched)
+        keep[changed] = ~np.isin(self.__list_keys(ids[rows][changed],
+            indices[changed], edge_type), self.removed)
+        base_lists = (np.concatenate(([0], np.cumsum(
+            np.bincount(rows[keep], minlength=len(ids))))), indices[keep])
+
+        added_rows, added = self.__added(edge_type)
+        start = np.searchsorted(added_rows, ids, "left")
+        end = np.searchsorted(added_rows, ids, "right")
+        added_lists = (np.concatenate(([0], np.cumsum(end - start))),
+                added[np.repeat(start, end - start) + _offsets(end - start)])
+
+        indptr, indices = _merge_rows(base_lists, added_lists)
+        # The same types as lists read from the graph's files
+        int32 = np.iinfo(np.int32).max
+        dtype = np.int32 if len(indices) <= int32 and \
+                max(num_base, self.num_vertices) <= int32 else np.int64
+        return indptr.astype(dtype), indices.astype(dtype)
+
+    def edges(self, base, edge_type="out"):
+        """
+        Every edge of the graph with the changes applied
+
+        Positional arguments:
+        --------------------
+        base:
+            - Reads the edges from the graph's files, called as
+                `base(edge_type)` and returning a 2-tuple like `Graph.edges`
+                does
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "out" for the (vertex, out-neighbor) pairs, "in" for the
+                (vertex, in-neighbor) pairs or "both" for both
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays holding the vertex and neighbor ID of each
+        edge
+        """
+        import numpy as np
+
+        if self.directed and edge_type == "both":
+            in_edges = self.edges(base, "in")
+            out_edges = self.edges(base, "out")
+            return np.concatenate((in_edges[0], out_edges[0])), \
+                    np.concatenate((in_edges[1], out_edges[1]))
+
+        rows, neighbors = base(edge_type)
+        keep = ~np.isin(self.__list_keys(rows, neighbors, edge_type),
+                self.removed)
+        added_rows, added = self.__added(edge_type)
+        return np.concatenate((rows[keep], added_rows.astype(rows.dtype))), \
+                np.concatenate((neighbors[keep], added.astype(rows.dtype)))
+
+    def degree(self, degree, base, num_base, edge_type="both"):
+        """
+        The degree of every vertex with the changes applied
+
+        Positional arguments:
+        --------------------
+        degree:
+            - The degrees read from the graph's files
+        base:
+            - Reads the lists of vertices from the graph's files, as for
+                `neighbors`
+        num_base:
+            - The number of vertices in the graph's files
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "in", "out" or "both"
+
+        Returns:
+        --------
+        A NumPy array with each vertex's degree
+        """
+        import numpy as np
+
+        res = np.zeros(max(num_base, self.num_vertices), dtype=degree.dtype)
+        res[:num_base] = degree
+        # An undirected vertex has one list
+        ids = self.touched[self.touched < len(res)]
+        indptr, _ = self.neighbors(base, num_base, ids,
+                edge_type if self.directed else "out")
+        res[ids] = np.diff(indptr)
+        return res
+
+    def ecount(self, ecount, base, num_base):
+        """
+        The number of edges in the graph with the changes applied
+
+        Positional arguments:
+        --------------------
+        ecount:
+            - The number of edges in the graph's files
+        base:
+            - Reads the lists of vertices from the graph's files, as for
+                `neighbors`
+        num_base:
+            - The number of vertices in the graph's files
+        """
+        import numpy as np
+
+        ids = self.touched[self.touched < num_base]
+        before = len(base(ids, "out")[1]) if len(ids) else 0
+        after = len(self.neighbors(base, num_base, self.touched, "out")[1])
+        # Each undirected edge is in the lists of both of its vertices
+        return ecount + (after - before if self.directed else
+                (after - before) // 2)
+
+class DeltaLog(object):
+    def __init__(self, location):
+        """
+        A log of edges added to and removed from a graph whose adjacency
+        list and index files are immutable. Each batch of changes is kept
+        as a `.npy` file in `location`, in the order it was made.
+
+        Positional arguments:
+        --------------------
+        location:
+            - The directory in which the changes are kept
+        """
+        self.location = os.path.abspath(os.path.expanduser(location))
+        self.__lock = threading.Lock()
+
+    def entries(self):
+        """
+        The batches of changes in the order they were made
+
+        Returns:
+        --------
+        A list of (sequence number, "add" or "remove", path) tuples
+        """
+        if not os.path.isdir(self.location):
+            return []
+
+        entries = []
+        for fn in os.listdir(self.location):
+            seq, _, rest = fn.partition("-")
+            op = rest[:-len(".npy")]
+            if seq.isdigit() and rest.endswith(".npy") and op in __ops__:
+                entries.append((int(seq), op, os.path.join(self.location, fn)))
+        return sorted(entries)
+
+    def __len__(self):
+        """
+        The number of edge changes in the log
+        """
+        import numpy as np
+        return sum(np.load(path, mmap_mode="r").shape[0]
+                for _, _, path in self.entries())
+
+    def append(self, op, src, dst):
+        """
+        Log that the edges (src[i], dst[i]) were added (`op` is "add") or
+        removed (`op` is "remove")
+        """
+        import numpy as np
+
+        if op not in __ops__:
+            raise RuntimeError("Unknown edge change '{}'".format(op))
+        edges = _edge_array(src, dst)
+        if not edges.shape[0]:
+            return
+
+        with self.__lock:
+            if not os.path.exists(self.location):
+                os.makedirs(self.location)
+            entries = self.entries()
+            seq = entries[-1][0] + 1 if entries else 0
+            path = os.path.join(self.location, "{:08d}-{}.npy".format(seq, op))
+
+            # Write to a temp so readers never see a partial batch
+            tmp = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp, "wb") as f:
+                np.save(f, edges)
+            os.rename(tmp, path)
+
+    def apply(self, src, dst, directed=True, entries=None):
+        """
+        Replay the logged changes on the edges (src[i], dst[i]). Removing an
+        edge removes every copy of it made before the removal.
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Whether (u, v) and (v, u) are different edges
+        entries:
+            - The batches to replay, as returned by `entries`. All of them
+                by default
+
+        Returns:
+        --------
+        A 2-tuple with the source and destination ID of each edge
+        """
+        import numpy as np
+
+        srcs = [np.asarray(src, dtype=np.int64)]
+        dsts = [np.asarray(dst, dtype=np.int64)]
+        for _, op, path in (self.entries() if entries is None else entries):
+            edges = np.load(path)
+            if op == "add":
+                srcs.append(edges[:, 0])
+                dsts.append(edges[:, 1])
+            else:
+                src = np.concatenate(srcs)
+                dst = np.concatenate(dsts)
+                keep = ~np.isin(_keys(src, dst, directed),
+                        _keys(edges[:, 0], edges[:, 1], directed))
+                srcs, dsts = [src[keep]], [dst[keep]]
+        return np.concatenate(srcs), np.concatenate(dsts)
+
+    def overlay(self, directed=True, entries=None):
+        """
+        The logged changes as an `EdgeOverlay` on the graph's adjacency
+        lists. Removing an edge removes every copy of it made before the
+        removal.
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Whether (u, v) and (v, u) are different edges
+        entries:
+            - The batches to apply, as returned by `entries`. All of them
+                by default
+
+        Returns:
+        --------
+        An `EdgeOverlay`
+        """
+        import numpy as np
+
+        added, added_seq, removed, removed_seq = [], [], [], []
+        for seq, op, path in (self.entries() if entries is None else entries):
+            edges = np.load(path)
+            if op == "add":
+                added.append(edges)
+                added_seq.append(np.full(len(edges), seq))
+            else:
+                removed.append(_keys(edges[:, 0], edges[:, 1], directed))
+                removed_seq.append(np.full(len(edges), seq))
+        edges = np.concatenate(added) if added else \
+                np.empty((0, 2), dtype=np.int64)
+        seqs = np.concatenate(added_seq) if added else \
+                np.empty(0, dtype=np.int64)
+        keys = np.concatenate(removed) if removed else \
+                np.empty(0, dtype=np.int64)
+        last = np.concatenate(removed_seq) if removed else \
+                np.empty(0, dtype=np.int64)
+
+        # When each removed edge was last removed
+        order = np.lexsort((last, keys))
+        keys, last = keys[order], last[order]
+        final = np.append(keys[1:] != keys[:-1], True) if len(keys) else \
+                np.empty(0, dtype=bool)
+        keys, last = keys[final], last[final]
+
+        # Added edges survive unless they're removed later
+        pos = np.searchsorted(keys, _keys(edges[:, 0], edges[:, 1], directed))
+        found = pos < len(keys)
+        found[found] = keys[pos[found]] == _keys(edges[found, 0],
+                edges[found, 1], directed)
+        later = np.zeros(len(edges), dtype=bool)
+        later[found] = last[pos[found]] > seqs[found]
+        edges = edges[~later]
+        return EdgeOverlay(keys, edges[:, 0], edges[:, 1], directed)
+
+    def clear(self, entries=None):
+        """
+        Drop logged changes, e.g. once they're compacted into new files
+
+        Optional arguments:
+        -------------------
+        entries:
+            - The batches to drop, as returned by `entries`. All of them by
+                default
+        """
+        with self.__lock:
+            for _, _, path in (self.entries() if entries is None else entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
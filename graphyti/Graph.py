@@ -0,0 +1,1256 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+from .graphyti import Graph as _Graph
+from .graphyti import FileManager
+from .graphyti import Format
+from .graphyti import topk as _topk
+from .DeltaLog import DeltaLog
+from .checkpoint import Checkpoint
+from .control import RunControl, run_in_process
+from . import catalog
+from . import output
+from . import reorder
+from .Exceptions.runtime import UnsupportedError
+from .Stats import Stats, has_callbacks, measure, publish
+
+# Graph methods that can be launched with `submit`
+__algorithms__ = (
+        "approx_betweenness",
+        "approx_closeness",
+        "betweenness",
+        "bfs",
+        "bfs_vcount",
+        "closeness",
+        "connected_components",
+        "coreness",
+        "degree",
+        "diameter",
+        "diversity",
+        "louvain",
+        "local_scan",
+        "neighborhood",
+        "pagerank",
+        "strongly_connected_components",
+        "topk_scan",
+        "toposort",
+        "triangles",
+        "weakly_connected_components",
+)
+
+# Graph methods returning one value per vertex, whose results can be cached
+__cacheable__ = (
+        "betweenness",
+        "closeness",
+        "connected_components",
+        "coreness",
+        "degree",
+        "diversity",
+        "louvain",
+        "local_scan",
+        "pagerank",
+        "strongly_connected_components",
+        "toposort",
+        "triangles",
+        "weakly_connected_components",
+)
+
+# Per-vertex measures whose top vertices `topk` selects
+__rankable__ = (
+        "betweenness",
+        "closeness",
+        "coreness",
+        "degree",
+        "diversity",
+        "local_scan",
+        "pagerank",
+        "triangles",
+)
+
+# Graph methods returning per-vertex estimates and their standard errors
+__estimated__ = (
+        "approx_betweenness",
+        "approx_closeness",
+)
+
+# Graph methods that can save their progress to a checkpoint directory. With
+# one, coreness and the components run as iterations in this repo, as PageRank
+# runs the delta PageRank. The others run inside FlashGraph, which has no state
+# to save part way.
+__checkpointable__ = (
+        "connected_components",
+        "coreness",
+        "pagerank",
+        "weakly_connected_components",
+)
+
+__checkpoint_args__ = ("checkpoint_dir", "checkpoint_interval", "resume")
+
+# Graph methods that report per-iteration statistics into an `iterations` list
+# and can be stopped between iterations
+__iterative__ = (
+        "bfs",
+        "pagerank",
+)
+
+# Graph methods that check for edge changes not yet compacted into the
+# graph's files
+__delta_aware__ = __algorithms__ + (
+        "ecount",
+        "edges",
+        "neighbors",
+        "vcount",
+)
+
+# Graph methods that apply the pending edge changes to what they read. The
+# others read the graph's files inside FlashGraph.
+__overlaid__ = (
+        "degree",
+        "ecount",
+        "edges",
+        "neighbors",
+        "vcount",
+)
+
+# The number of vertices whose lists `compact` changes at a time
+__compact_batch__ = 1 << 16
+
+# The arguments of Graph methods that are vertex IDs, by position and name
+__id_args__ = {
+        "betweenness": ((0, "ids"),),
+        "bfs": ((0, "sources"),),
+        "bfs_vcount": ((0, "start_vertex"),),
+        "closeness": ((0, "ids"),),
+        "neighbors": ((0, "ids"),),
+        "pagerank": ((5, "seeds"),),
+}
+
+# The arguments of Graph methods that hold a value per vertex
+__vertex_args__ = {
+        "pagerank": ((4, "warm_start"),),
+}
+
+class Graph(_Graph):
+    # Upper bound on the number of algorithms one graph runs concurrently
+    max_workers = 4
+
+    def __init__(self, *args, **kwargs):
+        """
+        Create a Graph object given adj list file, index file and
+        configuration file
+
+        Optional arguments:
+        -------------------
+        cache:
+            - A `ResultCache` in which the results of per-vertex algorithms
+                are kept across runs. Cached results are returned as
+                read-only memory-mapped arrays
+        stats:
+            - Collect the `Stats` of every algorithm call, available from
+                `last_stats`. Stats are always collected while callbacks are
+                registered with `Stats.add_callback`
+        delta_dir:
+            - Where edges added and removed with `add_edges` and
+                `remove_edges` are logged. By default next to a local
+                adjacency list file, or in ~/.graphyti/deltas for one in SAFS
+        mmap:
+            - Map a local adjacency list file read-only instead of reading
+                it into memory. The graph opens at once and processes that
+                map the same file share one copy of it in the page cache
+        populate:
+            - With `mmap`, read the whole file in when it's mapped
+        hugepages:
+            - With `mmap`, ask for the file to be backed by huge pages
+        """
+        mmap = kwargs.pop("mmap", False)
+        populate = kwargs.pop("populate", False)
+        hugepages = kwargs.pop("hugepages", False)
+        if (populate or hugepages) and not mmap:
+            raise RuntimeError("`populate` and `hugepages` require `mmap`")
+        if mmap:
+            if len(args) != 3:
+                raise RuntimeError("`mmap` requires the graph's files")
+            if FileManager(args[2]).file_exists(args[0]):
+                raise RuntimeError("'{}' is in SAFS. Only graphs on the local "
+                        "file system can be mapped".format(args[0]))
+            super(Graph, self).__init__(*args, populate=populate,
+                    hugepages=hugepages)
+        else:
+            super(Graph, self).__init__(*args)
+        self.__files = args
+        self.__options = {"mmap": mmap, "populate": populate,
+                "hugepages": hugepages}
+        self.__fingerprint = None
+        self.cache = kwargs.pop("cache", None)
+        self.collect_stats = kwargs.pop("stats", False)
+        self.__local = threading.local()
+        self.__delta_dir = kwargs.pop("delta_dir", None)
+        self.__options["delta_dir"] = self.__delta_dir
+        self.__deltas = None
+        self.__overlay = None
+        self.__overlay_lock = threading.Lock()
+        self.__merged = None
+        self.__merged_lock = threading.Lock()
+        self.__perm = None
+        self.__order = None
+        if kwargs:
+            raise TypeError("Unexpected arguments: {}".format(
+                ", ".join(kwargs)))
+
+        self.__executor = None
+        self.__executor_lock = threading.Lock()
+
+    def fingerprint(self):
+        """
+        Identify the graph's adjacency list and index files by their
+        location, size and (for the local file system) modification time.
+        A graph in SAFS is also identified by the generation `Format.load`
+        wrote for it, since SAFS files have no modification time. Files put
+        into SAFS otherwise have no generation and are only told apart by
+        their size and metadata.
+
+        Returns:
+        --------
+        A hex digest that changes whenever either file does
+        """
+        import hashlib
+
+        if self.__fingerprint is None:
+            if len(self.__files) != 3:
+                raise RuntimeError("The graph has no files loaded")
+
+            adj_fn, idx_fn, configs = self.__files
+            fm = FileManager(configs)
+            meta = []
+            # Files are looked up in SAFS first, as the graph does
+            for fn in (adj_fn, idx_fn):
+                if fm.file_exists(fn):
+                    meta.append(("safs", fn, fm.file_size(fn),
+                        str(fm.info(fn))))
+                    if fn == adj_fn:
+                        meta.append(("generation",
+                            catalog.read_generation(fm, fn)))
+                else:
+                    st = os.stat(fn)
+                    meta.append(("local", os.path.abspath(fn), st.st_size,
+                        st.st_mtime))
+            self.__fingerprint = hashlib.sha1(
+                    repr(meta).encode("UTF-8")).hexdigest()
+        return self.__fingerprint
+
+    def invalidate_cache(self):
+        """
+        Drop the cached results of this graph
+        """
+        if self.cache is not None:
+            self.cache.invalidate(self.fingerprint())
+            self.__fingerprint = None
+
+    @property
+    def permutation(self):
+        """
+        The new ID of each original vertex ID if the graph's vertices were
+        reordered when it was converted, otherwise None. Vertex IDs passed to
+        and returned by the graph's methods are original IDs either way.
+        """
+        if self.__perm is None:
+            self.__perm = False
+            if len(self.__files) == 3:
+                adj_fn, _, configs = self.__files
+                perm_fn = reorder.permutation_file(adj_fn)
+                fm = FileManager(configs)
+                if fm.file_exists(adj_fn):
+                    if fm.file_exists(perm_fn):
+                        self.__perm = self.__export(fm, perm_fn,
+                                reorder.load_permutation)
+                elif os.path.exists(perm_fn):
+                    self.__perm = reorder.load_permutation(perm_fn)
+        return None if self.__perm is False else self.__perm
+
+    def _in_process(self, name, control, args, kwargs):
+        # Run `name` in a child process that's killed once `control` expires
+        if len(self.__files) != 3:
+            raise UnsupportedError("`{}` needs the graph's files to run with "
+                    "a `timeout` or `cancel`".format(name))
+        out = kwargs.pop("out", None)
+        if output.is_target(out):
+            # The child writes the result into the target itself
+            run_in_process(control, self.__files, self.__options, name,
+                    args, dict(kwargs, out=out))
+            return output.load_result(out, self._config_file())
+        res = run_in_process(control, self.__files, self.__options, name,
+                args, kwargs)
+        if out is not None:
+            res = output.store(out, res, self._config_file())
+        return res
+
+    def _config_file(self):
+        # The configuration file the graph was opened with, if any
+        return self.__files[2] if len(self.__files) == 3 else ""
+
+    def _vertex_order(self):
+        # The original ID of each new vertex ID
+        if self.__order is None:
+            self.__order = reorder.inverse(self.permutation)
+        return self.__order
+
+    @staticmethod
+    def __export(fm, fn, load):
+        # Read a small file in SAFS with `load`, from a local copy
+        import shutil
+        import tempfile
+
+        scratch = tempfile.mkdtemp(prefix="graphyti-")
+        try:
+            path = os.path.join(scratch, os.path.basename(fn))
+            fm.export(path, fn)
+            return load(path)
+        finally:
+            shutil.rmtree(scratch, True)
+
+    @property
+    def deltas(self):
+        """
+        The `DeltaLog` of edge changes not yet compacted into the graph's
+        files
+        """
+        if self.__deltas is None:
+            location = self.__delta_dir
+            if location is None:
+                if len(self.__files) != 3:
+                    raise RuntimeError("The graph has no files loaded")
+                adj_fn, _, configs = self.__files
+                if FileManager(configs).file_exists(adj_fn):
+                    location = os.path.join(os.path.expanduser("~"),
+                            ".graphyti", "deltas", adj_fn)
+                else:
+                    location = os.path.abspath(adj_fn) + ".delta"
+            self.__deltas = DeltaLog(location)
+        return self.__deltas
+
+    def add_edges(self, src, dst):
+        """
+        Add the edges (src[i], dst[i]) to the graph. The change is logged in
+        `deltas` and applied to the adjacency lists read by `vcount`,
+        `ecount`, `degree`, `neighbors` and `edges`. The other algorithms
+        read the graph's files, so they run on a scratch copy of the graph
+        with the pending changes compacted in until `compact` merges them
+        into new files.
+
+        Positional arguments:
+        --------------------
+        src:
+            - The source vertex IDs of the edges
+        dst:
+            - The destination vertex IDs of the edges
+        """
+        self.deltas.append("add", src, dst)
+
+    def remove_edges(self, src, dst):
+        """
+        Remove every copy of the edges (src[i], dst[i]) from the graph. The
+        change is logged in `deltas` and applied as by `add_edges`.
+
+        Positional arguments:
+        --------------------
+        src:
+            - The source vertex IDs of the edges
+        dst:
+            - The destination vertex IDs of the edges
+        """
+        self.deltas.append("remove", src, dst)
+
+    def _overlay(self):
+        # The pending edge changes as an `EdgeOverlay`, or None
+        if self.__delta_dir is None and len(self.__files) != 3:
+            return None
+        entries = self.deltas.entries()
+        if not entries:
+            return None
+
+        with self.__overlay_lock:
+            if self.__overlay is None or self.__overlay[0] != entries:
+                self.__overlay = (entries,
+                        self.deltas.overlay(self.is_directed(), entries))
+            return self.__overlay[1]
+
+    def compact(self, adj_fn, idx_fn, background=False):
+        """
+        Merge the pending edge changes and the graph's files into a new
+        adjacency list and index file. The lists are read, changed and
+        written a batch of vertices at a time, so the graph is never held in
+        memory. Changes made while compacting are carried over to the new
+        graph's delta log.
+
+        Positional arguments:
+        --------------------
+        adj_fn:
+            - The new adjacency list file on the local file system
+        idx_fn:
+            - The new index file on the local file system
+
+        Optional arguments:
+        -------------------
+        background:
+            - Compact in a background thread and return a
+                `concurrent.futures.Future`
+
+        Returns:
+        --------
+        A Graph on the new files, with the original vertex IDs of a
+        reordered graph. Load them into SAFS with `FileManager.load` to
+        compute on them out of core.
+        """
+        if background:
+            return self.__get_executor().submit(self.compact, adj_fn, idx_fn)
+
+        import numpy as np
+
+        entries = self.deltas.entries()
+        self.__write_merged(entries, adj_fn, idx_fn)
+        graph = Graph(adj_fn, idx_fn, self.__files[2], cache=self.cache,
+                stats=self.collect_stats)
+
+        self.deltas.clear(entries)
+        remaining = self.deltas.entries()
+        for _, op, path in remaining:
+            edges = np.load(path)
+            graph.deltas.append(op, edges[:, 0], edges[:, 1])
+        self.deltas.clear(remaining)
+        return graph
+
+    def _merged(self):
+        # A scratch graph with the pending edge changes compacted in, for
+        # the algorithms that read the graph's files. It's written again
+        # whenever more changes are made. Its results aren't cached.
+        import shutil
+        import tempfile
+        import weakref
+
+        entries = self.deltas.entries()
+        with self.__merged_lock:
+            if self.__merged is None or self.__merged[0] != entries:
+                scratch = tempfile.mkdtemp(prefix="graphyti-")
+                adj_fn = os.path.join(scratch, "graph.adj")
+                idx_fn = os.path.join(scratch, "graph.idx")
+                try:
+                    self.__write_merged(entries, adj_fn, idx_fn)
+                    graph = Graph(adj_fn, idx_fn, self.__files[2])
+                except Exception:
+                    shutil.rmtree(scratch, True)
+                    raise
+                weakref.finalize(graph, shutil.rmtree, scratch, True)
+                self.__merged = (entries, graph)
+            return self.__merged[1]
+
+    def __write_merged(self, entries, adj_fn, idx_fn):
+        # Write the graph with the changes `entries` applied to `adj_fn`
+        # and `idx_fn`, in the original vertex IDs
+        import numpy as np
+        from .graphyti import AdjWriter
+
+        directed = self.is_directed()
+        overlay = self.deltas.overlay(directed, entries)
+        num_base = _Graph.vcount(self)
+        num_vertices = max(num_base, overlay.num_vertices)
+        base = lambda ids, edge_type: _unrouted["neighbors"](self, ids,
+                edge_type)
+
+        writer = AdjWriter(adj_fn, idx_fn, directed, num_vertices)
+        for part in (("in", "out") if directed else ("out",)):
+            if part == "out" and directed:
+                writer.next_part()
+            for start in range(0, num_vertices, __compact_batch__):
+                ids = np.arange(start, min(start + __compact_batch__,
+                    num_vertices))
+                indptr, indices = overlay.neighbors(base, num_base, ids, part)
+                rows = np.repeat(ids, np.diff(indptr))
+                # Lists are kept sorted, as in files written from edges
+                writer.add(rows, indices[np.lexsort((indices, rows))])
+        writer.finish()
+
+    @staticmethod
+    def open_compressed(fn, configs="", tmpdir=None, **kwargs):
+        """
+        Open a compressed adjacency list written by `Format.array2compressed`
+        or `Format.compress`. It's decoded list by list into a scratch graph
+        that's removed along with the returned Graph. The graph's algorithms
+        read the decoded lists, so compression saves storage but not the I/O
+        or cache space of the algorithms.
+
+        Positional arguments:
+        --------------------
+        fn:
+            - The compressed adjacency list, in SAFS or on the local file
+                system
+
+        Optional arguments:
+        -------------------
+        configs:
+            - Configuration file name
+        tmpdir:
+            - The directory in which the scratch graph is written. Defaults
+                to the system's temp dir
+        kwargs:
+            - Passed on to `Graph`. Set `delta_dir` to keep edge changes
+                beyond the scratch graph's lifetime
+
+        Returns:
+        --------
+        A Graph on the decoded files
+        """
+        import shutil
+        import tempfile
+        import weakref
+
+        scratch = tempfile.mkdtemp(prefix="graphyti-", dir=tmpdir)
+        try:
+            fm = FileManager(configs)
+            if fm.file_exists(fn):
+                path = os.path.join(scratch, "graph.cadj")
+                fm.export(path, fn)
+                perm_fn = reorder.permutation_file(fn)
+                if fm.file_exists(perm_fn):
+                    fm.export(reorder.permutation_file(path), perm_fn)
+                fn = path
+
+            adj_fn = os.path.join(scratch, "graph.adj")
+            idx_fn = os.path.join(scratch, "graph.idx")
+            Format(configs).decompress(fn, adj_fn, idx_fn)
+            graph = Graph(adj_fn, idx_fn, configs, **kwargs)
+        except Exception:
+            shutil.rmtree(scratch, True)
+            raise
+
+        weakref.finalize(graph, shutil.rmtree, scratch, True)
+        return graph
+
+    def topk(self, measure, k=10, **kwargs):
+        """
+        The `k` vertices with the largest value of a per-vertex measure. The
+        top values are selected natively across threads, so only `k` pairs
+        reach Python. The top local scan statistics (`num_hops` of 1) come
+        from `topk_scan`, which prunes vertices that can't make the top k.
+
+        Positional arguments:
+        --------------------
+        measure:
+            - One of "betweenness", "closeness", "coreness", "degree",
+                "diversity", "local_scan", "pagerank" or "triangles"
+
+        Optional arguments:
+        -------------------
+        k:
+            - The top number of vertices
+        kwargs:
+            - Passed on to the measure's method
+
+        Returns:
+        --------
+        A list of 2-tuples with <vertex-ID, value> of the top k values in
+        decreasing order
+        """
+        if measure not in __rankable__:
+            raise UnsupportedError("Unknown measure '{}'. Use one of {}".format(
+                measure, ", ".join(__rankable__)))
+
+        if measure == "local_scan" and kwargs.get("num_hops", 1) == 1:
+            return self.topk_scan(k)
+        return _topk(getattr(self, measure)(**kwargs), k)
+
+    def neighbors(self, ids=None, edge_type="out"):
+        # Rows for all vertices of a reordered graph follow the original
+        # IDs too, i.e. the new ID of each original one
+        if ids is None and self.permutation is not None:
+            ids = self.permutation
+        return super(Graph, self).neighbors(ids, edge_type)
+
+    neighbors.__doc__ = _Graph.neighbors.__doc__
+
+    def to_csr(self, edge_type="out"):
+        """
+        The graph's adjacency matrix in compressed sparse row (CSR) form.
+        Row `v` holds the neighbors of vertex `v`.
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "out", "in" or "both"
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays (indptr, indices), see `neighbors`
+        """
+        return self.neighbors(edge_type=edge_type)
+
+    def to_scipy(self, edge_type="out", dtype="float32"):
+        """
+        The graph's adjacency matrix as a `scipy.sparse.csr_matrix`, which
+        uses the arrays of `to_csr` without copying them. Needs `scipy`.
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "out", "in" or "both"
+        dtype:
+            - The type of the matrix's values, which are all 1
+
+        Returns:
+        --------
+        A (vcount, vcount) `scipy.sparse.csr_matrix`
+        """
+        import numpy as np
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise UnsupportedError("Exporting to SciPy requires the " +
+                    "`scipy` package")
+
+        indptr, indices = self.to_csr(edge_type)
+        n = len(indptr) - 1
+        return csr_matrix((np.ones(len(indices), dtype=dtype), indices,
+            indptr), shape=(n, n), copy=False)
+
+    def subgraph(self, vertex_ids, nthread=4, tmpdir=None, **kwargs):
+        """
+        The subgraph induced by a set of vertices, i.e., them and the edges
+        between them, as a new Graph with the vertices numbered from 0. Its
+        edges are gathered from the loaded graph in parallel, and it's kept
+        in a scratch graph that's removed along with the returned Graph.
+
+        Positional arguments:
+        --------------------
+        vertex_ids:
+            - The vertices of the subgraph e.g., a community from `louvain`
+
+        Optional arguments:
+        -------------------
+        nthread:
+            - The number of threads used to build the subgraph
+        tmpdir:
+            - The directory in which the scratch graph is written. Defaults
+                to the system's temp dir
+        kwargs:
+            - Passed on to `Graph`
+
+        Returns:
+        --------
+        A 2-tuple of the Graph and an array holding the vertex ID in this
+        graph of each of its vertices. A graph ends at its last vertex with
+        an edge, so the vertices without an edge in the subgraph come last
+        in the array and past the Graph's `vcount`.
+        """
+        import shutil
+        import tempfile
+        import weakref
+        import numpy as np
+
+        ids = np.unique(np.asarray(vertex_ids, dtype=np.int64).ravel())
+        if len(ids) and (ids[0] < 0 or ids[-1] >= self.vcount()):
+            raise RuntimeError("The vertex IDs must be between 0 and {}".
+                    format(self.vcount() - 1))
+
+        # Keep the edges to the other vertices, numbered by their position
+        # in `ids`
+        indptr, indices = self.neighbors(ids, "out")
+        src = np.repeat(np.arange(len(ids)), np.diff(indptr))
+        dst = np.searchsorted(ids, indices)
+        dst[dst == len(ids)] = 0
+        keep = ids[dst] == indices
+        src, dst = src[keep], dst[keep]
+        if not self.is_directed():
+            # Each edge is listed under both of its endpoints
+            keep = src <= dst
+            src, dst = src[keep], dst[keep]
+        if len(src) == 0:
+            raise RuntimeError("The vertices have no edges between them")
+
+        # Number the vertices with edges first
+        has_edges = np.zeros(len(ids), dtype=bool)
+        has_edges[src] = True
+        has_edges[dst] = True
+        order = np.argsort(~has_edges, kind="stable")
+        new_ids = np.empty(len(ids), dtype=np.int64)
+        new_ids[order] = np.arange(len(ids))
+        src, dst = new_ids[src], new_ids[dst]
+
+        configs = self._config_file()
+        scratch = tempfile.mkdtemp(prefix="graphyti-", dir=tmpdir)
+        try:
+            adj_fn = os.path.join(scratch, "graph.adj")
+            idx_fn = os.path.join(scratch, "graph.idx")
+            Format(configs).array2graphyti(src, dst, adj_fn, idx_fn,
+                    self.is_directed(), nthread, scratch)
+            graph = Graph(adj_fn, idx_fn, configs, **kwargs)
+        except Exception:
+            shutil.rmtree(scratch, True)
+            raise
+
+        weakref.finalize(graph, shutil.rmtree, scratch, True)
+        return graph, ids[order]
+
+    def ego_network(self, seeds, num_hops=1, edge_type="both", nthread=4,
+            tmpdir=None, **kwargs):
+        """
+        The subgraph induced by the vertices within `num_hops` of the seeds,
+        see `subgraph`. Each hop reads the neighbor lists of the vertices
+        the previous one reached.
+
+        Positional arguments:
+        --------------------
+        seeds:
+            - A vertex ID or a list of them
+
+        Optional arguments:
+        -------------------
+        num_hops:
+            - How far from the seeds to go
+        edge_type:
+            - The edges followed: "in", "out" or "both"
+        nthread:
+            - The number of threads used to build the subgraph
+        tmpdir:
+            - The directory in which the scratch graph is written
+        kwargs:
+            - Passed on to `Graph`
+
+        Returns:
+        --------
+        A 2-tuple of the Graph and the vertex ID in this graph of each of
+        its vertices, as for `subgraph`
+        """
+        import numpy as np
+
+        reached = np.unique(np.asarray(seeds, dtype=np.int64).ravel())
+        frontier = reached
+        for _ in range(num_hops):
+            if len(frontier) == 0:
+                break
+            _, indices = self.neighbors(frontier, edge_type)
+            frontier = np.setdiff1d(np.unique(indices.astype(np.int64)),
+                    reached, assume_unique=True)
+            reached = np.union1d(reached, frontier)
+        return self.subgraph(reached, nthread, tmpdir, **kwargs)
+
+    def run(self, plan):
+        """
+        Run several algorithms as one plan. Calls that repeat run once, and
+        on an undirected graph the degrees, triangle counts and (1 hop)
+        local scan statistics are computed together by `neighborhood`,
+        which reads each vertex's edge lists and those of its neighbors once
+        for all of them rather than once per algorithm. On a directed graph
+        `neighborhood` disregards edge direction, unlike `triangles` and
+        `local_scan`, so every call makes its own pass.
+
+        Positional arguments:
+        --------------------
+        plan:
+            - A list of algorithm names or (name, kwargs) pairs, e.g.
+                [("degree", {"edge_type": "in"}), "triangles", "coreness"]
+
+        Returns:
+        --------
+        A 2-tuple of the results, in the order of `plan`, and a dict
+        reporting the `passes` made over the graph, the algorithms that
+        shared one (`fused`) and the `bytes_read` of edge lists by the
+        shared pass, as measured. `bytes_saved_estimate` assumes each
+        algorithm sharing the pass would have read as much on its own. It's
+        an upper bound: FlashGraph's triangle counting, for one, reads only
+        about half of the lists.
+        """
+        calls = []
+        for entry in plan:
+            name, kwargs = (entry, {}) if isinstance(entry, str) else entry
+            if name not in __algorithms__:
+                raise UnsupportedError("Unknown algorithm '{}'".format(name))
+            calls.append((name, dict(kwargs)))
+
+        # Repeated calls share their result
+        distinct = []
+        for name, kwargs in calls:
+            if (name, kwargs) not in distinct:
+                distinct.append((name, kwargs))
+
+        directed = self.is_directed()
+        fused = [(name, kwargs) for name, kwargs in distinct
+                if _fusable(name, kwargs, directed)]
+        # A shared pass for degrees alone saves nothing
+        readers = [name for name, _ in fused if name != "degree"]
+        if not readers:
+            fused = []
+
+        results = {}
+        report = {"passes": len(distinct) - len(fused), "fused": [],
+                "bytes_read": 0, "bytes_saved_estimate": 0}
+        if fused:
+            degrees = [kwargs.get("edge_type", "both") for name, kwargs in
+                    fused if name == "degree"]
+            measures, nbytes = self.neighborhood(degrees,
+                    triangles="triangles" in readers,
+                    local_scan="local_scan" in readers)
+            for name, kwargs in fused:
+                key = "degree:" + degrees.pop(0) if name == "degree" else name
+                results[_plan_key(name, kwargs)] = measures[key]
+            report["passes"] += 1
+            report["fused"] = [name for name, _ in fused]
+            report["bytes_read"] = nbytes
+            # Each repeat of a call would have read the lists again too
+            repeats = sum(1 for name, kwargs in calls if name != "degree"
+                    and _fusable(name, kwargs, directed))
+            report["bytes_saved_estimate"] = (repeats - 1) * nbytes
+
+        for name, kwargs in distinct:
+            key = _plan_key(name, kwargs)
+            if key not in results:
+                results[key] = getattr(self, name)(**kwargs)
+        return [results[_plan_key(*call)] for call in calls], report
+
+    @property
+    def last_stats(self):
+        """
+        The `Stats` of the last algorithm call made by this thread, or None
+        """
+        return getattr(self.__local, "stats", None)
+
+    def _wants_stats(self):
+        return self.collect_stats or has_callbacks() or \
+                getattr(self.__local, "with_stats", False)
+
+    def _record_stats(self, stats):
+        self.__local.stats = stats
+        publish(stats)
+
+    def with_stats(self, name, **kwargs):
+        """
+        Run an algorithm and collect its I/O and execution statistics
+
+        Positional arguments:
+        --------------------
+        name:
+            - The name of the algorithm e.g. "pagerank"
+
+        Optional arguments:
+        -------------------
+        kwargs:
+            - Keyword arguments passed on to the algorithm
+
+        Returns:
+        --------
+        A 2-tuple of the result of the algorithm and its `Stats`
+        """
+        if name not in __algorithms__:
+            raise UnsupportedError("Unknown algorithm '{}'".format(name))
+
+        self.__local.with_stats = True
+        try:
+            res = getattr(self, name)(**kwargs)
+        finally:
+            self.__local.with_stats = False
+        return res, self.last_stats
+
+    def __get_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers)
+            return self.__executor
+
+    def submit(self, name, **kwargs):
+        """
+        Run an algorithm on the graph in a background thread. Algorithms
+        release the GIL so several of them can run on the same loaded graph
+        at once.
+
+        Positional arguments:
+        --------------------
+        name:
+            - The name of the algorithm e.g. "pagerank"
+
+        Optional arguments:
+        -------------------
+        kwargs:
+            - Keyword arguments passed on to the algorithm
+
+        Returns:
+        --------
+        A `concurrent.futures.Future` holding the result of the algorithm
+        """
+        if name not in __algorithms__:
+            raise UnsupportedError("Unknown algorithm '{}'".format(name))
+
+        return self.__get_executor().submit(getattr(self, name), **kwargs)
+
+    def submit_async(self, name, **kwargs):
+        """
+        Same as `submit`, but returns an `asyncio` future that can be awaited
+        from the running event loop.
+
+        Positional arguments:
+        --------------------
+        name:
+            - The name of the algorithm e.g. "pagerank"
+
+        Optional arguments:
+        -------------------
+        kwargs:
+            - Keyword arguments passed on to the algorithm
+
+        Returns:
+        --------
+        An awaitable `asyncio.Future` holding the result of the algorithm
+        """
+        import asyncio
+        return asyncio.wrap_future(self.submit(name, **kwargs))
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting submitted algorithms and release the worker threads
+
+        Optional arguments:
+        -------------------
+        wait:
+            - Block until all submitted algorithms are done
+        """
+        with self.__executor_lock:
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+def _signature(name):
+    # pybind11 methods have no signature `inspect` can read, but their
+    # docstring starts with one
+    import ast
+    import inspect
+
+    line = (getattr(_Graph, name).__doc__ or "").split("\n", 1)[0]
+    if not line.startswith(name + "(") or ") -> " not in line:
+        return None
+    params = line[len(name) + 1:line.rindex(") -> ")]
+    try:
+        spec = ast.parse("def f({}): pass".format(params)).body[0].args
+        defaults = [ast.literal_eval(d) for d in spec.defaults]
+    except (SyntaxError, ValueError):
+        return None
+    defaults = [inspect.Parameter.empty] * (len(spec.args) -
+            len(defaults)) + defaults
+    return inspect.Signature([inspect.Parameter(arg.arg,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD, default=default)
+        for arg, default in zip(spec.args, defaults)])
+
+def _bound(name, args, kwargs):
+    # The arguments of a call by name with the defaults filled in, so calls
+    # that pass the same values differently get the same key
+    signature = _signature(name)
+    if signature is None:
+        return args, kwargs
+    try:
+        bound = signature.bind(None, *args, **kwargs)
+    except TypeError:
+        return args, kwargs
+    bound.apply_defaults()
+    bound = dict(bound.arguments)
+    bound.pop("self")
+    return (), bound
+
+def _plan_key(name, kwargs):
+    return name, repr(sorted(kwargs.items()))
+
+def _fusable(name, kwargs, directed):
+    # Calls `neighborhood` computes as the algorithm itself would. It counts
+    # the triangles and scans of a directed graph with edge direction
+    # disregarded.
+    if name == "degree":
+        return set(kwargs) <= {"edge_type"}
+    if directed:
+        return False
+    if name == "triangles":
+        return set(kwargs) <= {"cycles_only"} and \
+                not kwargs.get("cycles_only", False)
+    if name == "local_scan":
+        return set(kwargs) <= {"num_hops"} and kwargs.get("num_hops", 1) == 1
+    return False
+
+def _checkpointed(name):
+    # Save an algorithm's progress to a checkpoint directory when asked to
+    algorithm = getattr(_Graph, name)
+
+    def run(self, *args, **kwargs):
+        directory = kwargs.pop("checkpoint_dir", None)
+        interval = kwargs.pop("checkpoint_interval", 10)
+        resume = kwargs.pop("resume", False)
+        if directory is None:
+            if resume:
+                raise RuntimeError("`resume` requires a `checkpoint_dir`")
+            return algorithm(self, *args, **kwargs)
+
+        bound = _bound(name, args, kwargs)[1]
+        # The saved state is that of the push based delta PageRank
+        if name == "pagerank" and bound.get("algo", "push") != "push":
+            raise UnsupportedError("A `checkpoint_dir` runs the push based "
+                    "delta PageRank, `algo` must be \"push\"")
+        if name == "coreness" and (bound.get("kmax", 0) != 0 or
+                bound.get("kmin", 0) != 0):
+            raise UnsupportedError("A `checkpoint_dir` computes the coreness "
+                    "of every vertex, `kmax` and `kmin` must be 0")
+
+        out = kwargs.pop("out", None)
+        control = kwargs.pop("control", None)
+        extra = {} if control is None else {"control": control}
+        if kwargs.get("iterations") is not None:
+            extra["iterations"] = kwargs.pop("iterations")
+        ckpt = Checkpoint(directory, name, self.fingerprint(),
+                *_bound(name, args, kwargs))
+        res = ckpt.result() if resume else None
+        if res is None:
+            resume = resume and ckpt.matches()
+            if not resume:
+                ckpt.start()
+            extra.update(checkpoint=ckpt.state_path,
+                    checkpoint_interval=interval, resume=resume)
+            res = algorithm(self, *args, out=out, **dict(kwargs, **extra))
+            # A stopped PageRank resumes from its saved state
+            if control is None or not control.stopped:
+                ckpt.finish(res)
+        elif out is not None:
+            res = output.store(out, res, self._config_file())
+        return res
+
+    run.__name__ = name
+    run.__doc__ = algorithm.__doc__
+    return run
+
+def _cached(name):
+    # Serve a per-vertex algorithm from the graph's cache when it has one
+    algorithm = getattr(Graph, name)
+
+    def run(self, *args, **kwargs):
+        if self.cache is None:
+            return algorithm(self, *args, **kwargs)
+
+        out = kwargs.pop("out", None)
+        control = kwargs.pop("control", None)
+        # Per-iteration stats and checkpoints don't change the result
+        extra = {} if control is None else {"control": control}
+        if kwargs.get("iterations") is not None:
+            extra["iterations"] = kwargs.pop("iterations")
+        for arg in __checkpoint_args__:
+            if arg in kwargs:
+                extra[arg] = kwargs.pop(arg)
+        key = self.cache.key(self.fingerprint(), name,
+                *_bound(name, args, kwargs))
+        res = self.cache.get(key)
+        if res is None:
+            res = algorithm(self, *args, out=out, **dict(kwargs, **extra))
+            # A partial result isn't what the call asked for
+            if control is None or not control.stopped:
+                self.cache.put(key, res)
+        elif out is not None:
+            res = output.store(out, res, self._config_file())
+        return res
+
+    run.__name__ = name
+    run.__doc__ = algorithm.__doc__
+    return run
+
+def _map_arg(args, kwargs, pos, arg, fn):
+    if len(args) > pos:
+        args[pos] = fn(args[pos])
+    elif kwargs.get(arg) is not None:
+        kwargs[arg] = fn(kwargs[arg])
+
+def _map_result(name, res, perm, order):
+    # Index per-vertex results by original ID and translate returned IDs
+    if name == "toposort":
+        return order[res]
+    if name in __cacheable__:
+        return res[perm]
+    if name in __estimated__:
+        return res[0][perm], res[1][perm]
+    if name == "bfs" and isinstance(res, tuple):
+        return res[0], res[1][:, perm]
+    if name == "topk_scan":
+        return [(int(order[v]), score) for v, score in res]
+    if name == "edges":
+        return order[res[0]], order[res[1]]
+    if name == "neighborhood":
+        return {k: v[perm] for k, v in res[0].items()}, res[1]
+    if name == "neighbors":
+        return res[0], order[res[1]].astype(res[1].dtype)
+    return res
+
+def _reordered(name):
+    # Translate between original vertex IDs and those of a reordered graph
+    method = getattr(Graph, name)
+
+    def run(self, *args, **kwargs):
+        perm = self.permutation
+        if perm is None:
+            return method(self, *args, **kwargs)
+
+        import numpy as np
+        order = self._vertex_order()
+
+        def new_ids(ids):
+            if np.isscalar(ids):
+                return int(perm[ids])
+            return perm[np.asarray(ids)].tolist()
+
+        args = list(args)
+        for pos, arg in __id_args__.get(name, ()):
+            _map_arg(args, kwargs, pos, arg, new_ids)
+        for pos, arg in __vertex_args__.get(name, ()):
+            _map_arg(args, kwargs, pos, arg, lambda v: np.asarray(v)[order])
+
+        out = kwargs.pop("out", None)
+        if output.is_target(out) and name in __cacheable__ and \
+                name != "toposort":
+            # Write the result to a scratch file and from there, reordered,
+            # into the target so neither is held in memory
+            scratch = output.scratch()
+            try:
+                res = method(self, *args, out=scratch, **kwargs)
+            finally:
+                os.remove(scratch)
+            return output.store(out, res, self._config_file(), index=perm)
+
+        res = _map_result(name, method(self, *args, **kwargs), perm, order)
+        if out is not None:
+            res = output.store(out, res, self._config_file())
+        return res
+
+    run.__name__ = name
+    run.__doc__ = method.__doc__
+    return run
+
+# The delta-aware Graph methods before pending edge changes are applied
+_unrouted = {}
+
+def _overlaid(name, self, overlay, *args, **kwargs):
+    # Run a read with the pending edge changes applied
+    num_base = _Graph.vcount(self)
+    base = lambda ids, edge_type: _unrouted["neighbors"](self, ids, edge_type)
+    if name == "vcount":
+        return max(num_base, overlay.num_vertices)
+    if name == "ecount":
+        return overlay.ecount(_unrouted["ecount"](self), base, num_base)
+    if name == "edges":
+        return overlay.edges(lambda edge_type: _unrouted["edges"](self,
+            edge_type), *args, **kwargs)
+    if name == "neighbors":
+        ids = kwargs.pop("ids", args[0] if args else None)
+        edge_type = kwargs.pop("edge_type", args[1] if len(args) > 1 else
+                "out")
+        if ids is None:
+            import numpy as np
+            ids = np.arange(max(num_base, overlay.num_vertices))
+        return overlay.neighbors(base, num_base, ids, edge_type)
+
+    out = kwargs.pop("out", None)
+    edge_type = kwargs.pop("edge_type", args[0] if args else "both")
+    res = overlay.degree(_unrouted["degree"](self, edge_type), base,
+            num_base, edge_type)
+    if out is not None:
+        res = output.store(out, res, self._config_file())
+    return res
+
+def _routed(name):
+    # Apply the pending edge changes to what's read from the graph's files,
+    # or run on a scratch graph they're compacted into
+    method = _unrouted[name] = getattr(Graph, name)
+
+    def run(self, *args, **kwargs):
+        overlay = self._overlay()
+        if overlay is None:
+            return method(self, *args, **kwargs)
+        if name not in __overlaid__:
+            return method(self._merged(), *args, **kwargs)
+        return _overlaid(name, self, overlay, *args, **kwargs)
+
+    run.__name__ = name
+    run.__doc__ = method.__doc__
+    return run
+
+def _controlled(name):
+    # Give an algorithm call a time budget, a way to cancel it and progress
+    # reports
+    algorithm = getattr(Graph, name)
+
+    def run(self, *args, **kwargs):
+        timeout = kwargs.pop("timeout", None)
+        cancel = kwargs.pop("cancel", None)
+        progress = kwargs.pop("progress", None)
+        if timeout is None and cancel is None and progress is None:
+            return algorithm(self, *args, **kwargs)
+
+        # These stop between iterations with what they have so far. The
+        # others run inside FlashGraph, which reports no progress, and are
+        # stopped by running them in a process that can be killed.
+        if name not in __iterative__:
+            if progress is not None:
+                raise UnsupportedError("`{}` can't be given a `progress`, "
+                        "only {} can".format(name,
+                            " and ".join(__iterative__)))
+            return self._in_process(name, RunControl(timeout, cancel), args,
+                    kwargs)
+        control = RunControl(timeout, cancel, progress)
+        return algorithm(self, *args, control=control, **kwargs)
+
+    run.__name__ = name
+    run.__doc__ = algorithm.__doc__
+    return run
+
+def _measured(name):
+    # Collect the stats of an algorithm call when asked to
+    algorithm = getattr(Graph, name)
+
+    def run(self, *args, **kwargs):
+        if not self._wants_stats():
+            return algorithm(self, *args, **kwargs)
+
+        if name in __iterative__ and kwargs.get("iterations") is None:
+            kwargs["iterations"] = []
+        res, stats = measure(name, algorithm, self, *args, **kwargs)
+        self._record_stats(stats)
+        return res
+
+    run.__name__ = name
+    run.__doc__ = algorithm.__doc__
+    return run
+
+for _name in __checkpointable__:
+    setattr(Graph, _name, _checkpointed(_name))
+
+for _name in __cacheable__:
+    setattr(Graph, _name, _cached(_name))
+
+for _name in __delta_aware__:
+    setattr(Graph, _name, _reordered(_name))
+
+for _name in __delta_aware__:
+    setattr(Graph, _name, _routed(_name))
+
+for _name in __algorithms__:
+    setattr(Graph, _name, _controlled(_name))
+
+for _name in __algorithms__:
+    setattr(Graph, _name, _measured(_name))
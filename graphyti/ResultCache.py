@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+from .utils import parse_size
+
+def _canonical(value):
+    # A stable, hashable description of an algorithm argument
+    import numpy as np
+
+    if isinstance(value, np.ndarray):
+        import hashlib
+        return ("ndarray", str(value.dtype), value.shape,
+                hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _canonical(v)) for k, v in value.items()))
+    return value
+
+class ResultCache(object):
+    def __init__(self, location, max_size="4G"):
+        """
+        A cache of algorithm results kept on the local file system. Each
+        result is stored as a `.npy` file that is memory-mapped when read.
+        Once the cache grows past `max_size` the least recently used
+        results are evicted.
+
+        Positional arguments:
+        --------------------
+        location:
+            - The directory in which results are kept
+
+        Optional arguments:
+        -------------------
+        max_size:
+            - The maximum size of the cache e.g. 1073741824 or "1G"
+        """
+        self.location = os.path.abspath(os.path.expanduser(location))
+        self.max_size = parse_size(max_size)
+        self.__lock = threading.Lock()
+
+        if not os.path.exists(self.location):
+            os.makedirs(self.location)
+
+    def key(self, fingerprint, name, args, kwargs):
+        """
+        The key of the result of running algorithm `name` with `args` and
+        `kwargs` on the graph identified by `fingerprint`
+        """
+        import hashlib
+
+        desc = repr((name, _canonical(tuple(args)), _canonical(kwargs)))
+        return (fingerprint, hashlib.sha1(desc.encode("UTF-8")).hexdigest())
+
+    def __path(self, key):
+        return os.path.join(self.location, key[0], key[1] + ".npy")
+
+    def get(self, key):
+        """
+        Get a cached result as a read-only memory-mapped array, or None
+        """
+        import numpy as np
+
+        path = self.__path(key)
+        try:
+            res = np.load(path, mmap_mode="r")
+            os.utime(path, None) # Mark as recently used
+        except (IOError, OSError, ValueError):
+            return None
+        return res
+
+    def put(self, key, result):
+        """
+        Store `result` under `key`, evicting old results if need be
+        """
+        import numpy as np
+
+        path = self.__path(key)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        # Write to a temp so readers never see a partial result
+        tmp = "{}.{}.{}.tmp".format(path, os.getpid(),
+                threading.current_thread().ident)
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(result))
+        os.rename(tmp, path)
+
+        self.evict()
+
+    def __entries(self):
+        entries = []
+        for dirpath, _, files in os.walk(self.location):
+            for fn in files:
+                if fn.endswith(".npy"):
+                    path = os.path.join(dirpath, fn)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue # Evicted by someone else
+                    entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self):
+        """
+        The total size of the cached results in bytes
+        """
+        return sum(entry[1] for entry in self.__entries())
+
+    def evict(self):
+        """
+        Remove the least recently used results until the cache fits in
+        `max_size`
+        """
+        with self.__lock:
+            entries = sorted(self.__entries())
+            total = sum(entry[1] for entry in entries)
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def invalidate(self, fingerprint=None):
+        """
+        Remove the cached results of one graph, or of all graphs
+
+        Optional arguments:
+        -------------------
+        fingerprint:
+            - The fingerprint of the graph (see `Graph.fingerprint`). If
+                omitted the whole cache is cleared
+        """
+        import shutil
+
+        with self.__lock:
+            if fingerprint is None:
+                for name in os.listdir(self.location):
+                    shutil.rmtree(os.path.join(self.location, name), True)
+            else:
+                shutil.rmtree(os.path.join(self.location, fingerprint), True)
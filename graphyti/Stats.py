@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+
+# Functions called with the `Stats` of every measured algorithm call
+_callbacks = []
+_callbacks_lock = threading.Lock()
+
+def has_callbacks():
+    return len(_callbacks) > 0
+
+def publish(stats):
+    # A failing callback doesn't fail the algorithm call
+    import warnings
+
+    with _callbacks_lock:
+        callbacks = list(_callbacks)
+    for callback in callbacks:
+        try:
+            callback(stats)
+        except Exception as e:
+            warnings.warn("Stats callback {!r} failed: {}".format(callback, e))
+
+def _snapshot():
+    # Process wide counters. /proc/self/io isn't always readable, in which
+    # case block input operations stand in for the bytes read.
+    import resource
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    snap = {"time": time.time(), "cpu": usage.ru_utime + usage.ru_stime,
+            "minflt": usage.ru_minflt, "majflt": usage.ru_majflt,
+            "read_bytes": usage.ru_inblock * 512, "syscr": None}
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("read_bytes", "syscr"):
+                    snap[key] = int(value)
+    except (IOError, OSError):
+        pass
+    return snap
+
+def _num_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    import multiprocessing
+    return multiprocessing.cpu_count()
+
+class Stats(object):
+    def __init__(self, algorithm, before, after, iterations=None):
+        """
+        I/O and execution statistics of one algorithm call. The counters are
+        kept by the kernel for the whole process, so calls that run
+        concurrently are counted in each other's statistics.
+
+        SAFS's page-cache hits and misses and its I/O request count aren't
+        available: SAFS keeps them in each FlashGraph engine's I/O objects
+        and only prints them when the engine shuts down.
+
+        Attributes:
+        -----------
+        algorithm:
+            - The name of the algorithm
+        wall_time:
+            - The time the call took in seconds
+        cpu_time:
+            - The CPU time used by all threads in seconds
+        bytes_read:
+            - The bytes read from storage, direct I/O included
+        read_syscalls:
+            - The number of read system calls, or None if unknown. SAFS
+                reads through asynchronous direct I/O, which isn't counted
+        minor_faults:
+            - Page faults served from the kernel's page cache, e.g. by a
+                mapped graph. Not SAFS's cache, which SAFS bypasses
+        major_faults:
+            - Page faults that read from storage
+        thread_utilization:
+            - The fraction of the available cores kept busy
+        iterations:
+            - For `bfs` and `pagerank`, a list of dicts holding the number of
+                vertices active in each iteration (`active_vertices`) and the
+                time it took (`seconds`). It stays empty for a `pagerank` that
+                doesn't run the delta PageRank (see its `tol`) or whose result
+                comes from the cache. None for the other algorithms
+        """
+        self.algorithm = algorithm
+        self.wall_time = after["time"] - before["time"]
+        self.cpu_time = after["cpu"] - before["cpu"]
+        self.bytes_read = after["read_bytes"] - before["read_bytes"]
+        self.read_syscalls = None
+        if after["syscr"] is not None and before["syscr"] is not None:
+            self.read_syscalls = after["syscr"] - before["syscr"]
+        self.minor_faults = after["minflt"] - before["minflt"]
+        self.major_faults = after["majflt"] - before["majflt"]
+        self.thread_utilization = 0.
+        if self.wall_time > 0:
+            self.thread_utilization = min(1., self.cpu_time /
+                    (self.wall_time * _num_cores()))
+        self.iterations = iterations
+
+    @staticmethod
+    def add_callback(callback):
+        """
+        Call `callback(stats)` with the `Stats` of every algorithm call made
+        on a graph, e.g. to export them to a metrics system. Exceptions
+        raised by the callback are turned into warnings.
+        """
+        with _callbacks_lock:
+            _callbacks.append(callback)
+
+    @staticmethod
+    def remove_callback(callback):
+        """
+        Stop calling a callback registered with `add_callback`
+        """
+        with _callbacks_lock:
+            _callbacks.remove(callback)
+
+    def to_dict(self):
+        """
+        The statistics as a dict, e.g. to serialize them as JSON
+        """
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return "Stats({})".format(", ".join("{}={!r}".format(k, v)
+            for k, v in sorted(self.to_dict().items()) if k != "iterations"))
+
+def measure(algorithm, fn, *args, **kwargs):
+    """
+    Call `fn(*args, **kwargs)` and collect the `Stats` of the call.
+    `algorithm` names the call in the statistics.
+
+    Returns:
+    --------
+    A 2-tuple of the result of the call and its `Stats`
+    """
+    iterations = kwargs.get("iterations")
+    before = _snapshot()
+    res = fn(*args, **kwargs)
+    return res, Stats(algorithm, before, _snapshot(), iterations)
@@ -2,16 +2,24 @@ import sys
 PYTHON_VERSION = sys.version_info[0]
 
 if PYTHON_VERSION == 2:
-    from graphyti import Graph
+    from Graph import Graph
     from graphyti import FileManager
     from Configuration import Configuration
+    from ResultCache import ResultCache
+    from Stats import Stats
+    from DeltaLog import DeltaLog
+    from output import load_result
     from graphyti import Format
     from graphyti import __version__
     from Exceptions.runtime import *
 else:
-    from .graphyti import Graph
+    from .Graph import Graph
     from .graphyti import FileManager
     from .Configuration import Configuration
+    from .ResultCache import ResultCache
+    from .Stats import Stats
+    from .DeltaLog import DeltaLog
+    from .output import load_result
     from .graphyti import Format
     from .graphyti import __version__
     from .Exceptions.runtime import *
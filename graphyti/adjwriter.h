@@ -0,0 +1,366 @@
+#ifndef __GRAPHYTI_ADJWRITER_H__
+#define __GRAPHYTI_ADJWRITER_H__
+
+/*
+ * Write a graph in the FlashGraph format one adjacency list at a time. The
+ * lists are written in vertex ID order: for a directed graph every in-edge
+ * list comes first, then every out-edge list. Vertices with no edges may be
+ * skipped and get an empty list. Only the degrees and the list being built
+ * are held in memory, and the index is built from the degrees at the end.
+ *
+ * The files go either to the local filesystem or straight into SAFS.
+ */
+
+#include <errno.h>
+#include <fcntl.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+#include <unistd.h>
+
+#include <limits>
+#include <memory>
+#include <new>
+#include <numeric>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/utils.h"
+#include "src/flash-graph/vertex_index.h"
+
+namespace gt {
+
+// An edge as (vertex whose list it's in, neighbor)
+typedef std::pair<fg::vertex_id_t, fg::vertex_id_t> edge_t;
+
+// A buffered writer to the local filesystem. Unlike FlashGraph's, it doesn't
+// need O_DIRECT, truncates what's there and reports errors to the caller.
+class local_writer: public fg::utils::large_writer {
+    static const size_t BUF_SIZE = 8 << 20;
+
+    int fd;
+    std::string fn;
+    std::vector<char> buf;
+    size_t tot_write_bytes;
+
+    local_writer(int fd, const std::string &fn): fd(fd), fn(fn),
+        tot_write_bytes(0) {
+        buf.reserve(BUF_SIZE);
+    }
+
+    bool write_all(const char *data, size_t len) {
+        while (len > 0) {
+            ssize_t ret = ::write(fd, data, len);
+            if (ret < 0 && errno == EINTR)
+                continue;
+            if (ret < 0)
+                return false;
+            data += ret;
+            len -= ret;
+        }
+        return true;
+    }
+
+    public:
+    static ptr create(const std::string &fn) {
+        int fd = open(fn.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+        if (fd < 0)
+            throw std::runtime_error("Unable to create '" + fn + "': " +
+                    strerror(errno));
+        return ptr(new local_writer(fd, fn));
+    }
+
+    ~local_writer() {
+        if (fd >= 0) {
+            flush();
+            close(fd);
+        }
+    }
+
+    int delete_file() {
+        if (fd < 0)
+            return -1;
+        close(fd);
+        fd = -1;
+        return unlink(fn.c_str());
+    }
+
+    int rename2(const std::string &new_name) {
+        if (fd < 0 || flush() < 0)
+            return -1;
+        close(fd);
+        fd = -1;
+        int ret = rename(fn.c_str(), new_name.c_str());
+        fn = new_name;
+        return ret;
+    }
+
+    off_t seek(off_t off, int whence) {
+        if (fd < 0 || flush() < 0)
+            return -1;
+        return lseek(fd, off, whence);
+    }
+
+    ssize_t flush() {
+        if (fd < 0 || !write_all(buf.data(), buf.size()))
+            return -1;
+        ssize_t ret = buf.size();
+        buf.clear();
+        return ret;
+    }
+
+    ssize_t write(const char *data, size_t bytes) {
+        if (fd < 0)
+            return -1;
+        if (buf.size() + bytes > BUF_SIZE && flush() < 0)
+            return -1;
+        if (bytes >= BUF_SIZE) {
+            if (!write_all(data, bytes))
+                return -1;
+        } else {
+            buf.insert(buf.end(), data, data + bytes);
+        }
+        tot_write_bytes += bytes;
+        return bytes;
+    }
+
+    size_t get_write_bytes() const {
+        return tot_write_bytes;
+    }
+};
+
+// Create `fn` in SAFS, which must be initialized and writable, replacing
+// what's there
+static inline fg::utils::large_writer::ptr create_safs_writer(
+        const std::string &fn) {
+    safs::safs_file f(safs::get_sys_RAID_conf(), fn);
+    if (f.exist() && !f.delete_file())
+        throw std::runtime_error("Unable to replace '" + fn + "'");
+    fg::utils::large_io_creator::ptr creator =
+        fg::utils::large_io_creator::create(true, "");
+    fg::utils::large_writer::ptr writer = creator ?
+        creator->create_writer(fn) : fg::utils::large_writer::ptr();
+    if (writer == NULL)
+        throw std::runtime_error("Unable to create '" + fn + "' in SAFS");
+    return writer;
+}
+
+// SAFS writers don't record the size of what they wrote in the file's
+// header, where FileManager::file_size reads it from
+static inline void set_safs_size(const std::string &fn, size_t size) {
+    safs::safs_file f(safs::get_sys_RAID_conf(), fn);
+    if (!f.resize(size))
+        throw std::runtime_error("Unable to set the size of '" + fn +
+                "' in SAFS");
+}
+
+// Copy the local file `path` into SAFS as `fn`
+static inline void copy_to_safs(const std::string &path,
+        const std::string &fn) {
+    FILE *in = fopen(path.c_str(), "rb");
+    if (in == NULL)
+        throw std::runtime_error("Unable to open '" + path + "': " +
+                strerror(errno));
+
+    std::vector<char> buf(1 << 20);
+    fg::utils::large_writer::ptr out = create_safs_writer(fn);
+    size_t len, size = 0;
+    while ((len = fread(buf.data(), 1, buf.size(), in)) > 0) {
+        if (out->write(buf.data(), len) != (ssize_t) len)
+            break;
+        size += len;
+    }
+    bool failed = ferror(in) || !feof(in) || out->flush() < 0;
+    fclose(in);
+    if (failed) {
+        out->delete_file();
+        throw std::runtime_error("Failed to copy '" + path + "' into SAFS");
+    }
+    out = NULL;
+    set_safs_size(fn, size);
+}
+
+class adj_writer {
+    bool safs;
+    fg::utils::large_writer::ptr adj;
+    std::string adj_fn;
+    std::string index_fn;
+    bool directed;
+    size_t num_vertices;
+
+    // 0 for the in-edge lists (or every list of an undirected graph), 1 for
+    // the out-edge lists
+    int part;
+    std::vector<fg::vsize_t> degrees[2];
+    fg::vertex_id_t next_id;
+
+    bool has_curr;
+    fg::vertex_id_t curr_id;
+    std::vector<fg::vertex_id_t> curr;
+    std::vector<char> buf;
+
+    fg::utils::large_writer::ptr create_writer(const std::string &fn) {
+        if (!safs)
+            return local_writer::create(fn);
+        return create_safs_writer(fn);
+    }
+
+    void write(const char *data, size_t len) {
+        if (adj->write(data, len) != (ssize_t) len)
+            throw std::runtime_error("Failed to write '" + adj_fn + "'");
+    }
+
+    void write_list(fg::vertex_id_t id, const fg::vertex_id_t *neighbors,
+            size_t num) {
+        size_t size = fg::ext_mem_undirected_vertex::num_edges2vsize(num, 0);
+        buf.resize(size);
+        fg::ext_mem_undirected_vertex *v = new (buf.data())
+            fg::ext_mem_undirected_vertex(id, num, 0);
+        for (size_t i = 0; i < num; i++)
+            v->set_neighbor(i, neighbors[i]);
+        write(buf.data(), size);
+        degrees[part][id] = num;
+    }
+
+    // Write empty lists for the vertices before `id`
+    void skip_to(size_t id) {
+        for (; next_id < id; next_id++)
+            write_list(next_id, NULL, 0);
+    }
+
+    void flush_list() {
+        if (!has_curr)
+            return;
+        skip_to(curr_id);
+        write_list(curr_id, curr.data(), curr.size());
+        next_id = curr_id + 1;
+        curr.clear();
+        has_curr = false;
+    }
+
+    void end_part() {
+        flush_list();
+        skip_to(num_vertices);
+    }
+
+    public:
+    typedef std::unique_ptr<adj_writer> ptr;
+
+    // `safs` writes the files into SAFS, which must be initialized and
+    // writable, rather than to the local filesystem
+    adj_writer(bool safs, const std::string &adj_fn,
+            const std::string &index_fn, bool directed, size_t num_vertices):
+        safs(safs), adj_fn(adj_fn), index_fn(index_fn),
+        directed(directed), num_vertices(num_vertices), part(0), next_id(0),
+        has_curr(false), curr_id(0) {
+        if (num_vertices == 0)
+            throw std::runtime_error("The graph has no vertices");
+        if (num_vertices > std::numeric_limits<fg::vertex_id_t>::max())
+            throw std::runtime_error("Too many vertices for FlashGraph");
+
+        adj = create_writer(adj_fn);
+        // The header goes in last, once the edges are counted
+        if (adj->seek(sizeof(fg::graph_header), SEEK_SET) !=
+                (off_t) sizeof(fg::graph_header)) {
+            adj->delete_file();
+            throw std::runtime_error("Failed to write '" + adj_fn + "'");
+        }
+
+        degrees[0].resize(num_vertices);
+        if (directed)
+            degrees[1].resize(num_vertices);
+    }
+
+    // A writer that's never finished removes what it wrote
+    ~adj_writer() {
+        if (adj)
+            adj->delete_file();
+    }
+
+    // Add `edges` to the current part. The edges must be sorted, across
+    // calls as well, and each edge's list is the one of its first vertex.
+    void add(const edge_t *edges, size_t num) {
+        for (size_t i = 0; i < num; i++) {
+            const edge_t &e = edges[i];
+            if (e.first >= num_vertices || e.second >= num_vertices)
+                throw std::runtime_error("Vertex ID " + std::to_string(
+                            std::max(e.first, e.second)) +
+                        " is out of range for a graph of " +
+                        std::to_string(num_vertices) + " vertices");
+            if (has_curr && e.first != curr_id) {
+                if (e.first < curr_id)
+                    throw std::runtime_error("Edges must be added in order");
+                flush_list();
+            }
+            curr_id = e.first;
+            has_curr = true;
+            curr.push_back(e.second);
+        }
+    }
+
+    // End the in-edge lists of a directed graph and start its out-edge lists
+    void next_part() {
+        if (!directed || part == 1)
+            throw std::runtime_error("The graph has no more parts");
+        end_part();
+        part = 1;
+        next_id = 0;
+    }
+
+    // Write the header and the index. Returns the number of edges.
+    size_t finish() {
+        // A directed graph with no out-edge lists added still needs them
+        if (directed && part == 0)
+            next_part();
+        end_part();
+
+        size_t num_edges = std::accumulate(degrees[0].begin(),
+                degrees[0].end(), (size_t) 0);
+        if (directed && num_edges != std::accumulate(degrees[1].begin(),
+                    degrees[1].end(), (size_t) 0))
+            throw std::runtime_error(
+                    "The in-edge and out-edge lists don't match");
+        // Each undirected edge is in the lists of both of its vertices
+        if (!directed)
+            num_edges /= 2;
+
+        fg::graph_header header(directed ? fg::graph_type::DIRECTED :
+                fg::graph_type::UNDIRECTED, num_vertices, num_edges, 0);
+        if (adj->seek(0, SEEK_SET) != 0)
+            throw std::runtime_error("Failed to write '" + adj_fn + "'");
+        write((const char *) &header, sizeof(header));
+        if (adj->flush() < 0)
+            throw std::runtime_error("Failed to write '" + adj_fn + "'");
+
+        fg::vertex_index::ptr index;
+        if (directed)
+            index = fg::cdirected_vertex_index::construct(num_vertices,
+                    degrees[0].data(), degrees[1].data(), header);
+        else
+            index = fg::cundirected_vertex_index::construct(num_vertices,
+                    degrees[0].data(), header);
+
+        fg::utils::large_writer::ptr idx = create_writer(index_fn);
+        if (idx->write((const char *) index.get(), index->get_index_size()) !=
+                (ssize_t) index->get_index_size() || idx->flush() < 0) {
+            idx->delete_file();
+            throw std::runtime_error("Failed to write '" + index_fn + "'");
+        }
+
+        // Close both files, which are now complete
+        size_t adj_size = adj->get_write_bytes();
+        adj = NULL;
+        idx = NULL;
+        if (safs) {
+            set_safs_size(adj_fn, adj_size);
+            set_safs_size(index_fn, index->get_index_size());
+        }
+        return num_edges;
+    }
+};
+}
+
+#endif
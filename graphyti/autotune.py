@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Hardware detection and I/O benchmarking used to tune SAFS configurations
+
+import os
+import threading
+import time
+
+__node_dir__ = "/sys/devices/system/node"
+# SAFS reads the graph in pages of this size
+__page_size__ = 4096
+__bench_file__ = ".graphyti-iobench"
+
+def _parse_cpulist(cpulist):
+    # e.g. "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    ids = []
+    for part in cpulist.strip().split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            ids.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            ids.append(int(part))
+    return ids
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+def detect_hardware():
+    """
+    Detect the NUMA topology, number of cores and available memory
+
+    Returns:
+    --------
+    A dict with the number of NUMA nodes that have CPUs (`num_nodes`), the
+    number of cores this process may run on (`cores`) and the available
+    memory in bytes (`mem_available`)
+    """
+    try:
+        num_nodes = len(_parse_cpulist(_read(
+            os.path.join(__node_dir__, "has_cpu"))))
+    except (IOError, OSError, ValueError):
+        num_nodes = 1
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        import multiprocessing
+        cores = multiprocessing.cpu_count()
+
+    mem_available = None
+    try:
+        for line in _read("/proc/meminfo").splitlines():
+            if line.startswith("MemAvailable:"):
+                mem_available = int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    if mem_available is None:
+        mem_available = os.sysconf("SC_AVPHYS_PAGES") * \
+                os.sysconf("SC_PAGE_SIZE")
+
+    return {"num_nodes": max(1, num_nodes), "cores": cores,
+            "mem_available": mem_available}
+
+def data_dirs(root_conf):
+    """
+    The directories SAFS stripes data across. `root_conf` is either a
+    directory or a file listing one `node_id:directory` per line.
+    """
+    if os.path.isdir(root_conf):
+        return [root_conf]
+
+    dirs = []
+    for line in _read(root_conf).splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        node, sep, path = line.partition(":")
+        dirs.append(path if sep and node.strip().isdigit() else line)
+    return dirs
+
+def _open_bench_file(path, size):
+    # Write the file once, then reopen it with O_DIRECT (like SAFS) when the
+    # file system supports it
+    block = os.urandom(1 << 20)
+    with open(path, "wb") as f:
+        for _ in range(max(1, size >> 20)):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+
+    try:
+        return os.open(path, os.O_RDONLY | os.O_DIRECT), True
+    except (AttributeError, OSError):
+        fd = os.open(path, os.O_RDONLY)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return fd, False
+
+def _random_reads(fd, npages, duration):
+    # Random page reads by `len(counts)` threads for `duration` seconds
+    import mmap
+    import random
+
+    def reader(counts, i):
+        buf = mmap.mmap(-1, __page_size__) # Page aligned for O_DIRECT
+        rand = random.Random(i)
+        deadline = time.time() + duration
+        n = 0
+        while time.time() < deadline:
+            os.preadv(fd, [buf], rand.randrange(npages) * __page_size__)
+            n += 1
+        counts[i] = n
+
+    return reader
+
+def benchmark_io(directory, size=256 << 20, duration=.5, max_depth=256):
+    """
+    Measure random page read throughput in `directory` at increasing
+    numbers of outstanding requests, stopping once throughput levels off
+
+    Returns:
+    --------
+    A dict with the number of outstanding requests at which throughput
+    levels off (`io_depth`), the throughput there in bytes/sec
+    (`throughput`) and requests/sec (`iops`), and whether O_DIRECT was
+    used (`direct`)
+    """
+    path = os.path.join(directory, __bench_file__)
+    fd, direct = _open_bench_file(path, size)
+    try:
+        npages = max(1, size // __page_size__)
+        best = {"io_depth": 1, "iops": 0.}
+        depth = 1
+        while depth <= max_depth:
+            counts = [0] * depth
+            reader = _random_reads(fd, npages, duration)
+            threads = [threading.Thread(target=reader, args=(counts, i))
+                    for i in range(depth)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            iops = sum(counts) / (time.time() - start)
+
+            # Stop once doubling the depth gains less than 10%
+            if iops < best["iops"] * 1.1:
+                break
+            best = {"io_depth": depth, "iops": iops}
+            depth *= 2
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+    best["throughput"] = best["iops"] * __page_size__
+    best["direct"] = direct
+    return best
+
+def tune(root_conf, bench_size=256 << 20):
+    """
+    Pick SAFS settings for this machine and the storage behind `root_conf`
+
+    Returns:
+    --------
+    A 2-tuple of the tuned configuration values and a report of what was
+    measured, including the expected read throughput in bytes/sec
+    """
+    hw = detect_hardware()
+
+    # Benchmark one directory per device; SAFS spreads requests across them
+    devices = {}
+    for d in data_dirs(root_conf):
+        devices.setdefault(os.stat(d).st_dev, d)
+    benches = [benchmark_io(d, bench_size) for d in devices.values()]
+
+    configs = {
+            "num_nodes": str(hw["num_nodes"]),
+            "threads": str(hw["cores"]),
+            # Leave half the memory to the graph index and vertex state
+            "cache_size": "{}M".format(
+                max(64, (hw["mem_available"] // 2) >> 20)),
+            "io_depth": str(max(8, max(b["io_depth"] for b in benches))),
+            # RAID5 rotates where stripes start so many SSDs share the load
+            "RAID_mapping": "RAID0" if len(benches) == 1 else "RAID5",
+    }
+
+    report = dict(hw)
+    report["devices"] = len(benches)
+    report["direct_io"] = all(b["direct"] for b in benches)
+    report["expected_throughput"] = sum(b["throughput"] for b in benches)
+    report["expected_iops"] = sum(b["iops"] for b in benches)
+    return configs, report
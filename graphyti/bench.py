@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks for graphyti on synthetic graphs.
+
+Generate a graph, time every algorithm in memory and in SAFS, and compare
+the results against a stored baseline:
+
+    python -m graphyti.bench run -c configs -g rmat -s 20 -o results.json
+    python -m graphyti.bench compare baseline.json results.json
+"""
+
+import json
+import os
+import sys
+import time
+
+# The algorithms timed by `run` and the arguments they're called with. An
+# argument that's a function is called with the graph to get its value.
+# `diversity` and `louvain` read edge weights, which generated graphs don't
+# have.
+__benchmarks__ = (
+        ("degree", {}),
+        ("pagerank", {"niters": 10}),
+        ("coreness", {}),
+        ("triangles", {}),
+        ("local_scan", {}),
+        ("topk_scan", {"k": 10}),
+        ("weakly_connected_components", {}),
+        ("connected_components", {}),
+        ("strongly_connected_components", {}),
+        ("toposort", {}),
+        ("diameter", {}),
+        ("betweenness", {"ids": [0]}),
+        ("closeness", {"ids": [0], "edge_type": "out"}),
+        ("bfs_vcount", {"start_vertex": 0}),
+        ("bfs", {"sources": lambda graph: list(range(min(64,
+            graph.vcount())))}),
+)
+
+# The benchmarked algorithms that FlashGraph only runs on directed graphs
+__directed_only__ = (
+        "betweenness",
+        "closeness",
+        "diameter",
+        "local_scan",
+        "pagerank",
+        "strongly_connected_components",
+        "topk_scan",
+)
+
+__modes__ = ("mem", "safs")
+
+############################### Generators #####################################
+
+def rmat(scale, edge_factor=16, a=.57, b=.19, c=.19, seed=0):
+    """
+    Generate a recursive matrix (R-MAT/Kronecker) graph as in Graph500
+
+    Positional arguments:
+    --------------------
+    scale:
+        - The graph has 2**scale vertices
+
+    Optional arguments:
+    -------------------
+    edge_factor:
+        - The graph has edge_factor * 2**scale edges
+    a, b, c:
+        - The probabilities of an edge falling in the top left, top right
+            and bottom left quadrants of the adjacency matrix
+    seed:
+        - The random seed
+
+    Returns:
+    --------
+    A 2-tuple with the source and destination ID of each edge
+    """
+    import numpy as np
+
+    rand = np.random.RandomState(seed)
+    nedges = edge_factor << scale
+    src = np.zeros(nedges, dtype=np.int64)
+    dst = np.zeros(nedges, dtype=np.int64)
+
+    ab = a + b
+    c_norm = c / (1 - ab)
+    a_norm = a / ab
+    for bit in range(scale):
+        src_bit = rand.random_sample(nedges) > ab
+        dst_bit = rand.random_sample(nedges) > np.where(src_bit, c_norm, a_norm)
+        src |= src_bit.astype(np.int64) << bit
+        dst |= dst_bit.astype(np.int64) << bit
+
+    # Hide the locality of the recursive construction
+    perm = rand.permutation(1 << scale)
+    return perm[src], perm[dst]
+
+def erdos_renyi(nvertices, nedges, seed=0):
+    """
+    Generate a G(n, m) Erdos-Renyi graph with edges drawn uniformly at random
+
+    Positional arguments:
+    --------------------
+    nvertices:
+        - The number of vertices
+    nedges:
+        - The number of edges
+
+    Optional arguments:
+    -------------------
+    seed:
+        - The random seed
+
+    Returns:
+    --------
+    A 2-tuple with the source and destination ID of each edge
+    """
+    import numpy as np
+
+    rand = np.random.RandomState(seed)
+    return (rand.randint(0, nvertices, nedges, dtype=np.int64),
+            rand.randint(0, nvertices, nedges, dtype=np.int64))
+
+def power_law(nvertices, avg_degree=16, exponent=2.1, seed=0):
+    """
+    Generate a Chung-Lu graph whose degrees follow a power law
+
+    Positional arguments:
+    --------------------
+    nvertices:
+        - The number of vertices
+
+    Optional arguments:
+    -------------------
+    avg_degree:
+        - The average out-degree
+    exponent:
+        - The exponent of the degree distribution
+    seed:
+        - The random seed
+
+    Returns:
+    --------
+    A 2-tuple with the source and destination ID of each edge
+    """
+    import numpy as np
+
+    rand = np.random.RandomState(seed)
+    weights = np.arange(1, nvertices + 1, dtype=np.float64) ** \
+            (-1. / (exponent - 1))
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+
+    nedges = int(avg_degree * nvertices)
+    src = np.searchsorted(cdf, rand.random_sample(nedges))
+    dst = np.searchsorted(cdf, rand.random_sample(nedges))
+    perm = rand.permutation(nvertices)
+    return perm[src], perm[dst]
+
+__generators__ = {
+        "rmat": lambda args: rmat(args.scale, args.edge_factor, seed=args.seed),
+        "er": lambda args: erdos_renyi(1 << args.scale,
+            args.edge_factor << args.scale, seed=args.seed),
+        "powerlaw": lambda args: power_law(1 << args.scale, args.edge_factor,
+            seed=args.seed),
+}
+
+def write_graph(src, dst, adj_fn, idx_fn, directed=True, nthread=4):
+    """
+    Write the edges (src[i], dst[i]) as a graphyti adjacency list and index
+    file
+    """
+    from .graphyti import Format
+    Format().array2graphyti(src, dst, adj_fn, idx_fn, directed, nthread)
+
+############################### Runner #########################################
+
+def peak_rss():
+    """
+    The peak resident set size of the process in bytes
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def reset_peak_rss():
+    # Supported since Linux 4.0; elsewhere the peak covers the whole process
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except (IOError, OSError):
+        pass
+
+def time_algorithms(graph, benchmarks=__benchmarks__, repeat=1):
+    """
+    Time each algorithm in `benchmarks` on `graph`
+
+    Returns:
+    --------
+    A list with a dict per algorithm holding the best time in seconds, the
+    edges processed per second and the peak RSS during the runs. An
+    algorithm that needs a directed graph is skipped on an undirected one,
+    with the reason under "skipped", and one that fails has its error under
+    "error" instead of the times.
+    """
+    ecount = graph.ecount()
+    directed = graph.is_directed()
+    results = []
+    for name, kwargs in benchmarks:
+        if not directed and name in __directed_only__:
+            results.append({"algorithm": name,
+                "skipped": "needs a directed graph"})
+            continue
+
+        kwargs = dict((k, v(graph) if callable(v) else v)
+                for k, v in kwargs.items())
+        best = None
+        reset_peak_rss()
+        try:
+            for _ in range(repeat):
+                start = time.time()
+                getattr(graph, name)(**kwargs)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception as e:
+            results.append({"algorithm": name, "error": str(e)})
+            continue
+
+        results.append({"algorithm": name, "seconds": best,
+            "edges_per_sec": ecount / best if best > 0 else None,
+            "peak_rss": peak_rss()})
+    return results
+
+def run(configs, src, dst, workdir, modes=__modes__,
+        benchmarks=__benchmarks__, repeat=1, directed=True, nthread=4):
+    """
+    Convert a generated graph and time the algorithms on it in each mode:
+    "mem" computes on the graph in memory, "safs" loads it into SAFS first
+
+    Returns:
+    --------
+    A list of results (see `time_algorithms`) tagged with their mode
+    """
+    from .Graph import Graph
+    from .graphyti import FileManager
+
+    adj_fn = os.path.join(os.path.abspath(workdir), "bench.adj")
+    idx_fn = os.path.join(os.path.abspath(workdir), "bench.idx")
+    write_graph(src, dst, adj_fn, idx_fn, directed, nthread)
+
+    results = []
+    for mode in modes:
+        if mode not in __modes__:
+            raise RuntimeError("Unknown benchmark mode '{}'".format(mode))
+
+        fm = FileManager(configs)
+        safs_files = []
+        g = None
+        try:
+            if mode == "mem":
+                g = Graph(adj_fn, idx_fn, configs)
+            else:
+                # Unique names so concurrent runs don't collide in SAFS
+                for fn in (adj_fn, idx_fn):
+                    safs_files.append("bench-{}{}".format(os.getpid(),
+                        os.path.splitext(fn)[1]))
+                    fm.load(safs_files[-1], fn)
+                g = Graph(safs_files[0], safs_files[1], configs)
+
+            for res in time_algorithms(g, benchmarks, repeat):
+                res["mode"] = mode
+                results.append(res)
+        finally:
+            del g
+            for fn in safs_files:
+                if fm.file_exists(fn):
+                    fm.delete(fn)
+    return results
+
+def compare(baseline, current, threshold=.1, min_seconds=.01):
+    """
+    Find the algorithms that got slower by more than `threshold` (a
+    fraction) between two result sets written by `run`. Runs that took
+    under `min_seconds` in both are too noisy to compare and are skipped.
+
+    Returns:
+    --------
+    A list of (algorithm, mode, baseline seconds, current seconds) tuples
+    """
+    base = dict(((r["algorithm"], r["mode"]), r["seconds"])
+            for r in baseline["results"] if "seconds" in r)
+    regressions = []
+    for r in current["results"]:
+        key = (r["algorithm"], r["mode"])
+        if key not in base or "seconds" not in r or \
+                max(base[key], r["seconds"]) < min_seconds:
+            continue
+        if r["seconds"] > base[key] * (1 + threshold):
+            regressions.append(key + (base[key], r["seconds"]))
+    return regressions
+
+############################### CLI ############################################
+
+def _run_main(args):
+    import platform
+    import tempfile
+    import shutil
+    from .graphyti import __version__
+
+    benchmarks = __benchmarks__
+    if args.algorithms:
+        benchmarks = [b for b in __benchmarks__ if b[0] in args.algorithms]
+
+    src, dst = __generators__[args.generator](args)
+    workdir = tempfile.mkdtemp(prefix="graphyti-bench-", dir=args.tmpdir)
+    try:
+        results = run(args.configs, src, dst, workdir, args.modes,
+                benchmarks, args.repeat, not args.undirected, args.nthread)
+    finally:
+        shutil.rmtree(workdir, True)
+
+    for r in results:
+        if "error" in r:
+            sys.stderr.write("FAILED {} ({}): {}\n".format(r["algorithm"],
+                r["mode"], r["error"]))
+
+    report = {
+            "version": __version__,
+            "host": platform.node(),
+            "graph": {"generator": args.generator, "scale": args.scale,
+                "edge_factor": args.edge_factor, "seed": args.seed,
+                "directed": not args.undirected, "nedges": len(src)},
+            "results": results,
+    }
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out)
+    else:
+        print(out)
+    return 0
+
+def _compare_main(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold,
+            args.min_seconds)
+    for name, mode, before, after in regressions:
+        print("REGRESSION {} ({}): {:.3f}s -> {:.3f}s (+{:.0f}%)".format(
+            name, mode, before, after, 100 * (after / before - 1)))
+    failures = [r for r in current["results"] if "error" in r]
+    for r in failures:
+        print("FAILED {} ({}): {}".format(r["algorithm"], r["mode"],
+            r["error"]))
+    if not regressions and not failures:
+        print("No regressions")
+    return 1 if regressions or failures else 0
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m graphyti.bench",
+            description="Benchmark graphyti on synthetic graphs")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    run_parser = sub.add_parser("run", help="Time the graph algorithms")
+    run_parser.add_argument("-c", "--configs", required=True,
+            help="The SAFS configuration file")
+    run_parser.add_argument("-g", "--generator", default="rmat",
+            choices=sorted(__generators__))
+    run_parser.add_argument("-s", "--scale", type=int, default=16,
+            help="The graph has 2**scale vertices")
+    run_parser.add_argument("-e", "--edge-factor", type=int, default=16,
+            help="The average number of edges per vertex")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("-u", "--undirected", action="store_true")
+    run_parser.add_argument("-m", "--modes", nargs="+", default=__modes__,
+            choices=__modes__)
+    run_parser.add_argument("-a", "--algorithms", nargs="+",
+            help="Only time these algorithms")
+    run_parser.add_argument("-r", "--repeat", type=int, default=1,
+            help="Report the best of this many runs")
+    run_parser.add_argument("-t", "--nthread", type=int, default=4,
+            help="Threads used to convert the graph")
+    run_parser.add_argument("--tmpdir", help="Where to write the graph")
+    run_parser.add_argument("-o", "--out", help="The JSON file to write")
+    run_parser.set_defaults(func=_run_main)
+
+    cmp_parser = sub.add_parser("compare",
+            help="Flag algorithms slower than in a baseline")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=.1,
+            help="The slowdown (as a fraction) counted as a regression")
+    cmp_parser.add_argument("--min-seconds", type=float, default=.01,
+            help="Ignore algorithms faster than this in both runs")
+    cmp_parser.set_defaults(func=_compare_main)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#ifndef __GRAPHYTI_CADJ_H__
+#define __GRAPHYTI_CADJ_H__
+
+/*
+ * A compressed adjacency list file. It holds the same adjacency lists as a
+ * FlashGraph adjacency list: for a directed graph every vertex's in-edge
+ * list, then every vertex's out-edge list, and for an undirected graph every
+ * vertex's list. Each list is sorted and stored as gaps in LEB128 varints,
+ * so neighbors that are numbered close to each other (e.g. after
+ * reordering) take a byte or two instead of four.
+ *
+ * Layout, all integers little endian:
+ *   char     magic[8]                    "GTCADJ1"
+ *   uint64_t num_vertices
+ *   uint64_t num_edges                   As in the FlashGraph header
+ *   uint64_t directed
+ *   uint64_t byte_offsets[num_blocks + 1] Start of each block in the data
+ *   uint64_t entry_offsets[num_blocks + 1] First list entry of each block
+ *   uint8_t  data[]
+ *
+ * A block holds CADJ_BLOCK_SIZE lists, each stored as varint(length),
+ * zigzag(first neighbor - vertex) and the gaps to the following neighbors.
+ * Blocks are encoded in parallel. They are decoded one list at a time
+ * straight into an adj_writer, so decoding holds a block, the index and
+ * one list in memory.
+ */
+
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+
+#include <algorithm>
+#include <memory>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "edgearrays.h"
+
+namespace gt {
+
+const size_t CADJ_BLOCK_SIZE = 64;
+const char CADJ_MAGIC[8] = "GTCADJ1";
+
+inline void put_varint(std::vector<uint8_t> &buf, uint64_t v) {
+    while (v >= 0x80) {
+        buf.push_back((uint8_t) (v | 0x80));
+        v >>= 7;
+    }
+    buf.push_back((uint8_t) v);
+}
+
+inline uint64_t get_varint(const uint8_t *&p, const uint8_t *end) {
+    uint64_t v = 0;
+    for (int shift = 0; p < end && shift < 64; shift += 7) {
+        uint8_t b = *p++;
+        v |= (uint64_t) (b & 0x7f) << shift;
+        if (!(b & 0x80))
+            return v;
+    }
+    throw std::runtime_error("Corrupt compressed adjacency list");
+}
+
+inline uint64_t zigzag(int64_t v) {
+    return ((uint64_t) v << 1) ^ (uint64_t) (v >> 63);
+}
+
+inline int64_t unzigzag(uint64_t v) {
+    return (int64_t) (v >> 1) ^ -(int64_t) (v & 1);
+}
+
+class cadj_file {
+    FILE *f;
+
+    public:
+    cadj_file(const std::string &fn, const char *mode) {
+        f = fopen(fn.c_str(), mode);
+        if (f == NULL)
+            throw std::runtime_error("Unable to open '" + fn + "': " +
+                    strerror(errno));
+    }
+
+    ~cadj_file() {
+        fclose(f);
+    }
+
+    void write(const void *data, size_t size) {
+        if (size && fwrite(data, size, 1, f) != 1)
+            throw std::runtime_error("Failed to write compressed " +
+                    std::string("adjacency list: ") + strerror(errno));
+    }
+
+    void read(void *data, size_t size) {
+        if (size && fread(data, size, 1, f) != 1)
+            throw std::runtime_error("Truncated compressed adjacency list");
+    }
+};
+
+/*
+ * Write the edges (src[i], dst[i]) to `fn` as the adjacency lists of a graph
+ * of `num_vertices` vertices, or of a vertex for every ID up to the largest
+ * one in the edges if that's more. Like edge_arrays_to_fg, an undirected
+ * edge goes in the lists of both of its vertices.
+ */
+inline void write_cadj(const id_column &src, const id_column &dst,
+        const std::string &fn, bool directed, size_t num_vertices=0) {
+    if (src.size() != dst.size())
+        throw std::runtime_error("`src` and `dst` must be the same length");
+    if (src.size() > 0)
+        num_vertices = std::max(num_vertices, std::max(check_ids(src, "src"),
+                    check_ids(dst, "dst")) + 1);
+    if (num_vertices == 0)
+        throw std::runtime_error("The graph has no vertices");
+
+    // List l belongs to vertex l % num_vertices. A directed graph's in-edge
+    // lists come first.
+    size_t num_edges = src.size();
+    size_t num_lists = directed ? num_vertices * 2 : num_vertices;
+    size_t in_list = 0, out_list = directed ? num_vertices : 0;
+
+    // Group the neighbors by list (a counting sort)
+    std::vector<uint64_t> starts(num_lists + 1, 0);
+    for (size_t i = 0; i < num_edges; i++) {
+        starts[out_list + src.get(i) + 1]++;
+        starts[in_list + dst.get(i) + 1]++;
+    }
+    for (size_t l = 0; l < num_lists; l++)
+        starts[l + 1] += starts[l];
+    std::vector<fg::vertex_id_t> neighbors(starts.back());
+    {
+        std::vector<uint64_t> next(starts.begin(), starts.end() - 1);
+        for (size_t i = 0; i < num_edges; i++) {
+            neighbors[next[out_list + src.get(i)]++] = dst.get(i);
+            neighbors[next[in_list + dst.get(i)]++] = src.get(i);
+        }
+    }
+
+    size_t num_blocks = (num_lists + CADJ_BLOCK_SIZE - 1) / CADJ_BLOCK_SIZE;
+    std::vector<std::vector<uint8_t> > blocks(num_blocks);
+#pragma omp parallel for schedule(dynamic, 64)
+    for (size_t b = 0; b < num_blocks; b++) {
+        size_t end = std::min(num_lists, (b + 1) * CADJ_BLOCK_SIZE);
+        for (size_t l = b * CADJ_BLOCK_SIZE; l < end; l++) {
+            fg::vertex_id_t *first = neighbors.data() + starts[l];
+            fg::vertex_id_t *last = neighbors.data() + starts[l + 1];
+            std::sort(first, last);
+
+            put_varint(blocks[b], last - first);
+            int64_t prev = l % num_vertices;
+            for (fg::vertex_id_t *n = first; n < last; n++) {
+                if (n == first)
+                    put_varint(blocks[b], zigzag((int64_t) *n - prev));
+                else
+                    put_varint(blocks[b], *n - prev);
+                prev = *n;
+            }
+        }
+    }
+
+    std::vector<uint64_t> byte_offsets(num_blocks + 1, 0);
+    std::vector<uint64_t> entry_offsets(num_blocks + 1, 0);
+    for (size_t b = 0; b < num_blocks; b++) {
+        byte_offsets[b + 1] = byte_offsets[b] + blocks[b].size();
+        entry_offsets[b + 1] = starts[std::min(num_lists,
+                (b + 1) * CADJ_BLOCK_SIZE)];
+    }
+
+    uint64_t header[3] = { num_vertices, num_edges, directed };
+    cadj_file f(fn, "wb");
+    f.write(CADJ_MAGIC, sizeof(CADJ_MAGIC));
+    f.write(header, sizeof(header));
+    f.write(byte_offsets.data(), byte_offsets.size() * sizeof(uint64_t));
+    f.write(entry_offsets.data(), entry_offsets.size() * sizeof(uint64_t));
+    for (size_t b = 0; b < num_blocks; b++)
+        f.write(blocks[b].data(), blocks[b].size());
+}
+
+/*
+ * Decode a compressed adjacency list written by `write_cadj` into a
+ * FlashGraph adjacency list and index, in SAFS if `safs`.
+ */
+class cadj_reader {
+    std::unique_ptr<cadj_file> f;
+    uint64_t num_vertices;
+    uint64_t num_edges;
+    bool directed;
+    std::vector<uint64_t> byte_offsets;
+    std::vector<uint64_t> entry_offsets;
+
+    public:
+    cadj_reader(const std::string &fn): f(new cadj_file(fn, "rb")) {
+        char magic[sizeof(CADJ_MAGIC)];
+        f->read(magic, sizeof(magic));
+        if (memcmp(magic, CADJ_MAGIC, sizeof(magic)) != 0)
+            throw std::runtime_error("'" + fn + "' isn't a compressed " +
+                    "adjacency list");
+
+        uint64_t header[3];
+        f->read(header, sizeof(header));
+        num_vertices = header[0];
+        num_edges = header[1];
+        directed = header[2];
+
+        size_t num_lists = directed ? num_vertices * 2 : num_vertices;
+        size_t num_blocks = (num_lists + CADJ_BLOCK_SIZE - 1) /
+            CADJ_BLOCK_SIZE;
+        byte_offsets.resize(num_blocks + 1);
+        entry_offsets.resize(num_blocks + 1);
+        f->read(byte_offsets.data(), byte_offsets.size() * sizeof(uint64_t));
+        f->read(entry_offsets.data(),
+                entry_offsets.size() * sizeof(uint64_t));
+        // Every edge is in two lists
+        if (entry_offsets.back() != num_edges * 2)
+            throw std::runtime_error("Corrupt compressed adjacency list");
+    }
+
+    uint64_t get_num_vertices() const {
+        return num_vertices;
+    }
+
+    uint64_t get_num_edges() const {
+        return num_edges;
+    }
+
+    bool is_directed() const {
+        return directed;
+    }
+
+    // Decode the lists into `adj_fn` and `index_fn`. Can be called once.
+    void decode(const std::string &adj_fn, const std::string &index_fn,
+            bool safs=false) {
+        adj_writer writer(safs, adj_fn, index_fn, directed, num_vertices);
+        std::vector<uint8_t> block;
+        std::vector<edge_t> list;
+        size_t num_blocks = byte_offsets.size() - 1;
+        size_t num_lists = directed ? num_vertices * 2 : num_vertices;
+        for (size_t b = 0; b < num_blocks; b++) {
+            block.resize(byte_offsets[b + 1] - byte_offsets[b]);
+            f->read(block.data(), block.size());
+            const uint8_t *p = block.data();
+            const uint8_t *end = p + block.size();
+            size_t e = entry_offsets[b];
+            size_t last_l = std::min(num_lists, (b + 1) * CADJ_BLOCK_SIZE);
+            for (size_t l = b * CADJ_BLOCK_SIZE; l < last_l; l++) {
+                fg::vertex_id_t v = l % num_vertices;
+                if (directed && l == num_vertices)
+                    writer.next_part();
+
+                uint64_t length = get_varint(p, end);
+                if (length > entry_offsets[b + 1] - e)
+                    throw std::runtime_error(
+                            "Corrupt compressed adjacency list");
+                list.clear();
+                int64_t prev = v;
+                for (uint64_t i = 0; i < length; i++) {
+                    uint64_t code = get_varint(p, end);
+                    prev = i == 0 ? prev + unzigzag(code) : prev + code;
+                    if (prev < 0 || (uint64_t) prev >= num_vertices)
+                        throw std::runtime_error(
+                                "Corrupt compressed adjacency list");
+                    list.push_back(edge_t(v, prev));
+                }
+                writer.add(list.data(), list.size());
+                e += length;
+            }
+            if (e != entry_offsets[b + 1] || p != end)
+                throw std::runtime_error("Corrupt compressed adjacency list");
+        }
+        if (writer.finish() != num_edges)
+            throw std::runtime_error("Corrupt compressed adjacency list");
+    }
+};
+}
+
+#endif
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The catalog of the edge lists `Format.load` has converted into SAFS
+
+import contextlib
+import json
+import os
+import time
+
+from .Configuration import Configuration
+
+__catalog_ext__ = ".catalog.json"
+__generation_ext__ = ".gen"
+__chunk_size__ = 1 << 20
+
+def catalog_path(configs):
+    """
+    The catalog of the SAFS data location in the configuration file
+    `configs`. It's kept next to `root_conf` rather than in it so SAFS never
+    sees it as one of its files.
+    """
+    root = Configuration.get_configs(configs).get("root_conf", "")
+    if not root:
+        raise RuntimeError("'root_conf' isn't set in '{}'".format(configs))
+    root = os.path.abspath(os.path.expanduser(root)).rstrip(os.sep)
+    return root + __catalog_ext__
+
+def generation_file(adj_fn):
+    """
+    The SAFS file next to an adjacency list that `Format.load` writes a new
+    generation to each time it loads the graph
+    """
+    return adj_fn + __generation_ext__
+
+def write_generation(path):
+    """
+    Write a new, unique generation to the local file `path` and return it
+    """
+    import uuid
+
+    generation = uuid.uuid4().hex
+    with open(path, "w") as f:
+        f.write(generation)
+    return generation
+
+def read_generation(fm, adj_fn):
+    """
+    The generation `Format.load` last wrote for the adjacency list `adj_fn`
+    in SAFS, or None if it has none
+
+    Positional arguments:
+    --------------------
+    fm:
+        - A `FileManager` for SAFS
+    adj_fn:
+        - The SAFS name of the adjacency list
+    """
+    import shutil
+    import tempfile
+
+    gen_fn = generation_file(adj_fn)
+    if not fm.file_exists(gen_fn):
+        return None
+    scratch = tempfile.mkdtemp(prefix="graphyti-")
+    try:
+        path = os.path.join(scratch, "graph.gen")
+        fm.export(path, gen_fn)
+        # SAFS files are read back in whole pages
+        with open(path, "rb") as f:
+            return f.read().rstrip(b"\0").decode("UTF-8")
+    finally:
+        shutil.rmtree(scratch, True)
+
+def content_hash(path):
+    """
+    The SHA-256 of the bytes in the file `path`
+    """
+    import hashlib
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(__chunk_size__)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+class Catalog(object):
+    def __init__(self, configs):
+        """
+        Maps the content of the edge lists and the options they were
+        converted with to the SAFS names of the graph they were loaded as.
+        The content hash of each file is remembered with its size and
+        modification time, so an unchanged edge list is only hashed once.
+        Each graph is remembered with the generation `Format.load` wrote for
+        it, so one that was loaded over since isn't returned.
+        """
+        self.configs = configs
+        self.path = catalog_path(configs)
+
+    @contextlib.contextmanager
+    def __locked(self):
+        # Loads in other processes update the same catalog
+        import fcntl
+
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            data = {}
+        data.setdefault("graphs", {})
+        data.setdefault("files", {})
+        return data
+
+    def __write(self, data):
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.rename(tmp, self.path)
+
+    def __file_manager(self):
+        from .graphyti import FileManager
+        return FileManager(self.configs)
+
+    def __generation(self, adj_fn, idx_fn):
+        # The generation of the graph in SAFS, or None if either of its
+        # files is missing
+        fm = self.__file_manager()
+        if not fm.file_exists(adj_fn) or not fm.file_exists(idx_fn):
+            return None
+        return read_generation(fm, adj_fn)
+
+    def key(self, files, **options):
+        """
+        The catalog key of the graph in the edge list `files` converted
+        with `options`. The order of the files doesn't matter.
+        """
+        import hashlib
+
+        with self.__locked():
+            known = self.__read()["files"]
+
+        # Hashing large files doesn't hold up loads in other processes
+        hashes = []
+        changed = {}
+        for fn in files:
+            path = os.path.abspath(fn)
+            st = os.stat(path)
+            stamp = [st.st_size, st.st_mtime_ns]
+            entry = known.get(path)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, "sha256": content_hash(path)}
+                changed[path] = entry
+            hashes.append(entry["sha256"])
+
+        if changed:
+            with self.__locked():
+                data = self.__read()
+                data["files"].update(changed)
+                self.__write(data)
+
+        desc = json.dumps({"files": sorted(hashes), "options": options},
+                sort_keys=True)
+        return hashlib.sha256(desc.encode("UTF-8")).hexdigest()
+
+    def find(self, key):
+        """
+        The SAFS names of the adjacency list and index file loaded for `key`
+        or None if it isn't in the catalog. An entry whose files were removed
+        from SAFS or changed since they were loaded is dropped.
+        """
+        with self.__locked():
+            data = self.__read()
+            entry = data["graphs"].get(key)
+            if entry is None:
+                return None
+            generation = self.__generation(entry["adj"], entry["idx"])
+            if generation is not None and \
+                    generation == entry.get("generation"):
+                return (entry["adj"], entry["idx"])
+            del data["graphs"][key]
+            self.__write(data)
+        return None
+
+    def names(self, key, name):
+        """
+        The SAFS names to load the graph of `key` as. That's `name` unless
+        it holds another graph in SAFS, in which case the graph is named
+        after its key as well.
+        """
+        import warnings
+
+        with self.__locked():
+            data = self.__read()
+            fm = self.__file_manager()
+            owners = dict((entry["adj"], k) for k, entry in
+                    data["graphs"].items())
+
+            for candidate in (name, "{}-{}".format(name, key[:12])):
+                adj_fn, idx_fn = candidate + ".adj", candidate + ".idx"
+                owner = owners.get(adj_fn)
+                if owner == key or (owner is None and
+                        not fm.file_exists(adj_fn) and
+                        not fm.file_exists(idx_fn)):
+                    break
+            else:
+                raise RuntimeError("'{}' and '{}' hold other graphs in SAFS".
+                        format(name + ".adj", adj_fn))
+
+        if candidate != name:
+            warnings.warn("'{}' holds another graph in SAFS, loading as '{}'".
+                    format(name + ".adj", adj_fn))
+        return (adj_fn, idx_fn)
+
+    def add(self, key, adj_fn, idx_fn, files, generation, **options):
+        """
+        Record that the graph of `key` is loaded as `adj_fn` and `idx_fn`
+        with the generation `Format.load` wrote for it
+        """
+        with self.__locked():
+            data = self.__read()
+            # The files may have been loaded over another graph
+            for k, entry in list(data["graphs"].items()):
+                if k != key and entry["adj"] == adj_fn:
+                    del data["graphs"][k]
+            data["graphs"][key] = {"adj": adj_fn, "idx": idx_fn,
+                    "sources": [os.path.abspath(fn) for fn in files],
+                    "options": options, "loaded": time.time(),
+                    "generation": generation}
+            self.__write(data)
+
+    def forget(self, adj_fn):
+        """
+        Drop the graphs loaded as `adj_fn`, e.g. because other files are
+        loaded over them
+        """
+        with self.__locked():
+            data = self.__read()
+            stale = [k for k, entry in data["graphs"].items()
+                    if entry["adj"] == adj_fn]
+            for k in stale:
+                del data["graphs"][k]
+            if stale:
+                self.__write(data)
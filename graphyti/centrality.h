@@ -0,0 +1,456 @@
+#ifndef __GRAPHYTI_CENTRALITY_H__
+#define __GRAPHYTI_CENTRALITY_H__
+
+/*
+ * Approximate betweenness and closeness centrality from a uniform sample of
+ * source vertices (Brandes & Pich) or pivots (Eppstein & Wang).
+ *
+ * Betweenness runs Brandes' algorithm from up to BC_MAX_WIDTH sources per
+ * traversal: each level reads a vertex's adjacency list once for every
+ * source that reaches it in that level, and the backward pass that
+ * accumulates dependencies does the same level by level. Closeness uses the
+ * bit-parallel multi-source BFS, keeping running sums of the distances
+ * rather than the distances themselves.
+ *
+ * Both report the standard error of each vertex's estimate, computed from
+ * the spread of the per-sample values.
+ */
+
+#include <math.h>
+#include <stdint.h>
+
+#include <algorithm>
+#include <limits>
+#include <random>
+#include <stdexcept>
+#include <string>
+#include <unordered_set>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+#include "msbfs.h"
+
+namespace gt {
+
+typedef uint32_t bc_mask_t;
+
+// The most sources served by one betweenness traversal
+const size_t BC_MAX_WIDTH = 16;
+// The state each source of a traversal keeps for every vertex: its level,
+// number of shortest paths (sigma) and dependency (delta)
+const size_t BC_BYTES_PER_SOURCE = sizeof(uint16_t) + sizeof(double) +
+    sizeof(float);
+const uint16_t BC_UNREACHED = std::numeric_limits<uint16_t>::max();
+
+/*
+ * The number of samples for which every estimate is within `epsilon` of the
+ * largest possible value with probability 1 - `delta`, by Hoeffding's
+ * inequality and a union bound over the vertices.
+ */
+inline size_t num_samples(size_t num_vertices, double epsilon, double delta) {
+    if (epsilon <= 0 || epsilon >= 1 || delta <= 0 || delta >= 1)
+        throw std::runtime_error("`epsilon` and `delta` must be between 0 " +
+                std::string("and 1"));
+    return (size_t) ceil(log(2.0 * num_vertices / delta) /
+            (2 * epsilon * epsilon));
+}
+
+// `num` distinct vertices drawn uniformly, in increasing order
+inline std::vector<fg::vertex_id_t> sample_vertices(size_t num_vertices,
+        size_t num, uint64_t seed) {
+    std::vector<fg::vertex_id_t> res;
+    if (num >= num_vertices) {
+        for (size_t i = 0; i < num_vertices; i++)
+            res.push_back(i);
+        return res;
+    }
+
+    // Floyd's algorithm
+    std::mt19937_64 gen(seed);
+    std::unordered_set<fg::vertex_id_t> chosen;
+    for (size_t i = num_vertices - num; i < num_vertices; i++) {
+        fg::vertex_id_t v = std::uniform_int_distribution<size_t>(0, i)(gen);
+        if (!chosen.insert(v).second)
+            chosen.insert(i);
+    }
+    res.assign(chosen.begin(), chosen.end());
+    std::sort(res.begin(), res.end());
+    return res;
+}
+
+// The per-source state of every vertex in one betweenness traversal, which
+// takes BC_BYTES_PER_SOURCE bytes per vertex and source. Each vertex only
+// touches its own entries.
+struct bc_state {
+    size_t width;
+    std::vector<uint16_t> level;
+    std::vector<double> sigma;
+    std::vector<float> delta;
+
+    bc_state(size_t num_vertices, size_t width): width(width),
+        level(num_vertices * width), sigma(num_vertices * width),
+        delta(num_vertices * width) {
+    }
+
+    void reset() {
+        std::fill(level.begin(), level.end(), BC_UNREACHED);
+        std::fill(sigma.begin(), sigma.end(), 0);
+        std::fill(delta.begin(), delta.end(), 0);
+    }
+};
+
+class bc_message: public fg::vertex_message {
+    bc_mask_t sources;
+    int level;
+    // Indexed by source
+    double values[BC_MAX_WIDTH];
+
+    public:
+    bc_message(bc_mask_t sources, int level, bool activate):
+        fg::vertex_message(sizeof(bc_message), activate) {
+        this->sources = sources;
+        this->level = level;
+    }
+
+    void set_value(size_t src, double value) {
+        values[src] = value;
+    }
+
+    bc_mask_t get_sources() const {
+        return sources;
+    }
+
+    int get_level() const {
+        return level;
+    }
+
+    double get_value(size_t src) const {
+        return values[src];
+    }
+};
+
+class bc_vertex: public fg::compute_directed_vertex {
+    bc_mask_t visited;
+    // As in msbfs_vertex, the sources reaching this vertex in the next
+    // levels, indexed by level parity
+    bc_mask_t reached[2];
+    // The sources this vertex runs for in the current level
+    bc_mask_t frontier;
+
+    public:
+    bc_vertex(fg::vertex_id_t id): fg::compute_directed_vertex(id) {
+        visited = 0;
+        reached[0] = reached[1] = 0;
+        frontier = 0;
+    }
+
+    void seed(bc_mask_t sources) {
+        reached[0] |= sources;
+    }
+
+    bc_mask_t get_visited() const {
+        return visited;
+    }
+
+    bc_mask_t get_pending(int level) const {
+        return reached[level % 2];
+    }
+
+    void expand(bc_mask_t sources, int level) {
+        reached[level % 2] |= sources;
+    }
+
+    // Take the sources reaching this vertex in `level`
+    bc_mask_t start_level(int level) {
+        frontier = reached[level % 2] & ~visited;
+        reached[level % 2] = 0;
+        visited |= frontier;
+        return frontier;
+    }
+
+    void set_frontier(bc_mask_t frontier) {
+        this->frontier = frontier;
+    }
+
+    bc_mask_t get_frontier() const {
+        return frontier;
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg);
+};
+
+/*
+ * The forward pass counts the shortest paths (sigma) from each source level
+ * by level. Each backward pass, run from the deepest level up, sends the
+ * vertices of one level's dependencies (delta) to their predecessors.
+ */
+class bc_vertex_program: public fg::vertex_program_impl<bc_vertex> {
+    bc_state *state;
+    bool directed;
+    // The level the backward pass runs on, or -1 for the forward pass
+    int backward_level;
+
+    double *entry_sigma(fg::vertex_id_t id) {
+        return &state->sigma[id * state->width];
+    }
+
+    public:
+    bc_vertex_program(bc_state *state, bool directed, int backward_level) {
+        this->state = state;
+        this->directed = directed;
+        this->backward_level = backward_level;
+    }
+
+    void request(bc_vertex &v, fg::vertex_id_t id, fg::edge_type etype) {
+        if (directed) {
+            fg::directed_vertex_request req(id, etype);
+            v.request_partial_vertices(&req, 1);
+        } else {
+            v.request_vertices(&id, 1);
+        }
+    }
+
+    void run(bc_vertex &v) {
+        fg::vertex_id_t id = get_vertex_id(v);
+        size_t width = state->width;
+        if (backward_level < 0) {
+            int level = get_graph().get_curr_level();
+            bc_mask_t frontier = v.start_level(level);
+            if (frontier == 0)
+                return;
+            for (size_t j = 0; j < width; j++)
+                if (frontier & (1U << j))
+                    state->level[id * width + j] = level;
+            request(v, id, fg::OUT_EDGE);
+        } else {
+            bc_mask_t frontier = 0;
+            for (size_t j = 0; j < width; j++)
+                if (state->level[id * width + j] == backward_level)
+                    frontier |= 1U << j;
+            v.set_frontier(frontier);
+            if (frontier)
+                request(v, id, fg::IN_EDGE);
+        }
+    }
+
+    void run(bc_vertex &v, const fg::page_vertex &vertex) {
+        fg::vertex_id_t id = vertex.get_id();
+        size_t width = state->width;
+        bc_mask_t frontier = v.get_frontier();
+        bool forward = backward_level < 0;
+        // Forward messages carry the sender's path counts to its successors,
+        // which then run in the next level. Backward ones carry its
+        // dependencies per path to its predecessors, which run in the next
+        // backward pass.
+        bc_message msg(frontier, forward ? get_graph().get_curr_level() + 1 :
+                backward_level - 1, forward);
+        for (size_t j = 0; j < width; j++)
+            if (frontier & (1U << j))
+                msg.set_value(j, forward ? entry_sigma(id)[j] :
+                        (1 + state->delta[id * width + j]) /
+                        entry_sigma(id)[j]);
+
+        fg::edge_type etype = forward || !directed ? fg::OUT_EDGE :
+            fg::IN_EDGE;
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(etype, 0,
+                vertex.get_num_edges(etype));
+        multicast_msg(it, msg);
+    }
+
+    void run_on_message(bc_vertex &v, const bc_message &msg) {
+        fg::vertex_id_t id = get_vertex_id(v);
+        size_t width = state->width;
+        int level = msg.get_level();
+        bc_mask_t sources = msg.get_sources();
+        if (backward_level < 0) {
+            // Skip the sources that reached this vertex earlier or in the
+            // sender's level
+            sources &= ~(v.get_visited() | v.get_pending(level - 1));
+            for (size_t j = 0; j < width; j++)
+                if (sources & (1U << j))
+                    entry_sigma(id)[j] += msg.get_value(j);
+            v.expand(sources, level);
+        } else {
+            // Only the predecessors on shortest paths take a share
+            for (size_t j = 0; j < width; j++)
+                if ((sources & (1U << j)) &&
+                        state->level[id * width + j] == level)
+                    state->delta[id * width + j] +=
+                        entry_sigma(id)[j] * msg.get_value(j);
+        }
+    }
+};
+
+class bc_vertex_program_creater: public fg::vertex_program_creater {
+    bc_state *state;
+    bool directed;
+    int backward_level;
+
+    public:
+    bc_vertex_program_creater(bc_state *state, bool directed,
+            int backward_level) {
+        this->state = state;
+        this->directed = directed;
+        this->backward_level = backward_level;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(
+                new bc_vertex_program(state, directed, backward_level));
+    }
+};
+
+inline void bc_vertex::run(fg::vertex_program &prog) {
+    ((bc_vertex_program &) prog).run(*this);
+}
+
+inline void bc_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    ((bc_vertex_program &) prog).run(*this, vertex);
+}
+
+inline void bc_vertex::run_on_message(fg::vertex_program &prog,
+        const fg::vertex_message &msg) {
+    ((bc_vertex_program &) prog).run_on_message(*this,
+            (const bc_message &) msg);
+}
+
+/*
+ * The most sources per betweenness traversal whose state fits in `budget`
+ * bytes, at least 1
+ */
+inline size_t bc_width(size_t num_vertices, size_t budget) {
+    size_t per_source = std::max<size_t>(num_vertices, 1) *
+        BC_BYTES_PER_SOURCE;
+    return std::max<size_t>(1, std::min(BC_MAX_WIDTH, budget / per_source));
+}
+
+/*
+ * Estimate the betweenness of every vertex from the dependencies of the
+ * `sources` on it, running `width` sources per traversal. `values` and
+ * `errors` receive the estimates and their standard errors.
+ */
+inline void sampled_betweenness(fg::FG_graph::ptr fg,
+        const std::vector<fg::vertex_id_t> &sources, size_t width,
+        double *values, double *errors) {
+    const fg::graph_header &header = fg->get_graph_header();
+    size_t num_vertices = header.get_num_vertices();
+    bool directed = header.is_directed_graph();
+    if (width < 1 || width > BC_MAX_WIDTH)
+        throw std::runtime_error("`batch` must be between 1 and " +
+                std::to_string(BC_MAX_WIDTH));
+
+    std::vector<double> sum(num_vertices), sumsq(num_vertices);
+    bc_state state(num_vertices, width);
+    for (size_t first = 0; first < sources.size(); first += width) {
+        size_t num = std::min(width, sources.size() - first);
+        state.reset();
+
+        fg::graph_index::ptr index =
+            fg::NUMA_graph_index<bc_vertex>::create(header);
+        fg::graph_engine::ptr graph = fg->create_engine(index);
+
+        std::vector<fg::vertex_id_t> starts(sources.begin() + first,
+                sources.begin() + first + num);
+        for (size_t i = 0; i < num; i++) {
+            ((bc_vertex &) graph->get_vertex(starts[i])).seed(1U << i);
+            state.sigma[starts[i] * width + i] = 1;
+        }
+        graph->start(starts.data(), starts.size(),
+                fg::vertex_initializer::ptr(),
+                fg::vertex_program_creater::ptr(
+                    new bc_vertex_program_creater(&state, directed, -1)));
+        graph->wait4complete();
+
+        int depth = 0;
+#pragma omp parallel for reduction(max:depth)
+        for (size_t i = 0; i < state.level.size(); i++)
+            if (state.level[i] != BC_UNREACHED)
+                depth = std::max(depth, (int) state.level[i]);
+
+        // The sources' own dependencies aren't counted, so level 1 needn't
+        // send them anything
+        for (int level = depth; level > 1; level--) {
+            graph->start_all(fg::vertex_initializer::ptr(),
+                    fg::vertex_program_creater::ptr(
+                        new bc_vertex_program_creater(&state, directed,
+                            level)));
+            graph->wait4complete();
+        }
+
+#pragma omp parallel for
+        for (size_t v = 0; v < num_vertices; v++) {
+            for (size_t j = 0; j < num; j++) {
+                size_t i = v * width + j;
+                if (state.level[i] != BC_UNREACHED && state.level[i] > 0) {
+                    sum[v] += state.delta[i];
+                    sumsq[v] += (double) state.delta[i] * state.delta[i];
+                }
+            }
+        }
+    }
+
+    // Each source's dependencies, scaled by the number of vertices, are an
+    // unbiased estimate. Sampling without replacement shrinks the variance
+    // by the finite population correction.
+    double s = sources.size();
+    double n = num_vertices;
+    double fpc = n > 1 ? (n - s) / (n - 1) : 0;
+#pragma omp parallel for
+    for (size_t v = 0; v < num_vertices; v++) {
+        double mean = s > 0 ? sum[v] / s : 0;
+        double var = s > 1 ? std::max(0.0, (sumsq[v] - s * mean * mean) /
+                (s - 1)) : NAN;
+        values[v] = n * mean;
+        errors[v] = n * sqrt(var / s * fpc);
+    }
+}
+
+/*
+ * Estimate the closeness of every vertex as `closeness` computes it, the
+ * inverse of the sum of its hop distances along `etype` to the vertices it
+ * reaches, from its distances to the `pivots`. `values` and `errors`
+ * receive the estimates and their standard errors.
+ */
+inline void sampled_closeness(fg::FG_graph::ptr fg,
+        const std::vector<fg::vertex_id_t> &pivots, fg::edge_type etype,
+        double *values, double *errors) {
+    size_t num_vertices = fg->get_graph_header().get_num_vertices();
+
+    // The pivots search backwards, so the distances they find are to them
+    fg::edge_type reverse = etype == fg::IN_EDGE ? fg::OUT_EDGE :
+        etype == fg::OUT_EDGE ? fg::IN_EDGE : etype;
+    distance_sums sums(num_vertices);
+    std::vector<size_t> counts(pivots.size());
+    multi_source_bfs(fg, pivots, reverse, counts.data(), NULL, NULL, &sums);
+
+    // A pivot's distance, or 0 if it isn't reached, scaled by the number of
+    // vertices is an unbiased estimate of the sum of distances, as for
+    // betweenness
+    double s = pivots.size();
+    double n = num_vertices;
+    double fpc = n > 1 ? (n - s) / (n - 1) : 0;
+#pragma omp parallel for
+    for (size_t v = 0; v < num_vertices; v++) {
+        if (sums.sum[v] == 0) {
+            values[v] = 0;
+            errors[v] = NAN;
+            continue;
+        }
+        double mean = sums.sum[v] / s;
+        double var = s > 1 ? std::max(0.0, (sums.sumsq[v] - s * mean * mean) /
+                (s - 1)) : NAN;
+        double total = n * mean;
+        values[v] = 1 / total;
+        // By the delta method
+        errors[v] = n * sqrt(var / s * fpc) / (total * total);
+    }
+}
+}
+
+#endif
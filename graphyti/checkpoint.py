@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Checkpoints of long running `Graph` algorithms
+
+import json
+import os
+
+from .ResultCache import _canonical
+
+class Checkpoint(object):
+    def __init__(self, directory, name, fingerprint, args, kwargs):
+        """
+        The checkpoints of one algorithm call, kept in `directory` under the
+        algorithm's name: `<name>.json` identifies the call, `<name>.state`
+        holds the state an algorithm saves while it runs and `<name>.npy`
+        the result once it's done
+        """
+        import hashlib
+
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        base = os.path.join(self.directory, name)
+        self.meta_path = base + ".json"
+        self.state_path = base + ".state"
+        self.result_path = base + ".npy"
+
+        desc = repr((fingerprint, name, _canonical(tuple(args)),
+            _canonical(kwargs)))
+        self.call = hashlib.sha1(desc.encode("UTF-8")).hexdigest()
+
+    def __meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def __write_meta(self, done):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"call": self.call, "done": done}, f)
+        os.rename(tmp, self.meta_path)
+
+    def __remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def matches(self):
+        """
+        Whether the checkpoints are of this call, i.e., the same algorithm
+        and arguments on the same graph
+        """
+        meta = self.__meta()
+        return meta is not None and meta.get("call") == self.call
+
+    def result(self):
+        """
+        The result of this call if it finished, otherwise None
+        """
+        import numpy as np
+
+        meta = self.__meta()
+        if meta is None or meta.get("call") != self.call or \
+                not meta.get("done"):
+            return None
+        try:
+            return np.load(self.result_path)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def start(self):
+        """
+        Drop the checkpoints of any earlier call and record this one
+        """
+        self.__remove(self.state_path)
+        self.__remove(self.result_path)
+        self.__write_meta(False)
+
+    def finish(self, result):
+        """
+        Keep the `result` of this call in place of its saved state
+        """
+        import numpy as np
+
+        tmp = self.result_path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(result))
+        os.rename(tmp, self.result_path)
+        self.__write_meta(True)
+        self.__remove(self.state_path)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Time budgets, cancellation and progress reports of `Graph` algorithm calls
+
+import os
+import threading
+import time
+
+# How often a call running in another thread or process is checked on, in
+# seconds
+__poll_interval__ = .1
+
+class RunControl(object):
+    def __init__(self, timeout=None, cancel=None, progress=None):
+        """
+        The limits of one algorithm call: it may run for `timeout` seconds
+        and until `cancel`, a `threading.Event`, is set. `progress` is
+        called with a dict for each iteration holding its number
+        (`iteration`), the vertices that were active in it
+        (`active_vertices`) and the time it took (`seconds`).
+        """
+        if timeout is not None and timeout < 0:
+            raise RuntimeError("`timeout` must not be negative")
+        self.deadline = None if timeout is None else \
+                time.monotonic() + timeout
+        self.cancel = cancel
+        self.progress = progress
+        # Set when the call was stopped before it finished
+        self.stopped = False
+
+    def cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
+
+    def expired(self):
+        """
+        Whether the call should stop
+        """
+        return self.cancelled() or (self.deadline is not None and
+                time.monotonic() >= self.deadline)
+
+    def report(self, iteration, active_vertices, seconds):
+        if self.progress is not None:
+            self.progress({"iteration": iteration,
+                "active_vertices": active_vertices, "seconds": seconds})
+
+def run_in_process(control, files, options, name, args, kwargs):
+    """
+    Run the `Graph` method `name` in a child Python process, on a graph
+    opened there on `files` with `options`. The child is killed as soon as
+    `control` expires, which is the only way to stop an algorithm that runs
+    inside FlashGraph part way. The calling process keeps its graph and
+    SAFS cache, but the child opens the graph anew and starts with a cold
+    cache.
+
+    Returns:
+    --------
+    The method's result, or None when `kwargs` has it written to an `out`
+    file
+
+    Raises:
+    -------
+    TimeoutError if the time budget ran out, or
+    `concurrent.futures.CancelledError` if `control.cancel` was set
+    """
+    import concurrent.futures
+    import pickle
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+
+    scratch = tempfile.mkdtemp(prefix="graphyti-")
+    try:
+        request_fn = os.path.join(scratch, "request.pickle")
+        result_fn = os.path.join(scratch, "result.pickle")
+        with open(request_fn, "wb") as f:
+            pickle.dump((files, options, name, args, kwargs), f)
+
+        # The child finds this graphyti, and its scratch files are removed
+        # with ours if it's killed
+        env = dict(os.environ)
+        package_dir = os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None,
+            (package_dir, env.get("PYTHONPATH"))))
+        env["TMPDIR"] = scratch
+        child = subprocess.Popen([sys.executable, "-c",
+            "import graphyti.control as c; c._child_main()", request_fn,
+            result_fn], env=env)
+        try:
+            while True:
+                try:
+                    child.wait(__poll_interval__)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if control.expired():
+                    control.stopped = True
+                    if control.cancelled():
+                        raise concurrent.futures.CancelledError(
+                                "`{}` was cancelled".format(name))
+                    raise TimeoutError("`{}` ran out of time".format(name))
+        finally:
+            if child.poll() is None:
+                child.kill()
+                child.wait()
+
+        if not os.path.exists(result_fn):
+            raise RuntimeError("`{}` exited with code {} before it "
+                    "finished".format(name, child.returncode))
+        with open(result_fn, "rb") as f:
+            ok, res = pickle.load(f)
+        if not ok:
+            raise res
+        return res
+    finally:
+        shutil.rmtree(scratch, True)
+
+def _child_main():
+    # The child process of `run_in_process`
+    import pickle
+    import sys
+
+    request_fn, result_fn = sys.argv[1:3]
+    with open(request_fn, "rb") as f:
+        files, options, name, args, kwargs = pickle.load(f)
+    try:
+        from .Graph import Graph
+        from .output import is_target
+        res = getattr(Graph(*files, **options), name)(*args, **kwargs)
+        # A result written to a file is mapped from there by the parent
+        res = (True, None if is_target(kwargs.get("out")) else res)
+        out = pickle.dumps(res, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        try:
+            out = pickle.dumps((False, e), pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            out = pickle.dumps((False, RuntimeError(str(e))),
+                    pickle.HIGHEST_PROTOCOL)
+
+    # Written whole under another name, so a result file is always complete
+    with open(result_fn + ".part", "wb") as f:
+        f.write(out)
+    os.rename(result_fn + ".part", result_fn)
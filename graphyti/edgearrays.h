@@ -0,0 +1,142 @@
+#ifndef __GRAPHYTI_EDGEARRAYS_H__
+#define __GRAPHYTI_EDGEARRAYS_H__
+
+/*
+ * Convert edges held in memory (or memory-mapped) as integer arrays to the
+ * FlashGraph format. The edges are sorted natively and the adjacency lists
+ * written straight from the sorted edges, so nothing is staged on disk or
+ * formatted as text and no Python objects are created per edge.
+ */
+
+#include <stdint.h>
+#if defined(_OPENMP)
+#include <omp.h>
+#include <parallel/algorithm>
+#endif
+
+#include <algorithm>
+#include <limits>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "adjwriter.h"
+
+namespace gt {
+
+// A strided column of integer vertex IDs
+class id_column {
+    const char *data;
+    ssize_t stride;
+    size_t len;
+    bool is_signed;
+    size_t itemsize;
+
+    public:
+    id_column(const void *data, ssize_t stride, size_t len, bool is_signed,
+            size_t itemsize) {
+        if (itemsize != 1 && itemsize != 2 && itemsize != 4 && itemsize != 8)
+            throw std::runtime_error("Vertex IDs must be 8, 16, 32 or 64 " +
+                    std::string("bit integers"));
+        this->data = (const char *) data;
+        this->stride = stride;
+        this->len = len;
+        this->is_signed = is_signed;
+        this->itemsize = itemsize;
+    }
+
+    size_t size() const {
+        return len;
+    }
+
+    // Unsigned IDs past INT64_MAX come back negative and are rejected
+    int64_t get(size_t i) const {
+        const char *p = data + i * stride;
+        switch (itemsize) {
+            case 1:
+                return is_signed ? *(const int8_t *) p : *(const uint8_t *) p;
+            case 2:
+                return is_signed ? *(const int16_t *) p : *(const uint16_t *) p;
+            case 4:
+                return is_signed ? *(const int32_t *) p : *(const uint32_t *) p;
+            default:
+                return is_signed ? *(const int64_t *) p :
+                    (int64_t) *(const uint64_t *) p;
+        }
+    }
+};
+
+// Make sure every ID fits in a FlashGraph vertex_id_t. Returns the largest.
+inline size_t check_ids(const id_column &ids, const std::string &name) {
+    const int64_t max_id = std::numeric_limits<fg::vertex_id_t>::max();
+    bool valid = true;
+    int64_t largest = 0;
+#pragma omp parallel for reduction(&&:valid) reduction(max:largest)
+    for (size_t i = 0; i < ids.size(); i++) {
+        valid = valid && ids.get(i) >= 0 && ids.get(i) < max_id;
+        largest = std::max(largest, ids.get(i));
+    }
+
+    if (!valid)
+        throw std::runtime_error("`" + name + "` must hold IDs between 0 and "
+                + std::to_string(max_id - 1));
+    return largest;
+}
+
+// Sort the edges with `nthread` threads
+inline void sort_edges(std::vector<edge_t> &edges, int nthread) {
+#if defined(_OPENMP)
+    int prev = omp_get_max_threads();
+    omp_set_num_threads(std::max(nthread, 1));
+    __gnu_parallel::sort(edges.begin(), edges.end());
+    omp_set_num_threads(prev);
+#else
+    std::sort(edges.begin(), edges.end());
+#endif
+}
+
+/*
+ * Convert the edges (src[i], dst[i]) to an adjacency list and index file,
+ * sorting them with `nthread` threads. The graph has a vertex for every ID
+ * up to the largest one in the edges, or `min_vertices` if that's more.
+ * Duplicate edges are kept, as el2fg keeps them.
+ */
+inline void edge_arrays_to_fg(const id_column &src, const id_column &dst,
+        const std::string &adj_fn, const std::string &index_fn,
+        bool directed, int nthread, bool safs=false,
+        size_t min_vertices=0) {
+    if (src.size() != dst.size())
+        throw std::runtime_error("`src` and `dst` must be the same length");
+    if (src.size() == 0)
+        throw std::runtime_error("There are no edges to convert");
+    size_t num_vertices = std::max(std::max(check_ids(src, "src"),
+                check_ids(dst, "dst")) + 1, min_vertices);
+
+    // A directed graph's in-edge lists are written first, keyed on `dst`.
+    // Each undirected edge is in the lists of both of its vertices.
+    size_t num = src.size();
+    std::vector<edge_t> edges(directed ? num : num * 2);
+#pragma omp parallel for num_threads(std::max(nthread, 1))
+    for (size_t i = 0; i < num; i++) {
+        edges[i] = edge_t(dst.get(i), src.get(i));
+        if (!directed)
+            edges[num + i] = edge_t(src.get(i), dst.get(i));
+    }
+    sort_edges(edges, nthread);
+
+    adj_writer writer(safs, adj_fn, index_fn, directed, num_vertices);
+    writer.add(edges.data(), edges.size());
+    if (directed) {
+#pragma omp parallel for num_threads(std::max(nthread, 1))
+        for (size_t i = 0; i < num; i++)
+            edges[i] = edge_t(src.get(i), dst.get(i));
+        sort_edges(edges, nthread);
+        writer.next_part();
+        writer.add(edges.data(), edges.size());
+    }
+    writer.finish();
+}
+}
+
+#endif
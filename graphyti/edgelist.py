@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Helpers used by `Format` to prepare edge list files for conversion
+
+import os
+import threading
+
+from .Exceptions.runtime import UnsupportedError
+
+# el2fg and the ingester decompress these themselves
+__gzip_exts__ = (".gz",)
+__zstd_exts__ = (".zst", ".zstd")
+
+def _is_glob(edgelist):
+    return any(c in edgelist for c in "*?[")
+
+def graph_name(edgelist):
+    """
+    The name of the graph stored in `edgelist` i.e., its basename without
+    the compression and file extensions. The graph in a directory or in the
+    files a glob pattern matches is named after the directory.
+    """
+    if os.path.isdir(edgelist) or _is_glob(edgelist):
+        directory = edgelist if os.path.isdir(edgelist) else \
+                os.path.dirname(edgelist)
+        return os.path.basename(os.path.abspath(directory))
+
+    name = os.path.basename(edgelist)
+    root, ext = os.path.splitext(name)
+    if ext.lower() in __gzip_exts__ + __zstd_exts__:
+        name = root
+    return os.path.splitext(name)[0]
+
+class _EdgeList(object):
+    # An edge list the ingester reads directly
+    def __init__(self, edgelist):
+        self.path = edgelist
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+class _ZstdStream(object):
+    # Decompress a zstd edge list into an anonymous pipe that the ingester
+    # reads through `path` like any other file, so the decompressed edges are
+    # never written out
+    def __init__(self, edgelist):
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedError("Reading zstd compressed edge lists " +
+                    "requires the `zstandard` package")
+
+        self.__read_fd, write_fd = os.pipe()
+        self.path = "/dev/fd/{}".format(self.__read_fd)
+
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__feed,
+                args=(zstandard.ZstdDecompressor(), edgelist, write_fd))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __feed(self, decompressor, edgelist, write_fd):
+        try:
+            # The pipe is closed, ending the stream, whatever happens
+            with os.fdopen(write_fd, "wb") as dst, open(edgelist, "rb") as src:
+                decompressor.copy_stream(src, dst)
+        except BrokenPipeError:
+            # The ingester stopped reading, so it has failed already
+            pass
+        except Exception as e:
+            self.__error = e
+
+    def __stop(self):
+        # With the last read end closed a blocked writer gets EPIPE
+        if self.__read_fd is not None:
+            os.close(self.__read_fd)
+            self.__read_fd = None
+        self.__thread.join()
+
+    def close(self):
+        self.__stop()
+        # A truncated stream looks like a short edge list to the ingester
+        if self.__error is not None:
+            raise RuntimeError("Failed to decompress edge list: {}".format(
+                self.__error))
+
+    def abort(self):
+        self.__stop()
+
+def expand_edgelists(edgelists):
+    """
+    Expand the directories (every file they hold that isn't hidden) and glob
+    patterns in `edgelists`, a path or a list of paths, into a list of files
+    """
+    import glob
+
+    if isinstance(edgelists, str):
+        edgelists = [edgelists]
+
+    files = []
+    for edgelist in edgelists:
+        if os.path.isdir(edgelist):
+            matches = [os.path.join(edgelist, fn) for fn in
+                    sorted(os.listdir(edgelist)) if not fn.startswith(".")]
+            matches = [fn for fn in matches if os.path.isfile(fn)]
+        elif _is_glob(edgelist) and not os.path.exists(edgelist):
+            matches = sorted(glob.glob(edgelist))
+        else:
+            matches = [edgelist]
+
+        if not matches:
+            raise RuntimeError("No edge lists found in '{}'".format(edgelist))
+        files.extend(matches)
+    return files
+
+def ingest_files(edgelists):
+    """
+    Open the files `Format.ingest` parses from `edgelists` (see
+    `expand_edgelists`). Plain text and gzip compressed files are read
+    directly and zstd compressed ones through a pipe. Each returned object's
+    `path` is read by the ingester, after which `close` must be called (or
+    `abort` if the ingestion failed).
+    """
+    sources = []
+    try:
+        for fn in expand_edgelists(edgelists):
+            if os.path.splitext(fn)[1].lower() in __zstd_exts__:
+                sources.append(_ZstdStream(fn))
+            else:
+                sources.append(_EdgeList(fn))
+    except BaseException:
+        for source in sources:
+            source.abort()
+        raise
+    return sources
+
+def map_edges(edgelist, dtype="int64"):
+    """
+    Memory-map a binary edge list: either a `.npy` file holding an
+    (nedges, 2) array or a raw file of consecutive (src, dst) pairs of type
+    `dtype`. Returns the source and destination columns.
+    """
+    import numpy as np
+
+    if os.path.splitext(edgelist)[1].lower() == ".npy":
+        edges = np.load(edgelist, mmap_mode="r")
+    else:
+        edges = np.memmap(edgelist, dtype=dtype, mode="r")
+        if edges.size % 2:
+            raise RuntimeError("Edge list '{}' holds an odd number of IDs".format(
+                edgelist))
+        edges = edges.reshape(-1, 2)
+
+    # The conversion has nowhere to put weights, so don't silently drop them
+    if edges.ndim == 2 and edges.shape[1] > 2:
+        raise UnsupportedError("Edge list '{}' has {} columns, but edge " \
+                "weights and attributes aren't supported".format(edgelist,
+                    edges.shape[1]))
+    if edges.ndim != 2 or edges.shape[1] != 2:
+        raise RuntimeError("Edge list '{}' must have shape (nedges, 2)".format(
+            edgelist))
+    return edges[:, 0], edges[:, 1]
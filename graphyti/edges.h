@@ -0,0 +1,394 @@
+#ifndef __GRAPHYTI_EDGES_H__
+#define __GRAPHYTI_EDGES_H__
+
+/*
+ * Read the edges of a graph back from its adjacency list. Every vertex reads
+ * its own edge list; each worker thread buffers the edges it sees and hands
+ * them over at the end of the iteration.
+ */
+
+#include <algorithm>
+#include <mutex>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+namespace gt {
+
+class edge_collector {
+    std::mutex lock;
+    std::vector<fg::vertex_id_t> src;
+    std::vector<fg::vertex_id_t> dst;
+
+    public:
+    void append(const std::vector<fg::vertex_id_t> &src,
+            const std::vector<fg::vertex_id_t> &dst) {
+        std::lock_guard<std::mutex> guard(lock);
+        this->src.insert(this->src.end(), src.begin(), src.end());
+        this->dst.insert(this->dst.end(), dst.begin(), dst.end());
+    }
+
+    std::vector<fg::vertex_id_t> &get_src() {
+        return src;
+    }
+
+    std::vector<fg::vertex_id_t> &get_dst() {
+        return dst;
+    }
+};
+
+class edge_vertex: public fg::compute_directed_vertex {
+    public:
+    edge_vertex(fg::vertex_id_t id): fg::compute_directed_vertex(id) {
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+    }
+};
+
+class edge_vertex_program: public fg::vertex_program_impl<edge_vertex> {
+    fg::edge_type etype;
+    bool directed;
+    edge_collector *edges;
+    std::vector<fg::vertex_id_t> src;
+    std::vector<fg::vertex_id_t> dst;
+
+    void add(fg::vertex_id_t id, const fg::page_vertex &vertex,
+            fg::edge_type type) {
+        size_t num_edges = vertex.get_num_edges(type);
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(type, 0,
+                num_edges);
+        while (it.has_next()) {
+            src.push_back(id);
+            dst.push_back(it.next());
+        }
+    }
+
+    public:
+    edge_vertex_program(fg::edge_type etype, bool directed,
+            edge_collector *edges) {
+        this->etype = etype;
+        this->directed = directed;
+        this->edges = edges;
+    }
+
+    void request(fg::compute_directed_vertex &v, fg::vertex_id_t id) {
+        if (directed) {
+            fg::directed_vertex_request req(id, etype);
+            v.request_partial_vertices(&req, 1);
+        } else {
+            v.request_vertices(&id, 1);
+        }
+    }
+
+    void add(fg::vertex_id_t id, const fg::page_vertex &vertex) {
+        if (etype == fg::BOTH_EDGES) {
+            add(id, vertex, fg::IN_EDGE);
+            add(id, vertex, fg::OUT_EDGE);
+        } else {
+            add(id, vertex, etype);
+        }
+    }
+
+    void run_on_iteration_end() {
+        edges->append(src, dst);
+        src.clear();
+        dst.clear();
+    }
+};
+
+class edge_vertex_program_creater: public fg::vertex_program_creater {
+    fg::edge_type etype;
+    bool directed;
+    edge_collector *edges;
+
+    public:
+    edge_vertex_program_creater(fg::edge_type etype, bool directed,
+            edge_collector *edges) {
+        this->etype = etype;
+        this->directed = directed;
+        this->edges = edges;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(
+                new edge_vertex_program(etype, directed, edges));
+    }
+};
+
+inline void edge_vertex::run(fg::vertex_program &prog) {
+    ((edge_vertex_program &) prog).request(*this,
+            prog.get_vertex_id(*this));
+}
+
+inline void edge_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    ((edge_vertex_program &) prog).add(vertex.get_id(), vertex);
+}
+
+/*
+ * Collect the edges of type `etype` of every vertex as (vertex, neighbor)
+ * pairs, in no particular order. Undirected graphs only have out-edges.
+ */
+inline void gather_edges(fg::FG_graph::ptr fg, fg::edge_type etype,
+        edge_collector &edges) {
+    const fg::graph_header &header = fg->get_graph_header();
+    if (!header.is_directed_graph())
+        etype = fg::OUT_EDGE;
+
+    fg::graph_index::ptr index =
+        fg::NUMA_graph_index<edge_vertex>::create(header);
+    fg::graph_engine::ptr graph = fg->create_engine(index);
+    graph->start_all(fg::vertex_initializer::ptr(),
+            fg::vertex_program_creater::ptr(new edge_vertex_program_creater(
+                    etype, header.is_directed_graph(), &edges)));
+    graph->wait4complete();
+}
+
+/*
+ * The neighbor lists of a set of vertices, as rows of a CSR matrix. The
+ * lists are read once per distinct vertex, as (slot, degree, neighbors...)
+ * records where a slot is the vertex's position among the distinct
+ * vertices.
+ */
+class neighbor_lists {
+    std::mutex lock;
+    // The distinct vertices in increasing order, or empty for all of them
+    std::vector<fg::vertex_id_t> vertices;
+    // The slot of each row, or empty if the rows are the slots
+    std::vector<size_t> rows;
+    size_t num_slots;
+    std::vector<std::vector<fg::vertex_id_t> > records;
+    // The offset of each slot's list among all the lists read
+    std::vector<size_t> offsets;
+
+    public:
+    // Rows for every vertex of the graph
+    neighbor_lists(size_t num_vertices) {
+        num_slots = num_vertices;
+    }
+
+    // A row for each of `ids`, which may repeat
+    neighbor_lists(const std::vector<fg::vertex_id_t> &ids):
+        vertices(ids) {
+        std::sort(vertices.begin(), vertices.end());
+        vertices.erase(std::unique(vertices.begin(), vertices.end()),
+                vertices.end());
+        num_slots = vertices.size();
+        rows.resize(ids.size());
+        for (size_t i = 0; i < ids.size(); i++)
+            rows[i] = std::lower_bound(vertices.begin(), vertices.end(),
+                    ids[i]) - vertices.begin();
+    }
+
+    const std::vector<fg::vertex_id_t> &get_vertices() const {
+        return vertices;
+    }
+
+    size_t get_slot(fg::vertex_id_t id) const {
+        if (vertices.empty())
+            return id;
+        return std::lower_bound(vertices.begin(), vertices.end(), id) -
+            vertices.begin();
+    }
+
+    void append(std::vector<fg::vertex_id_t> &buf) {
+        std::lock_guard<std::mutex> guard(lock);
+        records.push_back(std::vector<fg::vertex_id_t>());
+        records.back().swap(buf);
+    }
+
+    size_t num_rows() const {
+        return rows.empty() ? num_slots : rows.size();
+    }
+
+    // The number of neighbors in all the rows
+    size_t num_edges() {
+        std::vector<size_t> degree(num_slots);
+        for (size_t i = 0; i < records.size(); i++) {
+            const std::vector<fg::vertex_id_t> &buf = records[i];
+            for (size_t j = 0; j < buf.size(); j += 2 + buf[j + 1])
+                degree[buf[j]] = buf[j + 1];
+        }
+
+        offsets.assign(num_slots + 1, 0);
+        for (size_t i = 0; i < num_slots; i++)
+            offsets[i + 1] = offsets[i] + degree[i];
+        if (rows.empty())
+            return offsets[num_slots];
+
+        size_t num = 0;
+        for (size_t i = 0; i < rows.size(); i++)
+            num += degree[rows[i]];
+        return num;
+    }
+
+    /*
+     * Write the rows to `indptr` (num_rows() + 1 entries) and `indices`
+     * (num_edges() entries), after num_edges() was called
+     */
+    template <typename T>
+    void fill(T *indptr, T *indices) const {
+        // Without repeated or reordered rows the slots' lists go straight
+        // to their place
+        T *lists = indices;
+        std::vector<T> buf;
+        if (!rows.empty()) {
+            buf.resize(offsets[num_slots]);
+            lists = buf.data();
+        }
+
+#pragma omp parallel for schedule(dynamic, 1)
+        for (size_t i = 0; i < records.size(); i++) {
+            const std::vector<fg::vertex_id_t> &rec = records[i];
+            for (size_t j = 0; j < rec.size(); j += 2 + rec[j + 1])
+                std::copy(rec.begin() + j + 2,
+                        rec.begin() + j + 2 + rec[j + 1],
+                        lists + offsets[rec[j]]);
+        }
+
+        if (rows.empty()) {
+            for (size_t i = 0; i <= num_slots; i++)
+                indptr[i] = offsets[i];
+            return;
+        }
+
+        indptr[0] = 0;
+        for (size_t i = 0; i < rows.size(); i++)
+            indptr[i + 1] = indptr[i] + offsets[rows[i] + 1] -
+                offsets[rows[i]];
+#pragma omp parallel for
+        for (size_t i = 0; i < rows.size(); i++)
+            std::copy(lists + offsets[rows[i]], lists + offsets[rows[i] + 1],
+                    indices + indptr[i]);
+    }
+};
+
+class neighbor_vertex: public fg::compute_directed_vertex {
+    public:
+    neighbor_vertex(fg::vertex_id_t id): fg::compute_directed_vertex(id) {
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+    }
+};
+
+class neighbor_vertex_program:
+    public fg::vertex_program_impl<neighbor_vertex> {
+    fg::edge_type etype;
+    bool directed;
+    neighbor_lists *lists;
+    std::vector<fg::vertex_id_t> buf;
+
+    void add(const fg::page_vertex &vertex, fg::edge_type type) {
+        size_t num_edges = vertex.get_num_edges(type);
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(type, 0,
+                num_edges);
+        while (it.has_next())
+            buf.push_back(it.next());
+    }
+
+    public:
+    neighbor_vertex_program(fg::edge_type etype, bool directed,
+            neighbor_lists *lists) {
+        this->etype = etype;
+        this->directed = directed;
+        this->lists = lists;
+    }
+
+    void request(fg::compute_directed_vertex &v, fg::vertex_id_t id) {
+        if (directed) {
+            fg::directed_vertex_request req(id, etype);
+            v.request_partial_vertices(&req, 1);
+        } else {
+            v.request_vertices(&id, 1);
+        }
+    }
+
+    void add(const fg::page_vertex &vertex) {
+        buf.push_back(lists->get_slot(vertex.get_id()));
+        // The degree goes here once the neighbors are in
+        size_t pos = buf.size();
+        buf.push_back(0);
+        if (etype == fg::BOTH_EDGES) {
+            add(vertex, fg::IN_EDGE);
+            add(vertex, fg::OUT_EDGE);
+        } else {
+            add(vertex, etype);
+        }
+        buf[pos] = buf.size() - pos - 1;
+    }
+
+    void run_on_iteration_end() {
+        if (!buf.empty())
+            lists->append(buf);
+    }
+};
+
+class neighbor_vertex_program_creater: public fg::vertex_program_creater {
+    fg::edge_type etype;
+    bool directed;
+    neighbor_lists *lists;
+
+    public:
+    neighbor_vertex_program_creater(fg::edge_type etype, bool directed,
+            neighbor_lists *lists) {
+        this->etype = etype;
+        this->directed = directed;
+        this->lists = lists;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(
+                new neighbor_vertex_program(etype, directed, lists));
+    }
+};
+
+inline void neighbor_vertex::run(fg::vertex_program &prog) {
+    ((neighbor_vertex_program &) prog).request(*this,
+            prog.get_vertex_id(*this));
+}
+
+inline void neighbor_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    ((neighbor_vertex_program &) prog).add(vertex);
+}
+
+/*
+ * Read the neighbor lists of type `etype` of the vertices `lists` holds
+ * rows for. Undirected graphs only have out-edges.
+ */
+inline void gather_neighbors(fg::FG_graph::ptr fg, fg::edge_type etype,
+        neighbor_lists &lists) {
+    if (lists.num_rows() == 0)
+        return;
+    const fg::graph_header &header = fg->get_graph_header();
+    if (!header.is_directed_graph())
+        etype = fg::OUT_EDGE;
+
+    fg::graph_index::ptr index =
+        fg::NUMA_graph_index<neighbor_vertex>::create(header);
+    fg::graph_engine::ptr graph = fg->create_engine(index);
+    fg::vertex_program_creater::ptr creater(
+            new neighbor_vertex_program_creater(etype,
+                header.is_directed_graph(), &lists));
+    std::vector<fg::vertex_id_t> vertices = lists.get_vertices();
+    if (vertices.empty())
+        graph->start_all(fg::vertex_initializer::ptr(), std::move(creater));
+    else
+        graph->start(vertices.data(), vertices.size(),
+                fg::vertex_initializer::ptr(), std::move(creater));
+    graph->wait4complete();
+}
+}
+
+#endif
@@ -0,0 +1,287 @@
+#ifndef __GRAPHYTI_FUSED_H__
+#define __GRAPHYTI_FUSED_H__
+
+/*
+ * Compute the measures that look at the 1-hop neighborhood of every vertex
+ * in one pass over the adjacency list: degrees, triangle counts (edge
+ * direction disregarded) and the local scan statistic. Each vertex reads
+ * its own edge lists and then those of its neighbors, so the lists that
+ * triangles and local_scan would each read once are read once for both.
+ */
+
+#include <stdint.h>
+
+#include <algorithm>
+#include <atomic>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+namespace gt {
+
+// The measures to compute. Only the non-NULL arrays are filled, each with
+// an entry per vertex.
+struct neighborhood_outputs {
+    fg::vsize_t *in_degree;
+    fg::vsize_t *out_degree;
+    size_t *triangles;
+    size_t *local_scan;
+    // The neighbor IDs read from the adjacency list
+    std::atomic<size_t> edges_read;
+
+    neighborhood_outputs() {
+        in_degree = out_degree = NULL;
+        triangles = local_scan = NULL;
+        edges_read = 0;
+    }
+
+    bool needs_neighbors() const {
+        return triangles || local_scan;
+    }
+};
+
+// Append the neighbors in the `etype` list of `vertex` other than itself to
+// `res`
+static inline void distinct_neighbors(const fg::page_vertex &vertex,
+        fg::edge_type etype, std::vector<fg::vertex_id_t> &res) {
+    size_t num_edges = vertex.get_num_edges(etype);
+    fg::edge_seq_iterator it = vertex.get_neigh_seq_it(etype, 0, num_edges);
+    while (it.has_next()) {
+        fg::vertex_id_t id = it.next();
+        if (id != vertex.get_id())
+            res.push_back(id);
+    }
+}
+
+static inline void sort_unique(std::vector<fg::vertex_id_t> &ids) {
+    std::sort(ids.begin(), ids.end());
+    ids.erase(std::unique(ids.begin(), ids.end()), ids.end());
+}
+
+// |a ∩ b| of two sorted lists without duplicates
+static inline size_t num_common(const std::vector<fg::vertex_id_t> &a,
+        const std::vector<fg::vertex_id_t> &b) {
+    size_t num = 0;
+    std::vector<fg::vertex_id_t>::const_iterator i = a.begin(), j = b.begin();
+    while (i != a.end() && j != b.end()) {
+        if (*i < *j) {
+            ++i;
+        } else if (*j < *i) {
+            ++j;
+        } else {
+            num++;
+            ++i;
+            ++j;
+        }
+    }
+    return num;
+}
+
+class neighborhood_vertex: public fg::compute_vertex {
+    bool loaded;
+    // The distinct neighbors in either direction, held while their lists
+    // are read
+    std::vector<fg::vertex_id_t> *neighbors;
+    fg::vsize_t num_pending;
+    // The edges of the local scan incident to this vertex
+    size_t incident;
+    // The sums over the neighbors u of |N(u) ∩ N(v)| and |out(u) ∩ N(v)|
+    size_t shared;
+    size_t shared_out;
+
+    public:
+    neighborhood_vertex(fg::vertex_id_t id): fg::compute_vertex(id) {
+        loaded = false;
+        neighbors = NULL;
+        num_pending = 0;
+        incident = shared = shared_out = 0;
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+    }
+
+    void run_on_self(fg::vertex_program &prog,
+            const fg::page_vertex &vertex);
+    void run_on_neighbor(fg::vertex_program &prog,
+            const fg::page_vertex &vertex);
+
+    private:
+    void finish(fg::vertex_program &prog);
+};
+
+class neighborhood_vertex_program:
+    public fg::vertex_program_impl<neighborhood_vertex> {
+    bool directed;
+    neighborhood_outputs *outputs;
+    size_t edges_read;
+    std::vector<fg::vertex_id_t> buf;
+
+    public:
+    neighborhood_vertex_program(bool directed,
+            neighborhood_outputs *outputs) {
+        this->directed = directed;
+        this->outputs = outputs;
+        this->edges_read = 0;
+    }
+
+    bool is_directed() const {
+        return directed;
+    }
+
+    neighborhood_outputs &get_outputs() {
+        return *outputs;
+    }
+
+    // A buffer for the neighbor lists being read
+    std::vector<fg::vertex_id_t> &get_buf() {
+        buf.clear();
+        return buf;
+    }
+
+    void count_read(const fg::page_vertex &vertex) {
+        edges_read += vertex.get_num_edges(fg::OUT_EDGE);
+        if (directed)
+            edges_read += vertex.get_num_edges(fg::IN_EDGE);
+    }
+
+    void run_on_iteration_end() {
+        outputs->edges_read += edges_read;
+        edges_read = 0;
+    }
+};
+
+class neighborhood_vertex_program_creater:
+    public fg::vertex_program_creater {
+    bool directed;
+    neighborhood_outputs *outputs;
+
+    public:
+    neighborhood_vertex_program_creater(bool directed,
+            neighborhood_outputs *outputs) {
+        this->directed = directed;
+        this->outputs = outputs;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(
+                new neighborhood_vertex_program(directed, outputs));
+    }
+};
+
+inline void neighborhood_vertex::run(fg::vertex_program &prog) {
+    fg::vertex_id_t id = prog.get_vertex_id(*this);
+    request_vertices(&id, 1);
+}
+
+inline void neighborhood_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    if (!loaded)
+        run_on_self(prog, vertex);
+    else
+        run_on_neighbor(prog, vertex);
+}
+
+inline void neighborhood_vertex::run_on_self(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    neighborhood_vertex_program &nprog = (neighborhood_vertex_program &) prog;
+    neighborhood_outputs &outputs = nprog.get_outputs();
+    fg::vertex_id_t id = vertex.get_id();
+    bool directed = nprog.is_directed();
+    loaded = true;
+    nprog.count_read(vertex);
+
+    fg::vsize_t num_out = vertex.get_num_edges(fg::OUT_EDGE);
+    fg::vsize_t num_in = directed ? vertex.get_num_edges(fg::IN_EDGE) :
+        num_out;
+    if (outputs.in_degree)
+        outputs.in_degree[id] = num_in;
+    if (outputs.out_degree)
+        outputs.out_degree[id] = num_out;
+    if (!outputs.needs_neighbors())
+        return;
+
+    neighbors = new std::vector<fg::vertex_id_t>();
+    distinct_neighbors(vertex, fg::OUT_EDGE, *neighbors);
+    if (directed) {
+        std::vector<fg::vertex_id_t> &in = nprog.get_buf();
+        distinct_neighbors(vertex, fg::IN_EDGE, in);
+        sort_unique(in);
+        sort_unique(*neighbors);
+        // Edges to and from a neighbor are both in the scan
+        incident = neighbors->size() + in.size();
+        neighbors->insert(neighbors->end(), in.begin(), in.end());
+    }
+    sort_unique(*neighbors);
+    if (!directed)
+        incident = neighbors->size();
+
+    num_pending = neighbors->size();
+    if (num_pending == 0)
+        finish(prog);
+    else
+        request_vertices(neighbors->data(), neighbors->size());
+}
+
+inline void neighborhood_vertex::run_on_neighbor(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    neighborhood_vertex_program &nprog = (neighborhood_vertex_program &) prog;
+    nprog.count_read(vertex);
+
+    std::vector<fg::vertex_id_t> &buf = nprog.get_buf();
+    distinct_neighbors(vertex, fg::OUT_EDGE, buf);
+    sort_unique(buf);
+    size_t num_out = num_common(buf, *neighbors);
+    shared_out += num_out;
+    if (nprog.is_directed()) {
+        distinct_neighbors(vertex, fg::IN_EDGE, buf);
+        sort_unique(buf);
+        shared += num_common(buf, *neighbors);
+    } else {
+        shared += num_out;
+    }
+
+    if (--num_pending == 0)
+        finish(prog);
+}
+
+inline void neighborhood_vertex::finish(fg::vertex_program &prog) {
+    neighborhood_vertex_program &nprog = (neighborhood_vertex_program &) prog;
+    neighborhood_outputs &outputs = nprog.get_outputs();
+    fg::vertex_id_t id = prog.get_vertex_id(*this);
+
+    // Every triangle shows up once from each of the vertex's two neighbors
+    // in it
+    if (outputs.triangles)
+        outputs.triangles[id] = shared / 2;
+    if (outputs.local_scan)
+        outputs.local_scan[id] = incident + (nprog.is_directed() ?
+                shared_out : shared / 2);
+
+    delete neighbors;
+    neighbors = NULL;
+}
+
+/*
+ * Fill the arrays of `outputs` for every vertex of the graph in one engine
+ * run
+ */
+inline void neighborhood_pass(fg::FG_graph::ptr fg,
+        neighborhood_outputs &outputs) {
+    const fg::graph_header &header = fg->get_graph_header();
+    fg::graph_index::ptr index =
+        fg::NUMA_graph_index<neighborhood_vertex>::create(header);
+    fg::graph_engine::ptr graph = fg->create_engine(index);
+    graph->start_all(fg::vertex_initializer::ptr(),
+            fg::vertex_program_creater::ptr(
+                new neighborhood_vertex_program_creater(
+                    header.is_directed_graph(), &outputs)));
+    graph->wait4complete();
+}
+}
+
+#endif
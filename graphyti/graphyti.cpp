@@ -1,15 +1,41 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/operators.h>
+#include <pybind11/numpy.h>
 
-#include "src/flash-graph/bindings/CGraph.h"
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
 #include "src/utils/FileManager.h"
 #include "src/flash-graph/utils/el2fg.h"
 
+#include "edgearrays.h"
+#include "msbfs.h"
+#include "iterlog.h"
+#include "pagerank.h"
+#include "labels.h"
+#include "edges.h"
+#include "cadj.h"
+#include "ingest.h"
+#include "topk.h"
+#include "centrality.h"
+#include "mmap_graph.h"
+#include "fused.h"
+
 #include <unistd.h>
 #include <sys/types.h>
 #include <pwd.h>
 
+#include <algorithm>
+#include <chrono>
+#include <condition_variable>
+#include <exception>
+#include <functional>
+#include <limits>
+#include <memory>
+#include <mutex>
+#include <random>
+#include <thread>
+
 namespace py = pybind11;
 
 std::string get_home() {
@@ -18,27 +44,1082 @@ std::string get_home() {
 }
 
 // Helpers for scripting tasks -- cleaner in python
-static std::string get_basename(const std::string& s) {
-    py::object os_path = py::module::import("os.path");
+static void delete_file(const std::string& s) {
+    py::object os = py::module::import("os");
+    os.attr("remove")(s);
+}
+
+// A private scratch directory that is removed along with its contents
+class scratch_dir {
+    private:
+    std::string dir;
+
+    public:
+    scratch_dir(const std::string& parent) {
+        py::object tempfile = py::module::import("tempfile");
+        py::object where = py::none();
+        if (!parent.empty())
+            where = py::str(parent);
+
+        dir = tempfile.attr("mkdtemp")(py::arg("prefix")="graphyti-",
+                py::arg("dir")=where).cast<std::string>();
+    }
+
+    ~scratch_dir() {
+        try {
+            py::module::import("shutil").attr("rmtree")(dir, true);
+        } catch (...) {
+        }
+    }
+
+    const std::string& path() const {
+        return dir;
+    }
+
+    std::string join(const std::string& fn) const {
+        return dir + "/" + fn;
+    }
+};
 
-    return os_path.attr("basename")(s).cast<std::string>();
+// SAFS set up for writing while this lives, as FileManager does for each of
+// its calls
+class safs_io {
+    public:
+    safs_io(const std::string& configs) {
+        config_map::ptr c = config_map::create(configs);
+        if (c == NULL)
+            throw std::runtime_error("Unable to read the configuration file '"
+                    + configs + "'");
+        c->add_options("writable=1");
+        try {
+            safs::init_io_system(c, false);
+        } catch (...) {
+            safs::destroy_io_system();
+            throw;
+        }
+    }
+
+    ~safs_io() {
+        safs::destroy_io_system();
+    }
+
+    safs_io(const safs_io&) = delete;
+    safs_io& operator=(const safs_io&) = delete;
+};
+
+// Hand a result vector to NumPy without copying it. The array's base is a
+// capsule that owns the vector, so it is freed along with the array.
+template <typename T>
+static py::array to_ndarray(std::vector<T>&& v) {
+    std::vector<T>* res = new std::vector<T>(std::move(v));
+    py::capsule owner(res, [](void* p) {
+            delete reinterpret_cast<std::vector<T>*>(p);
+            });
+    return py::array_t<T>(res->size(), res->data(), owner);
 }
 
-static std::vector<std::string> splitext(const std::string& s) {
-    py::object os_path = py::module::import("os.path");
+// A memory-mapped array of `size` values backed by the file `out` names (see
+// graphyti/output.py)
+template <typename T>
+static py::array_t<T, py::array::c_style> open_output(py::object out,
+        size_t size) {
+    py::object arr = py::module::import("graphyti.output").attr(
+            "open_output")(out, py::dtype::of<T>(), size);
+    // Casting would turn the memmap into a plain ndarray view of it, which
+    // `finish_output` can't flush. It has the dtype and layout asked for.
+    return py::reinterpret_borrow<py::array_t<T, py::array::c_style> >(arr);
+}
 
-    return os_path.attr("splitext")(s).cast<std::vector<std::string> >();
+// Flush an array from `open_output` and map it back read-only
+static py::array finish_output(py::object out, py::array arr,
+        const std::string& configs) {
+    return py::module::import("graphyti.output").attr("finish_output")(out,
+            arr, configs);
 }
 
-static void delete_file(const std::string& s) {
-    py::object os = py::module::import("os");
-    os.attr("remove")(s);
+// The array `out` a caller provides for a result of `size` values
+template <typename T>
+static py::array_t<T, py::array::c_style> out_array(py::object out,
+        size_t size) {
+    if (!py::isinstance<py::array_t<T, py::array::c_style> >(out))
+        throw std::runtime_error("`out` must be a path or a C-contiguous "
+                "array of type "
+                + py::str(py::dtype::of<T>()).cast<std::string>());
+
+    py::array_t<T, py::array::c_style> arr =
+        out.cast<py::array_t<T, py::array::c_style> >();
+    if (arr.ndim() != 1 || (size_t)arr.size() != size)
+        throw std::runtime_error("`out` must be a 1-D array of length "
+                + std::to_string(size));
+    if (!arr.writeable())
+        throw std::runtime_error("`out` must be writeable");
+    return arr;
+}
+
+// Same as above, but fill `out` when the caller provides an array, or write
+// the result to the file `out` names and return it mapped. The vector is
+// freed before the file is flushed so the result is only held once.
+template <typename T>
+static py::array to_ndarray(std::vector<T>&& v, py::object out,
+        const std::string& configs = "") {
+    if (out.is_none())
+        return to_ndarray(std::move(v));
+
+    if (py::isinstance<py::str>(out)) {
+        py::array_t<T, py::array::c_style> arr = open_output<T>(out,
+                v.size());
+        std::copy(v.begin(), v.end(), arr.mutable_data());
+        std::vector<T>().swap(v);
+        return finish_output(out, arr, configs);
+    }
+
+    py::array_t<T, py::array::c_style> arr = out_array<T>(out, v.size());
+    std::copy(v.begin(), v.end(), arr.mutable_data());
+    return arr;
+}
+
+// Have `fill` write a result of `size` values straight into the array `out`
+// or the file it names, rather than into a vector that's copied there. `fill`
+// runs with the GIL released.
+template <typename T>
+static py::array fill_ndarray(size_t size, std::function<void(T*)> fill,
+        py::object out, const std::string& configs) {
+    if (out.is_none()) {
+        std::vector<T> res(size);
+        {
+            py::gil_scoped_release release;
+            fill(res.data());
+        }
+        return to_ndarray(std::move(res));
+    }
+
+    bool to_file = py::isinstance<py::str>(out);
+    py::array_t<T, py::array::c_style> arr = to_file ?
+        open_output<T>(out, size) : out_array<T>(out, size);
+    T* data = arr.mutable_data();
+    {
+        py::gil_scoped_release release;
+        fill(data);
+    }
+    if (to_file)
+        return finish_output(out, arr, configs);
+    return arr;
+}
+
+static fg::edge_type get_edge_type(const std::string& edge_type) {
+    if (edge_type == "in")
+        return fg::IN_EDGE;
+    if (edge_type == "out")
+        return fg::OUT_EDGE;
+    if (edge_type == "both")
+        return fg::BOTH_EDGES;
+    throw std::runtime_error("Unknown edge type '" + edge_type +
+            "'. Use \"in\", \"out\" or \"both\"");
+}
+
+// Append a dict per iteration in `log` to the list `iterations`, if given
+static void append_iterations(const gt::iteration_log& log,
+        py::object iterations) {
+    if (iterations.is_none())
+        return;
+    for (size_t i = 0; i < log.size(); i++)
+        iterations.attr("append")(py::dict(
+                    py::arg("active_vertices")=log.get_active(i),
+                    py::arg("seconds")=log.get_seconds(i)));
+}
+
+// Run `fn`, which doesn't touch Python, with the GIL released. Given a
+// `control` (a graphyti.control.RunControl) `fn` runs on its own thread while
+// this one reports the iterations `log` gains to `control` and stops the
+// engine runs that log to `log` once `control` expires or on
+// KeyboardInterrupt. `control.stopped` tells whether they were stopped.
+static void run_controlled(std::function<void()> fn, gt::iteration_log& log,
+        py::object control) {
+    if (control.is_none()) {
+        py::gil_scoped_release release;
+        fn();
+        return;
+    }
+
+    std::mutex lock;
+    std::condition_variable cond;
+    bool done = false;
+    std::exception_ptr error;
+    std::thread worker([&]() {
+            try {
+                fn();
+            } catch (...) {
+                error = std::current_exception();
+            }
+            std::lock_guard<std::mutex> guard(lock);
+            done = true;
+            cond.notify_all();
+            });
+
+    size_t reported = 0;
+    bool interrupted = false;
+    std::exception_ptr report_error;
+    while (true) {
+        bool finished;
+        {
+            py::gil_scoped_release release;
+            std::unique_lock<std::mutex> guard(lock);
+            finished = cond.wait_for(guard, std::chrono::milliseconds(100),
+                    [&]() { return done; });
+        }
+
+        // An iteration is only complete once the next one has started
+        size_t num = log.size();
+        size_t complete = finished ? num : (num > 0 ? num - 1 : 0);
+        try {
+            for (; reported < complete && !report_error; reported++)
+                control.attr("report")(reported, log.get_active(reported),
+                        log.get_seconds(reported));
+            if (finished)
+                break;
+            if (!log.stopped() && PyErr_CheckSignals() != 0) {
+                PyErr_Clear();
+                interrupted = true;
+                log.stop();
+            } else if (!log.stopped() &&
+                    control.attr("expired")().cast<bool>()) {
+                log.stop();
+            }
+        } catch (...) {
+            // A failing progress callback stops the run
+            report_error = std::current_exception();
+            log.stop();
+        }
+    }
+    {
+        py::gil_scoped_release release;
+        worker.join();
+    }
+
+    if (interrupted) {
+        PyErr_SetNone(PyExc_KeyboardInterrupt);
+        throw py::error_already_set();
+    }
+    if (report_error)
+        std::rethrow_exception(report_error);
+    if (error)
+        std::rethrow_exception(error);
+    if (log.stopped())
+        control.attr("stopped") = true;
+}
+
+// The graph the algorithms run on. CGraph keeps its FG_graph private, so
+// Graph opens the graph itself and hands its one FG_graph to FlashGraph's
+// algorithms and to the vertex programs that live in this repo alike. The
+// methods below mirror CGraph's.
+class Graph {
+    private:
+    std::string graph_file;
+    std::string index_file;
+    std::string config_file;
+    fg::FG_graph::ptr fg;
+    bool min_vertex_id_set;
+    fg::vertex_id_t min_vertex_id;
+
+    // Set up FlashGraph, and SAFS with it, once per open graph as CGraph
+    // does. The destructor undoes it.
+    config_map::ptr init_flash_graph() {
+        config_map::ptr configs = config_map::create(config_file);
+        fg::graph_engine::init_flash_graph(configs);
+        return configs;
+    }
+
+    // All vertices when `ids` is empty
+    std::vector<fg::vertex_id_t>& or_all(std::vector<fg::vertex_id_t>& ids)
+        const {
+        if (ids.empty())
+            for (fg::vertex_id_t id = 0; id < vcount(); id++)
+                ids.push_back(id);
+        return ids;
+    }
+
+    static gt::label_checkpoint label_checkpoint(const std::string& path,
+            int interval, bool resume) {
+        if (interval <= 0)
+            throw std::runtime_error("`checkpoint_interval` must be positive");
+        gt::label_checkpoint ckpt;
+        ckpt.path = path;
+        ckpt.interval = interval;
+        ckpt.resume = resume;
+        return ckpt;
+    }
+
+    public:
+    Graph(): min_vertex_id_set(false), min_vertex_id(0) {
+    }
+
+    Graph(const std::string& graph_file, const std::string& index_file,
+            const std::string& config_file): graph_file(graph_file),
+        index_file(index_file), config_file(config_file),
+        min_vertex_id_set(false), min_vertex_id(0) {
+        config_map::ptr configs = init_flash_graph();
+        try {
+            fg = fg::FG_graph::create(graph_file, index_file, configs);
+        } catch (...) {
+            fg::graph_engine::destroy_flash_graph();
+            throw;
+        }
+    }
+
+    // Map the adjacency list rather than reading it into memory. FlashGraph's
+    // algorithms and the ones in this repo share the mapping.
+    Graph(const std::string& graph_file, const std::string& index_file,
+            const std::string& config_file, bool populate, bool hugepages):
+        graph_file(graph_file), index_file(index_file),
+        config_file(config_file), min_vertex_id_set(false),
+        min_vertex_id(0) {
+        config_map::ptr configs = init_flash_graph();
+        try {
+            fg = gt::map_graph(graph_file, index_file, configs,
+                    gt::mmap_options(populate, hugepages));
+        } catch (...) {
+            fg::graph_engine::destroy_flash_graph();
+            throw;
+        }
+    }
+
+    ~Graph() {
+        if (fg) {
+            fg.reset();
+            fg::graph_engine::destroy_flash_graph();
+        }
+    }
+
+    Graph(const Graph&) = delete;
+    Graph& operator=(const Graph&) = delete;
+
+    fg::FG_graph::ptr get_fg() const {
+        if (!fg)
+            throw std::runtime_error("The graph has no files loaded");
+        return fg;
+    }
+
+    const std::string& get_config_file() const {
+        return config_file;
+    }
+
+    fg::vertex_id_t vcount() const {
+        return get_fg()->get_graph_header().get_num_vertices();
+    }
+
+    size_t ecount() const {
+        return get_fg()->get_num_edges();
+    }
+
+    bool is_directed() const {
+        return get_fg()->is_directed();
+    }
+
+    bool is_in_mem() const {
+        return get_fg()->is_in_mem();
+    }
+
+    py::array coreness(size_t kmax, size_t kmin,
+            const std::string& checkpoint, int checkpoint_interval,
+            bool resume, py::object out) {
+        fg::FG_graph::ptr fg = get_fg();
+        if (checkpoint.empty()) {
+            std::vector<size_t> res;
+            {
+                py::gil_scoped_release release;
+                res = fg::compute_kcore(fg, kmin, kmax, true);
+            }
+            return to_ndarray(std::move(res), out, config_file);
+        }
+
+        if (kmax != 0 || kmin != 0)
+            throw std::runtime_error("A `checkpoint` computes the coreness "
+                    "of every vertex, `kmax` and `kmin` must be 0");
+        gt::label_checkpoint ckpt = label_checkpoint(checkpoint,
+                checkpoint_interval, resume);
+        return fill_ndarray<size_t>(vcount(), [&](size_t* cores) {
+                gt::iterate_labels(fg, gt::H_INDEX, cores, ckpt);
+                }, out, config_file);
+    }
+
+    std::vector<float> betweenness(std::vector<fg::vertex_id_t>& ids) {
+        return fg::compute_betweenness_centrality(get_fg(), or_all(ids));
+    }
+
+    std::vector<double> closeness(std::vector<fg::vertex_id_t>& ids,
+            const std::string& edge_type) {
+        return fg::compute_closeness_centrality(get_fg(), or_all(ids),
+                get_edge_type(edge_type));
+    }
+
+    std::vector<float> diversity(const std::string& edge_type, bool memopt) {
+        if (edge_type == "both")
+            throw std::runtime_error("Only 'in' and 'out' edges supported!");
+        return fg::compute_diversity(get_fg(), get_edge_type(edge_type),
+                memopt);
+    }
+
+    std::vector<fg::vertex_id_t> topo_sort(bool approx) {
+        return fg::compute_topo_sort(get_fg(), approx);
+    }
+
+    std::vector<unsigned> louvain(uint32_t levels) {
+        return fg::compute_louvain(get_fg(), levels);
+    }
+
+    std::vector<fg::vertex_id_t> degree(const std::string& edge_type) {
+        return fg::get_degree(get_fg(), get_edge_type(edge_type));
+    }
+
+    std::vector<size_t> triangles(bool cycles_only) {
+        fg::FG_graph::ptr fg = get_fg();
+        if (!fg->is_directed())
+            return fg::compute_undirected_triangles(fg);
+        if (cycles_only)
+            return fg::compute_directed_triangles_fast(fg,
+                    fg::directed_triangle_type::CYCLE);
+        return fg::compute_directed_triangles(fg,
+                fg::directed_triangle_type::CYCLE);
+    }
+
+    std::vector<size_t> local_scan(short num_hops) {
+        if (num_hops == 1)
+            return fg::compute_local_scan(get_fg());
+        if (num_hops == 2)
+            return fg::compute_local_scan2(get_fg());
+        throw std::runtime_error("local_scan: num_hops must be 1 or 2\n");
+    }
+
+    std::vector<std::pair<fg::vertex_id_t, size_t> > topk_scan(size_t k) {
+        typedef std::pair<fg::vertex_id_t, size_t> tk_t;
+        fg::FG_vector<tk_t>::ptr scan = fg::compute_topK_scan(get_fg(), k);
+        std::vector<tk_t> res(scan->get_size());
+        if (!res.empty())
+            scan->copy_to<tk_t>(res.data(), res.size());
+        return res;
+    }
+
+    size_t diameter(unsigned num_para_bfs, bool directed) {
+        return fg::estimate_diameter(get_fg(), num_para_bfs, directed);
+    }
+
+    // The component labels `compute` finds, or with a `checkpoint` the ones
+    // labels.h does
+    py::array components(
+            std::vector<fg::vertex_id_t> (*compute)(fg::FG_graph::ptr),
+            const std::string& checkpoint, int checkpoint_interval,
+            bool resume, py::object out) {
+        fg::FG_graph::ptr fg = get_fg();
+        if (checkpoint.empty()) {
+            std::vector<fg::vertex_id_t> res;
+            {
+                py::gil_scoped_release release;
+                res = compute(fg);
+            }
+            return to_ndarray(std::move(res), out, config_file);
+        }
+
+        gt::label_checkpoint ckpt = label_checkpoint(checkpoint,
+                checkpoint_interval, resume);
+        return fill_ndarray<fg::vertex_id_t>(vcount(),
+                [&](fg::vertex_id_t* labels) {
+                gt::iterate_labels(fg, gt::MIN_LABEL, labels, ckpt);
+                }, out, config_file);
+    }
+
+    py::array weakly_connected_components(bool sync,
+            const std::string& checkpoint, int checkpoint_interval,
+            bool resume, py::object out) {
+        return components(sync ? fg::compute_sync_wcc : fg::compute_wcc,
+                checkpoint, checkpoint_interval, resume, out);
+    }
+
+    py::array connected_components(const std::string& checkpoint,
+            int checkpoint_interval, bool resume, py::object out) {
+        return components(fg::compute_cc, checkpoint, checkpoint_interval,
+                resume, out);
+    }
+
+    std::vector<fg::vertex_id_t> strongly_connected_components() {
+        return fg::compute_scc(get_fg());
+    }
+
+    // The number of vertices a BFS from `start_vertex`, or a random vertex,
+    // reaches
+    size_t bfs_vcount(fg::vertex_id_t start_vertex,
+            const std::string& edge_type) {
+        if (start_vertex == fg::INVALID_VERTEX_ID || start_vertex >= vcount())
+            start_vertex = random() % vcount();
+        return fg::bfs(get_fg(), start_vertex, get_edge_type(edge_type));
+    }
+
+    std::string to_str() const {
+        return std::string("Graphyti Graph:\n") +
+            "v: " + std::to_string(vcount()) +
+            ", e: " + std::to_string(ecount()) +
+            (is_directed() ? "\nDirected" : "\nUndirected") +
+            (is_in_mem() ? "\nIn-memory\n" : "\nOn-Disk");
+    }
+
+    fg::vertex_id_t min_id() {
+        if (!min_vertex_id_set) {
+            class qvertex: public fg::compute_vertex {
+                public:
+                qvertex(fg::vertex_id_t id): fg::compute_vertex(id) {
+                }
+                void run(fg::vertex_program&) {
+                }
+                void run(fg::vertex_program&, const fg::page_vertex&) {
+                }
+                void run_on_message(fg::vertex_program&,
+                        const fg::vertex_message&) {
+                }
+            };
+
+            fg::graph_index::ptr index =
+                fg::NUMA_graph_index<qvertex>::create(
+                        get_fg()->get_graph_header());
+            min_vertex_id = index->get_min_vertex_id();
+            min_vertex_id_set = true;
+        }
+        return min_vertex_id;
+    }
+
+    fg::vertex_id_t max_id() const {
+        return get_fg()->get_num_vertices() - 1;
+    }
+
+    py::object bfs(py::array_t<fg::vertex_id_t,
+            py::array::c_style | py::array::forcecast> sources,
+            const std::string& edge_type, bool distances,
+            py::object iterations, py::object control) {
+        std::vector<fg::vertex_id_t> srcs(sources.data(),
+                sources.data() + sources.size());
+        fg::edge_type etype = get_edge_type(edge_type);
+        size_t nsrcs = srcs.size();
+
+        py::array_t<size_t> counts(nsrcs);
+        py::array_t<uint16_t> dists;
+        uint16_t* dists_data = NULL;
+        if (distances) {
+            dists = py::array_t<uint16_t>(
+                    {nsrcs, (size_t) vcount()});
+            dists_data = dists.mutable_data();
+        }
+        size_t* counts_data = counts.mutable_data();
+        size_t ndists = distances ? dists.size() : 0;
+        gt::iteration_log log;
+        bool logged = !iterations.is_none() || !control.is_none();
+        fg::FG_graph::ptr fg = get_fg();
+
+        run_controlled([&]() {
+                // Sources a stopped search didn't get to reach nothing
+                std::fill(counts_data, counts_data + nsrcs, 0);
+                std::fill(dists_data, dists_data + ndists,
+                        gt::MSBFS_UNREACHED);
+                if (nsrcs)
+                    gt::multi_source_bfs(fg, srcs, etype, counts_data,
+                            dists_data, logged ? &log : NULL);
+                }, log, control);
+        append_iterations(log, iterations);
+
+        if (distances)
+            return py::make_tuple(counts, dists);
+        return counts;
+    }
+
+    // The sources or pivots an approximate centrality starts from
+    std::vector<fg::vertex_id_t> sample(size_t samples, double epsilon,
+            double delta, py::object seed) {
+        size_t num_vertices = vcount();
+        if (samples == 0) {
+            if (epsilon <= 0)
+                throw std::runtime_error("Either `samples` or `epsilon` " +
+                        std::string("must be given"));
+            samples = gt::num_samples(num_vertices, epsilon, delta);
+        }
+        uint64_t s = seed.is_none() ? std::random_device()() :
+            seed.cast<uint64_t>();
+        return gt::sample_vertices(num_vertices, samples, s);
+    }
+
+    py::tuple approx_betweenness(size_t samples, double epsilon, double delta,
+            size_t batch, py::object memory, py::object seed) {
+        std::vector<fg::vertex_id_t> srcs = sample(samples, epsilon, delta,
+                seed);
+        if (batch == 0)
+            batch = gt::bc_width(vcount(), py::module::import(
+                        "graphyti.utils").attr("parse_size")(memory).cast<
+                    size_t>());
+        std::vector<double> values(vcount()), errors(vcount());
+        {
+            py::gil_scoped_release release;
+            gt::sampled_betweenness(get_fg(), srcs, batch, values.data(),
+                    errors.data());
+        }
+        return py::make_tuple(to_ndarray(std::move(values)),
+                to_ndarray(std::move(errors)));
+    }
+
+    py::tuple approx_closeness(size_t samples, double epsilon, double delta,
+            const std::string& edge_type, py::object seed) {
+        fg::edge_type etype = get_edge_type(edge_type);
+        std::vector<fg::vertex_id_t> pivots = sample(samples, epsilon, delta,
+                seed);
+        std::vector<double> values(vcount()), errors(vcount());
+        {
+            py::gil_scoped_release release;
+            gt::sampled_closeness(get_fg(), pivots, etype, values.data(),
+                    errors.data());
+        }
+        return py::make_tuple(to_ndarray(std::move(values)),
+                to_ndarray(std::move(errors)));
+    }
+
+    py::tuple neighborhood(const std::vector<std::string>& degrees,
+            bool triangles, bool local_scan) {
+        size_t num_vertices = vcount();
+        bool directed = is_directed();
+        bool need_in = false, need_out = false;
+        for (size_t i = 0; i < degrees.size(); i++) {
+            fg::edge_type etype = get_edge_type(degrees[i]);
+            need_in |= directed && etype != fg::OUT_EDGE;
+            need_out |= !directed || etype != fg::IN_EDGE;
+        }
+
+        std::vector<fg::vsize_t> in_degree(need_in ? num_vertices : 0);
+        std::vector<fg::vsize_t> out_degree(need_out ? num_vertices : 0);
+        std::vector<size_t> triangle_counts(triangles ? num_vertices : 0);
+        std::vector<size_t> scans(local_scan ? num_vertices : 0);
+        gt::neighborhood_outputs outputs;
+        if (need_in)
+            outputs.in_degree = in_degree.data();
+        if (need_out)
+            outputs.out_degree = out_degree.data();
+        if (triangles)
+            outputs.triangles = triangle_counts.data();
+        if (local_scan)
+            outputs.local_scan = scans.data();
+        {
+            py::gil_scoped_release release;
+            if (num_vertices)
+                gt::neighborhood_pass(get_fg(), outputs);
+        }
+
+        py::dict res;
+        for (size_t i = 0; i < degrees.size(); i++) {
+            const std::string& type = degrees[i];
+            if (res.contains("degree:" + type))
+                continue;
+            fg::edge_type etype = get_edge_type(type);
+            // Undirected graphs have one edge list per vertex
+            if (etype == fg::IN_EDGE && directed) {
+                res[py::str("degree:" + type)] = to_ndarray(
+                        std::vector<fg::vsize_t>(in_degree));
+            } else if (etype == fg::BOTH_EDGES && directed) {
+                std::vector<fg::vsize_t> both(num_vertices);
+                for (size_t v = 0; v < num_vertices; v++)
+                    both[v] = in_degree[v] + out_degree[v];
+                res[py::str("degree:" + type)] = to_ndarray(std::move(both));
+            } else {
+                res[py::str("degree:" + type)] = to_ndarray(
+                        std::vector<fg::vsize_t>(out_degree));
+            }
+        }
+        if (triangles)
+            res["triangles"] = to_ndarray(std::move(triangle_counts));
+        if (local_scan)
+            res["local_scan"] = to_ndarray(std::move(scans));
+        return py::make_tuple(res,
+                outputs.edges_read * sizeof(fg::vertex_id_t));
+    }
+
+    template <typename T>
+    static py::tuple csr(const gt::neighbor_lists& lists, size_t num_edges) {
+        py::array_t<T> indptr(lists.num_rows() + 1);
+        py::array_t<T> indices(num_edges);
+        T* indptr_data = indptr.mutable_data();
+        T* indices_data = indices.mutable_data();
+        {
+            py::gil_scoped_release release;
+            lists.fill(indptr_data, indices_data);
+        }
+        return py::make_tuple(indptr, indices);
+    }
+
+    py::tuple neighbors(py::object ids, const std::string& edge_type) {
+        fg::edge_type etype = get_edge_type(edge_type);
+        size_t num_vertices = vcount();
+        std::unique_ptr<gt::neighbor_lists> lists;
+        if (ids.is_none()) {
+            lists.reset(new gt::neighbor_lists(num_vertices));
+        } else {
+            py::array_t<fg::vertex_id_t, py::array::c_style |
+                py::array::forcecast> arr = ids.cast<py::array_t<
+                fg::vertex_id_t, py::array::c_style | py::array::forcecast> >();
+            std::vector<fg::vertex_id_t> rows(arr.data(),
+                    arr.data() + arr.size());
+            for (size_t i = 0; i < rows.size(); i++)
+                if (rows[i] >= num_vertices)
+                    throw std::runtime_error("Vertex " +
+                            std::to_string(rows[i]) + " isn't in the graph");
+            lists.reset(new gt::neighbor_lists(rows));
+        }
+
+        size_t num_edges;
+        {
+            py::gil_scoped_release release;
+            gt::gather_neighbors(get_fg(), etype, *lists);
+            num_edges = lists->num_edges();
+        }
+        // SciPy takes 32-bit indices as they are
+        if (num_edges <= (size_t) std::numeric_limits<int32_t>::max() &&
+                num_vertices <= (size_t) std::numeric_limits<int32_t>::max())
+            return csr<int32_t>(*lists, num_edges);
+        return csr<int64_t>(*lists, num_edges);
+    }
+
+    py::tuple edges(const std::string& edge_type) {
+        fg::edge_type etype = get_edge_type(edge_type);
+        gt::edge_collector edges;
+        {
+            py::gil_scoped_release release;
+            gt::gather_edges(get_fg(), etype, edges);
+        }
+        return py::make_tuple(to_ndarray(std::move(edges.get_src())),
+                to_ndarray(std::move(edges.get_dst())));
+    }
+
+    py::array pagerank(int niters, float damping_factor,
+            const std::string& algo, float tol, py::object warm_start,
+            py::object seeds, py::object iterations, py::object out,
+            const std::string& checkpoint, int checkpoint_interval,
+            bool resume, py::object control) {
+        if (tol <= 0 && warm_start.is_none() && seeds.is_none() &&
+                checkpoint.empty() && control.is_none()) {
+            std::vector<float> res;
+            {
+                py::gil_scoped_release release;
+                if (algo == "pull")
+                    res = fg::compute_pagerank(get_fg(), niters,
+                            damping_factor);
+                else
+                    res = fg::compute_pagerank2(get_fg(), niters,
+                            damping_factor);
+            }
+            return to_ndarray(std::move(res), out, config_file);
+        }
+
+        size_t num_vertices = vcount();
+        py::array_t<float, py::array::c_style | py::array::forcecast> start;
+        if (!warm_start.is_none()) {
+            start = warm_start.cast<py::array_t<float,
+                  py::array::c_style | py::array::forcecast> >();
+            if (start.ndim() != 1 || (size_t)start.size() != num_vertices)
+                throw std::runtime_error("`warm_start` must be a 1-D array "
+                        "of length " + std::to_string(num_vertices));
+        }
+        std::vector<fg::vertex_id_t> srcs;
+        if (!seeds.is_none()) {
+            py::array_t<fg::vertex_id_t, py::array::c_style |
+                py::array::forcecast> ids = seeds.cast<py::array_t<
+                fg::vertex_id_t, py::array::c_style | py::array::forcecast> >();
+            srcs.assign(ids.data(), ids.data() + ids.size());
+            if (srcs.empty())
+                throw std::runtime_error("`seeds` must hold a vertex");
+        }
+
+        gt::pr_checkpoint ckpt;
+        ckpt.path = checkpoint;
+        ckpt.interval = checkpoint_interval;
+        ckpt.resume = resume;
+        if (!checkpoint.empty() && checkpoint_interval <= 0)
+            throw std::runtime_error("`checkpoint_interval` must be positive");
+
+        // Write the ranks straight into the file a path names
+        std::vector<float> ranks;
+        py::array_t<float, py::array::c_style> dest;
+        bool to_file = py::isinstance<py::str>(out);
+        if (to_file)
+            dest = open_output<float>(out, num_vertices);
+        else
+            ranks.resize(num_vertices);
+
+        gt::iteration_log log;
+        fg::FG_graph::ptr fg = get_fg();
+        const float* start_data = warm_start.is_none() ? NULL : start.data();
+        float* ranks_data = to_file ? dest.mutable_data() : ranks.data();
+        run_controlled([&]() {
+                gt::delta_pagerank(fg, niters, damping_factor, tol,
+                        start_data, srcs, ranks_data, log, ckpt);
+                }, log, control);
+        append_iterations(log, iterations);
+        if (to_file)
+            return finish_output(out, dest, config_file);
+        return to_ndarray(std::move(ranks), out);
+    }
+};
+
+// Wrap a Graph method that computes one value per vertex so that the result
+// is returned as a NumPy array (optionally written into `out`). The GIL is
+// released while the algorithm runs.
+template <typename T, typename... Args>
+static std::function<py::array(Graph&, Args..., py::object)>
+per_vertex(std::vector<T> (Graph::*fn)(Args...)) {
+    return [fn](Graph& g, Args... args, py::object out) {
+        std::vector<T> res;
+        {
+            py::gil_scoped_release release;
+            res = (g.*fn)(args...);
+        }
+        return to_ndarray(std::move(res), out, g.get_config_file());
+    };
+}
+
+template <typename T, typename... Args>
+static std::function<py::array(Graph&, Args..., py::object)>
+per_vertex(std::vector<T> (Graph::*fn)(Args...) const) {
+    return [fn](Graph& g, Args... args, py::object out) {
+        std::vector<T> res;
+        {
+            py::gil_scoped_release release;
+            res = (g.*fn)(args...);
+        }
+        return to_ndarray(std::move(res), out, g.get_config_file());
+    };
+}
+
+static gt::id_column get_id_column(const py::array& ids,
+        const std::string& name) {
+    if (ids.ndim() != 1)
+        throw std::runtime_error("`" + name + "` must be a 1-D array");
+
+    char kind = ids.dtype().kind();
+    if (kind != 'i' && kind != 'u')
+        throw std::runtime_error("`" + name + "` must be an integer array");
+
+    return gt::id_column(ids.data(), ids.strides(0), ids.shape(0),
+            kind == 'i', ids.itemsize());
+}
+
+// Add the edges (src[i], dst[i]) to the lists of their `src` vertex
+static void add_adj_edges(gt::adj_writer& writer, const py::array& src,
+        const py::array& dst) {
+    gt::id_column src_ids = get_id_column(src, "src");
+    gt::id_column dst_ids = get_id_column(dst, "dst");
+    if (src_ids.size() != dst_ids.size())
+        throw std::runtime_error("`src` and `dst` must be the same length");
+    gt::check_ids(src_ids, "src");
+    gt::check_ids(dst_ids, "dst");
+
+    std::vector<gt::edge_t> edges(src_ids.size());
+    for (size_t i = 0; i < edges.size(); i++)
+        edges[i] = gt::edge_t(src_ids.get(i), dst_ids.get(i));
+    py::gil_scoped_release release;
+    writer.add(edges.data(), edges.size());
+}
+
+template <typename T>
+static py::list topk_of(const py::array& values, size_t k) {
+    py::array_t<T, py::array::c_style | py::array::forcecast> arr =
+        py::array_t<T, py::array::c_style | py::array::forcecast>::ensure(
+                values);
+    std::vector<gt::ranked_vertex<T> > top;
+    {
+        py::gil_scoped_release release;
+        top = gt::top_k(arr.data(), arr.size(), k);
+    }
+
+    py::list res;
+    for (size_t i = 0; i < top.size(); i++)
+        res.append(py::make_tuple(top[i].id, top[i].value));
+    return res;
+}
+
+// The k largest values of a per-vertex result as (vertex, value) pairs
+static py::list topk(py::array values, size_t k) {
+    if (values.ndim() != 1)
+        throw std::runtime_error("`values` must be a 1-D array");
+
+    size_t itemsize = values.itemsize();
+    switch (values.dtype().kind()) {
+        case 'f':
+            if (itemsize == 4)
+                return topk_of<float>(values, k);
+            return topk_of<double>(values, k);
+        case 'i':
+            if (itemsize == 4)
+                return topk_of<int32_t>(values, k);
+            return topk_of<int64_t>(values, k);
+        case 'u':
+            if (itemsize == 4)
+                return topk_of<uint32_t>(values, k);
+            return topk_of<uint64_t>(values, k);
+        default:
+            throw std::runtime_error("`values` must be a numeric array");
+    }
 }
 
 class Format {
     private:
     std::string configs;
 
+    // Report the state of `ingester` to the `progress` callback, if any.
+    // The phase is the ingester's unless given.
+    static void report_progress(py::object progress,
+            const gt::edge_ingester& ingester, const std::string& phase) {
+        if (progress.is_none())
+            return;
+
+        static const char* phases[] = { "parse", "merge", "write", "done" };
+        progress(py::dict(
+                    py::arg("phase")=phase.empty() ?
+                    std::string(phases[ingester.get_phase()]) : phase,
+                    py::arg("files")=ingester.get_num_files(),
+                    py::arg("files_done")=ingester.get_files_done(),
+                    py::arg("bytes")=ingester.get_bytes(),
+                    py::arg("edges")=ingester.get_edges(),
+                    py::arg("runs")=ingester.get_num_runs(),
+                    py::arg("merged")=ingester.get_merged()));
+    }
+
+    // Remove an output file, which is in SAFS if `safs`
+    static void delete_output(const std::string& fn, bool safs) {
+        if (safs) {
+            safs::safs_file f(safs::get_sys_RAID_conf(), fn);
+            if (f.exist())
+                f.delete_file();
+        } else if (py::module::import("os.path").attr("exists")(fn)
+                .cast<bool>()) {
+            delete_file(fn);
+        }
+    }
+
+    // Relabel the graph in `plain_adj` and `plain_idx`, which are deleted,
+    // and write it to `adj_fn` and `index_fn`, in SAFS if `safs`. The
+    // permutation is saved next to the local file `perm_adj`.
+    void reorder_graph(const std::string& plain_adj,
+            const std::string& plain_idx, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            std::string reorder, bool safs, const std::string& perm_adj) {
+        py::tuple edges = py::module::import("graphyti.reorder").attr(
+                "graph_edges")(plain_adj, plain_idx, configs);
+        delete_file(plain_adj);
+        delete_file(plain_idx);
+
+        write_arrays(edges[0].cast<py::array>(), edges[1].cast<py::array>(),
+                adj_fn, index_fn, directed, nthread, reorder, safs, perm_adj);
+    }
+
+    // `array2graphyti`, writing into SAFS if `safs` and saving the
+    // permutation next to the local file `perm_adj`. In SAFS the
+    // permutation is copied next to the adjacency list as well.
+    void write_arrays(py::array src, py::array dst, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            std::string reorder, bool safs, const std::string& perm_adj) {
+        py::object ro = py::module::import("graphyti.reorder");
+        // Relabelling can move the largest ID below isolated vertices,
+        // which keep their place in the permutation
+        size_t min_vertices = 0;
+        if (reorder.empty()) {
+            ro.attr("clear_permutation")(perm_adj);
+        } else {
+            min_vertices = std::max(
+                    gt::check_ids(get_id_column(src, "src"), "src"),
+                    gt::check_ids(get_id_column(dst, "dst"), "dst")) + 1;
+            py::tuple edges = ro.attr("reorder_edges")(src, dst, reorder,
+                    perm_adj);
+            src = edges[0].cast<py::array>();
+            dst = edges[1].cast<py::array>();
+        }
+
+        gt::id_column src_ids = get_id_column(src, "src");
+        gt::id_column dst_ids = get_id_column(dst, "dst");
+
+        std::string perm_path;
+        if (safs && !reorder.empty())
+            perm_path = ro.attr("permutation_file")(perm_adj)
+                .cast<std::string>();
+        py::gil_scoped_release release;
+        // Before the graph: SAFS can crash tearing down right after a new
+        // file is written, so the graph's writers are the last to run
+        if (!perm_path.empty())
+            gt::copy_to_safs(perm_path, adj_fn + ".perm");
+        gt::edge_arrays_to_fg(src_ids, dst_ids, adj_fn, index_fn, directed,
+                nthread, safs, min_vertices);
+    }
+
+    // `ingest`, writing into SAFS if `safs` and saving the permutation
+    // next to the local file `perm_adj`
+    void ingest_to(py::object edgelists, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            py::object memory_budget, std::string tmpdir, std::string reorder,
+            py::object progress, bool safs, const std::string& perm_adj) {
+        py::list sources = py::module::import("graphyti.edgelist").attr(
+                "ingest_files")(edgelists);
+        std::vector<std::string> files;
+        for (auto source : sources)
+            files.push_back(source.attr("path").cast<std::string>());
+        size_t budget = py::module::import("graphyti.utils").attr(
+                "parse_size")(memory_budget).cast<size_t>();
+
+        // A reordered graph is written as is first, locally, then relabelled
+        scratch_dir scratch(tmpdir);
+        bool plain_safs = safs && reorder.empty();
+        std::string plain_adj = reorder.empty() ? adj_fn :
+            scratch.join("plain.adj");
+        std::string plain_idx = reorder.empty() ? index_fn :
+            scratch.join("plain.idx");
+
+        std::unique_ptr<gt::edge_ingester> ingester(new gt::edge_ingester(
+                    files, scratch.path(), directed, budget, nthread));
+        try {
+            ingester->start(plain_adj, plain_idx, plain_safs);
+            py::gil_scoped_release release;
+            while (!ingester->wait(std::chrono::milliseconds(500))) {
+                // Take the GIL now and then to report progress and see
+                // KeyboardInterrupt, either of which cancels the ingestion
+                py::gil_scoped_acquire acquire;
+                if (PyErr_CheckSignals() != 0)
+                    throw py::error_already_set();
+                report_progress(progress, *ingester, "");
+            }
+            ingester->finish();
+        } catch (...) {
+            // Stop the ingester without the GIL, which the threads
+            // decompressing zstd files need to see their pipes closed
+            {
+                py::gil_scoped_release release;
+                ingester.reset();
+            }
+            for (auto source : sources)
+                source.attr("abort")();
+            // The ingester may have finished before it was cancelled
+            delete_output(plain_adj, plain_safs);
+            delete_output(plain_idx, plain_safs);
+            throw;
+        }
+
+        try {
+            for (auto source : sources)
+                source.attr("close")();
+        } catch (...) {
+            delete_output(plain_adj, plain_safs);
+            delete_output(plain_idx, plain_safs);
+            throw;
+        }
+
+        if (reorder.empty()) {
+            py::module::import("graphyti.reorder").attr("clear_permutation")(
+                    perm_adj);
+        } else {
+            report_progress(progress, *ingester, "reorder");
+            reorder_graph(plain_adj, plain_idx, adj_fn, index_fn, directed,
+                    nthread, reorder, safs, perm_adj);
+        }
+        report_progress(progress, *ingester, "done");
+    }
+
     public:
     Format(const std::string& configs): configs(configs) {
     }
@@ -47,38 +1128,160 @@ class Format {
         this->configs = configs;
     }
 
-    void edge2graphyti(std::vector<std::string> edgelists, std::string adj_fn,
-            std::string index_fn, bool directed, int nthread) {
+    void edge2graphyti(py::object paths, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            std::string tmpdir, std::string reorder) {
+        if (!reorder.empty()) {
+            // The graph is read back into memory to be relabelled anyway,
+            // so convert it as is with the ingester
+            ingest_to(paths, adj_fn, index_fn, directed, nthread,
+                    py::str("1G"), tmpdir, reorder, py::none(), false,
+                    adj_fn);
+            return;
+        }
+
+        std::vector<std::string> edgelists = py::module::import(
+                "graphyti.edgelist").attr("expand_edgelists")(paths).cast<
+            std::vector<std::string> >();
+        py::module::import("graphyti.reorder").attr("clear_permutation")(
+                adj_fn);
+        py::gil_scoped_release release;
         fg::utils::el2fg(edgelists, adj_fn, index_fn, directed, nthread);
     }
 
-    std::pair<std::string, std::string> load(
-            std::string edgelist, bool directed, int nthread) {
-        if (edgelist.empty())
-            return std::pair<std::string, std::string>("", "");
+    void array2graphyti(py::array src, py::array dst, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            std::string tmpdir, std::string reorder) {
+        write_arrays(src, dst, adj_fn, index_fn, directed, nthread, reorder,
+                false, adj_fn);
+    }
 
-        if (configs.empty())
-            throw std::runtime_error("Configuration file must be set first");
+    void binary2graphyti(std::string edgelist, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            std::string dtype, std::string tmpdir, std::string reorder) {
+        py::tuple cols = py::module::import("graphyti.edgelist").attr(
+                "map_edges")(edgelist, dtype);
 
-        std::string bn = splitext(get_basename(edgelist))[0];
-        std::string adj_fn = bn+std::string(".adj");
-        std::string idx_fn = bn+std::string(".idx");
+        array2graphyti(cols[0].cast<py::array>(), cols[1].cast<py::array>(),
+                adj_fn, index_fn, directed, nthread, tmpdir, reorder);
+    }
 
-        std::vector<std::string> els { edgelist };
+    void array2compressed(py::array src, py::array dst, std::string fn,
+            bool directed, size_t num_vertices) {
+        gt::id_column src_ids = get_id_column(src, "src");
+        gt::id_column dst_ids = get_id_column(dst, "dst");
 
-        fg::utils::el2fg(els, adj_fn, idx_fn, directed);
+        py::module::import("graphyti.reorder").attr("clear_permutation")(fn);
+        py::gil_scoped_release release;
+        gt::write_cadj(src_ids, dst_ids, fn, directed, num_vertices);
+    }
 
-        fg::FileManager fm(configs);
+    void compress(std::string adj_fn, std::string index_fn, std::string fn) {
+        py::object ro = py::module::import("graphyti.reorder");
+        py::object graph = py::module::import("graphyti.graphyti").attr(
+                "Graph")(adj_fn, index_fn, configs);
+        bool directed = graph.attr("is_directed")().cast<bool>();
+        size_t num_vertices = graph.attr("vcount")().cast<size_t>();
+        py::tuple edges = ro.attr("graph_edges")(adj_fn, index_fn, configs);
+        array2compressed(edges[0].cast<py::array>(), edges[1].cast<py::array>(),
+                fn, directed, num_vertices);
+
+        // A reordered graph keeps its permutation
+        py::object os_path = py::module::import("os.path");
+        py::object perm_fn = ro.attr("permutation_file")(adj_fn);
+        if (os_path.attr("exists")(perm_fn).cast<bool>())
+            py::module::import("shutil").attr("copyfile")(perm_fn,
+                    ro.attr("permutation_file")(fn));
+    }
 
-        // Load the adjacency list and index file
-        fm.to_ex_mem(adj_fn, adj_fn);
-        fm.to_ex_mem(idx_fn, idx_fn);
+    void decompress(std::string fn, std::string adj_fn, std::string index_fn) {
+        {
+            py::gil_scoped_release release;
+            gt::cadj_reader(fn).decode(adj_fn, index_fn);
+        }
+
+        py::object ro = py::module::import("graphyti.reorder");
+        py::object os_path = py::module::import("os.path");
+        py::object perm_fn = ro.attr("permutation_file")(fn);
+        if (os_path.attr("exists")(perm_fn).cast<bool>())
+            py::module::import("shutil").attr("copyfile")(perm_fn,
+                    ro.attr("permutation_file")(adj_fn));
+        else
+            ro.attr("clear_permutation")(adj_fn);
+    }
 
-        // Delete the temps
-        delete_file(adj_fn);
-        delete_file(idx_fn);
+    void ingest(py::object edgelists, std::string adj_fn,
+            std::string index_fn, bool directed, int nthread,
+            py::object memory_budget, std::string tmpdir, std::string reorder,
+            py::object progress) {
+        ingest_to(edgelists, adj_fn, index_fn, directed, nthread,
+                memory_budget, tmpdir, reorder, progress, false, adj_fn);
+    }
 
-        // Delete the temps
+    std::pair<std::string, std::string> load(std::string edgelist,
+            bool directed, int nthread, std::string tmpdir,
+            std::string reorder, py::object memory_budget,
+            py::object progress, bool catalog) {
+        if (edgelist.empty())
+            return std::pair<std::string, std::string>("", "");
+
+        if (configs.empty())
+            throw std::runtime_error("Configuration file must be set first");
+
+        py::object el = py::module::import("graphyti.edgelist");
+        std::string bn = el.attr("graph_name")(edgelist).cast<std::string>();
+        std::string adj_fn = bn+std::string(".adj");
+        std::string idx_fn = bn+std::string(".idx");
+        py::list files = el.attr("expand_edgelists")(edgelist);
+
+        // The same edge lists converted the same way are already in SAFS
+        py::object cat = py::module::import("graphyti.catalog").attr(
+                "Catalog")(configs);
+        py::object key;
+        if (!catalog) {
+            // The graph catalogued under these names is loaded over
+            cat.attr("forget")(adj_fn);
+        } else {
+            key = cat.attr("key")(files, py::arg("directed")=directed,
+                    py::arg("reorder")=reorder);
+            py::object found = cat.attr("find")(key);
+            if (!found.is_none())
+                return found.cast<std::pair<std::string, std::string> >();
+
+            py::tuple names = cat.attr("names")(key, bn);
+            adj_fn = names[0].cast<std::string>();
+            idx_fn = names[1].cast<std::string>();
+        }
+
+        // The graph is written straight into SAFS. Only a reordered graph
+        // is staged in `tmpdir`, to be read back and relabelled, and its
+        // permutation is copied into SAFS next to the adjacency list
+        // before the graph is written.
+        if (memory_budget.is_none())
+            memory_budget = py::str("1G");
+        scratch_dir scratch(tmpdir);
+        std::string perm_adj = scratch.join("graph.adj");
+        std::string perm_fn = adj_fn + ".perm";
+        // A new generation tells graphs loaded under the same name apart
+        py::object cat_mod = py::module::import("graphyti.catalog");
+        std::string gen_fn = cat_mod.attr("generation_file")(adj_fn)
+            .cast<std::string>();
+        std::string gen_path = scratch.join("graph.gen");
+        py::object generation = cat_mod.attr("write_generation")(gen_path);
+        {
+            safs_io io(configs);
+            delete_output(perm_fn, true);
+            {
+                py::gil_scoped_release release;
+                gt::copy_to_safs(gen_path, gen_fn);
+            }
+            ingest_to(files, adj_fn, idx_fn, directed, nthread,
+                    memory_budget, tmpdir, reorder, progress, true, perm_adj);
+        }
+
+        if (catalog)
+            cat.attr("add")(key, adj_fn, idx_fn, files, generation,
+                    py::arg("directed")=directed, py::arg("reorder")=reorder);
         return std::pair<std::string, std::string>(adj_fn, idx_fn);
     }
 };
@@ -95,21 +1298,37 @@ PYBIND11_MODULE(graphyti, m) {
 
      )pbdoc";
         // Graph
-        py::class_<fg::CGraph>(m, "Graph")
+        py::class_<Graph>(m, "Graph")
         .def(py::init(), "Create a Graph object"
                 , py::return_value_policy::reference)
 
         .def(py::init<std::string, std::string, std::string>(),
             "Create a Graph object given adj list file, index file and "
-            "configuration file",  py::return_value_policy::reference)
+            "configuration file",  py::return_value_policy::reference,
+            py::call_guard<py::gil_scoped_release>())
+
+        .def(py::init<std::string, std::string, std::string, bool, bool>(),
+            "Create a Graph object given adj list file, index file and "
+            "configuration file, mapping the adj list file into memory. "
+            "`populate` reads it in up front and `hugepages` asks for huge "
+            "pages", py::return_value_policy::reference,
+            py::arg("graph_file"), py::arg("index_file"),
+            py::arg("config_file"), py::arg("populate")=false,
+            py::arg("hugepages")=false,
+            py::call_guard<py::gil_scoped_release>())
         /*Algorithms*/
         /* Coreness */
-        .def("coreness", &fg::CGraph::coreness,
+        .def("coreness", &Graph::coreness,
                 R"pbdoc(
         Compute the k-core/coreness of a graph. The algorithm will
         determine which vertices are between core `kmin` and `kmax` --
         all other vertices will be assigned to core 0.
 
+        A `checkpoint` (`checkpoint_dir` through `Graph`) computes the
+        coreness of every vertex by lowering each vertex's core to the
+        h-index of its neighbors' cores until none changes, counting edges
+        in both directions. It requires `kmax` and `kmin` to be 0.
+
         Optional arguments:
         -------------------
         kmin:
@@ -118,16 +1337,29 @@ PYBIND11_MODULE(graphyti, m) {
             - (Optional) The kmax value. If omitted then all cores are
             computed i.e., coreness. *This is not recommended for very large
             graphs.*
+        checkpoint:
+            - A file to save the cores to every `checkpoint_interval`
+            iterations. `Graph` keeps it in its `checkpoint_dir`
+        checkpoint_interval:
+            - The iterations between checkpoints
+        resume:
+            - Continue from the state in `checkpoint` if there is one
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-         A list containing the core of each vertex between `kmin`
+         A NumPy array containing the core of each vertex between `kmin`
          and `kmax`. All other vertices are assigned to core 0.
                 )pbdoc",
-                py::arg("kmax")=0, py::arg("kmin")=0)
+                py::arg("kmax")=0, py::arg("kmin")=0,
+                py::arg("checkpoint")="", py::arg("checkpoint_interval")=10,
+                py::arg("resume")=false, py::arg("out")=py::none())
 
         /* Betweenness centrality */
-        .def("betweenness", &fg::CGraph::betweenness,
+        .def("betweenness", per_vertex(&Graph::betweenness),
         R"pbdoc(
         The betweenness centrality of the graph.
         This measure of centrality is based on the shortest paths within which a
@@ -137,16 +1369,21 @@ PYBIND11_MODULE(graphyti, m) {
         -------------------
         ids:
             - The vertex IDs for which BC should be computed
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list with an entry for each vertex in the graph's
+        A NumPy array with an entry for each vertex in the graph's
           betweenness centrality value.
         )pbdoc",
-                py::arg("ids")=std::vector<fg::vertex_id_t>())
+                py::arg("ids")=std::vector<fg::vertex_id_t>(),
+                py::arg("out")=py::none())
 
         /* Closeness centrality */
-        .def("closeness", &fg::CGraph::closeness,
+        .def("closeness", per_vertex(&Graph::closeness),
         R"pbdoc(
         The closeness centrality of a graph is a measure of a nodes average
         farness (in terms of links traversed, that may be weighted) of all
@@ -156,17 +1393,21 @@ PYBIND11_MODULE(graphyti, m) {
             - The vertex IDs for which closeness centrality should be computed
         edge_type:
             - The edge type: "in", "out" or "both"
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list with an entry for each vertex in the graph's
+        A NumPy array with an entry for each vertex in the graph's
           closeness centrality value.
         )pbdoc",
                 py::arg("ids")=std::vector<fg::vertex_id_t>(),
-                py::arg("edge_type")="both")
+                py::arg("edge_type")="both", py::arg("out")=py::none())
 
         /* Diversity */
-        .def("diversity", &fg::CGraph::diversity,
+        .def("diversity", per_vertex(&Graph::diversity),
         R"pbdoc(
         The diversity of a vertex is defined as the (scaled)
         Shannon entropy of the weights of its incident edges.
@@ -177,15 +1418,21 @@ PYBIND11_MODULE(graphyti, m) {
             - The edge type: "in", "out" or "both"
         memopt:
             - Optimize for minimal memory rather than performance.
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list with an entry for each vertex in the graph's diversity value.
+        A NumPy array with an entry for each vertex in the graph's diversity
+        value.
         )pbdoc",
-                py::arg("edge_type")="out", py::arg("memopt")=false)
+                py::arg("edge_type")="out", py::arg("memopt")=false,
+                py::arg("out")=py::none())
 
         /* Topological Sort */
-        .def("toposort", &fg::CGraph::topo_sort,
+        .def("toposort", per_vertex(&Graph::topo_sort),
         R"pbdoc(
         Compute one (of possibly many) topological sortings of the graph.
         Given a directed acyclic graph (DAG) there is one sorting without
@@ -196,15 +1443,19 @@ PYBIND11_MODULE(graphyti, m) {
         -------------------
         approx:
             - Compute a (faster) sorting
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list of topologically sorted vertex IDs
+        A NumPy array of topologically sorted vertex IDs
         )pbdoc",
-        py::arg("approx")=true)
+        py::arg("approx")=true, py::arg("out")=py::none())
 
         /* Louvain Modularity */
-        .def("louvain", &fg::CGraph::louvain,
+        .def("louvain", per_vertex(&Graph::louvain),
         R"pbdoc(
         Compute louvain agglomerative hiearchical clustering algorithm.
         At each `level` clusters merge to those with the highest degree of
@@ -214,15 +1465,19 @@ PYBIND11_MODULE(graphyti, m) {
         -------------------
         nlevels:
             - The number of hierarchical levels of louvain to perform
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A numeric list with the cluster assignments for each vertex
+        A NumPy array with the cluster assignments for each vertex
         )pbdoc",
-                py::arg("nlevels")=4)
+                py::arg("nlevels")=4, py::arg("out")=py::none())
 
         /* Degree */
-        .def("degree", &fg::CGraph::degree,
+        .def("degree", per_vertex(&Graph::degree),
         R"pbdoc(
         The degree of vertices in the graph is the number edges incident to
         a vertex.
@@ -233,15 +1488,19 @@ PYBIND11_MODULE(graphyti, m) {
             - The edge type: "in", "out" or "both"
         memopt:
             - Optimize for minimal memory rather than performance.
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list with an entry for each vertex in the graph's diversity value.
+        A NumPy array with an entry for each vertex in the graph's degree.
         )pbdoc",
-                py::arg("edge_type")="both", py::return_value_policy::copy)
+                py::arg("edge_type")="both", py::arg("out")=py::none())
 
         /* Triangles */
-        .def("triangles", &fg::CGraph::triangles,
+        .def("triangles", per_vertex(&Graph::triangles),
         R"pbdoc(
         Triangle count of each vertex. Counts the number 3-cliques that exist
         within the graph. Used as a measure of importance for vertices that have
@@ -267,15 +1526,20 @@ PYBIND11_MODULE(graphyti, m) {
         -------------------
         cycles_only:
             - Count only cycle triangles
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list containing the triangle count of each vertex in the graph
+        A NumPy array containing the triangle count of each vertex in the
+        graph
         )pbdoc",
-                py::arg("cycles_only")=false)
+                py::arg("cycles_only")=false, py::arg("out")=py::none())
 
         /* Local Scan */
-        .def("local_scan", &fg::CGraph::local_scan,
+        .def("local_scan", per_vertex(&Graph::local_scan),
         R"pbdoc(
         Scan statistic is a measure of non-homogeniety is the nodes of a graph.
         Nodes with larger scan statistic appear more different than others.
@@ -284,15 +1548,20 @@ PYBIND11_MODULE(graphyti, m) {
         -------------------
         num_hops:
             - The neighborhood around a vertex within which one must look
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list containing the scan statistic of each vertex in the graph
+        A NumPy array containing the scan statistic of each vertex in the
+        graph
         )pbdoc",
-                py::arg("num_hops")=1)
+                py::arg("num_hops")=1, py::arg("out")=py::none())
 
         /* Top k Scan */
-        .def("topk_scan", &fg::CGraph::topk_scan,
+        .def("topk_scan", &Graph::topk_scan,
         R"pbdoc(
         Compute the top `k` scan statistics valued vertices. See help for
         `local_scan` for more details.
@@ -307,10 +1576,10 @@ PYBIND11_MODULE(graphyti, m) {
         A list of 2-tuples with <vertex-ID, scan-value> of the top k scan
         statistic values
         )pbdoc",
-        py::arg("k"))
+        py::arg("k"), py::call_guard<py::gil_scoped_release>())
 
         /* Diameter */
-        .def("diameter", &fg::CGraph::diameter,
+        .def("diameter", &Graph::diameter,
         R"pbdoc(
         Compute an estimate of the graph diameter. Diameter is a measure of the
         extent of a graph from one peripheral vertex to another
@@ -325,80 +1594,347 @@ PYBIND11_MODULE(graphyti, m) {
         --------
         The estimated graph diameter
         )pbdoc",
-                py::arg("num_para_bfs")=2, py::arg("directed")=true)
+                py::arg("num_para_bfs")=2, py::arg("directed")=true,
+                py::call_guard<py::gil_scoped_release>())
 
         /* PageRank*/
-        .def("pagerank", &fg::CGraph::pagerank,
+        .def("pagerank", &Graph::pagerank,
         R"pbdoc(
         Compute the PageRank of vertices in the graph. Pagerank is a measure of
         importance of a vertex based upon the number of high ranking vertices
         with which it shares edges.
         See: http://ilpubs.stanford.edu:8090/422/1/1999-66.pdf
 
+        Setting `tol`, `warm_start`, `seeds`, `checkpoint` (`checkpoint_dir`
+        with `Graph`) or `control` (`timeout`, `cancel` or `progress` with
+        `Graph`) switches to a push based delta PageRank that stops updating
+        a vertex once its rank converges. It ignores `algo`, which must be
+        "push" with a `checkpoint_dir`.
+
         Optional arguments:
         -------------------
         niters:
-            - The number of iterations to perform
+            - The number of iterations to perform, or the maximum number of
+            iterations when `tol` is set
         damping_factor:
             - Used as probability of a user continuing to browse and jumping to
             a random page
         algo:
             - Either "push" or "pull" determines whether nodes broadcast their
             PageRank values (push) or nodes request PageRank values of their
-            neighbors (pull). Default is "push" and is faster
+            neighbors (pull). Default is "push" and is faster. Ignored by the
+            delta PageRank
+        tol:
+            - Stop updating a vertex once its rank changes by no more than
+            this. The computation ends when every vertex has converged
+        warm_start:
+            - The ranks to start from, e.g. the result of an earlier run
+            before a few edges changed
+        seeds:
+            - Compute personalized PageRank: random jumps only land on these
+            vertex IDs
+        iterations:
+            - A list to which a dict is appended for each iteration the delta
+            PageRank ran, holding the number of vertices updated
+            (`active_vertices`) and the time it took (`seconds`). Nothing is
+            appended when no iteration runs: without the delta PageRank, or
+            when `Graph` returns the result from its `cache` or a finished
+            checkpoint
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
+        checkpoint:
+            - A file to save the ranks to every `checkpoint_interval`
+            iterations. `Graph` keeps it in its `checkpoint_dir`
+        checkpoint_interval:
+            - The iterations between checkpoints
+        resume:
+            - Continue from the state in `checkpoint` if there is one
+        control:
+            - A `graphyti.control.RunControl` that gets the progress of
+                every iteration and can stop the run, leaving the ranks so
+                far. `Graph` makes one from `timeout`, `cancel` and
+                `progress`
 
         Returns:
         --------
-        A list containing the PageRank of each vertex
+        A NumPy array containing the PageRank of each vertex
         )pbdoc",
                 py::arg("niters")=30, py::arg("damping_factor")=.85,
-                py::arg("algo")="push")
+                py::arg("algo")="push", py::arg("tol")=0,
+                py::arg("warm_start")=py::none(), py::arg("seeds")=py::none(),
+                py::arg("iterations")=py::none(), py::arg("out")=py::none(),
+                py::arg("checkpoint")="", py::arg("checkpoint_interval")=10,
+                py::arg("resume")=false, py::arg("control")=py::none())
 
         /* Weakly connected components*/
         .def("weakly_connected_components",
-                &fg::CGraph::weakly_connected_components,
+                &Graph::weakly_connected_components,
         R"pbdoc(
         Weakly connected components is the maximal subgraph of a directed graph
         such that for every pair of vertices  u, v in the subgraph, there is an
         undirected path from u to v and a directed path from v to u.
 
+        A `checkpoint` (`checkpoint_dir` through `Graph`) labels the
+        components by propagating the smallest vertex ID to every vertex
+        connected to it, which gives the same labels.
+
         Optional arguments:
         -------------------
         sync:
-            - Perform algorithm synchronously or asynchronously (faster)
+            - Perform algorithm synchronously or asynchronously (faster).
+            Ignored with a `checkpoint`
+        checkpoint:
+            - A file to save the labels to every `checkpoint_interval`
+            iterations. `Graph` keeps it in its `checkpoint_dir`
+        checkpoint_interval:
+            - The iterations between checkpoints
+        resume:
+            - Continue from the state in `checkpoint` if there is one
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
 
         Returns:
         --------
-        A list of vertex IDs comprising the weakly connected components
+        A NumPy array of vertex IDs comprising the weakly connected components
         )pbdoc",
-                py::arg("sync")=false)
+                py::arg("sync")=false,
+                py::arg("checkpoint")="", py::arg("checkpoint_interval")=10,
+                py::arg("resume")=false, py::arg("out")=py::none())
 
         /* Connected components */
-        .def("connected_components", &fg::CGraph::connected_components,
+        .def("connected_components",
+                &Graph::connected_components,
         R"pbdoc(
         The connected components are formed by subgraphs in which any two
         vertices are connected to each other by a path. Non path connected
         vertices are placed in other connected components.
 
+        A `checkpoint` (`checkpoint_dir` through `Graph`) labels the
+        components by propagating the smallest vertex ID to every vertex
+        connected to it, which gives the same labels.
+
+        Optional arguments:
+        -------------------
+        checkpoint:
+            - A file to save the labels to every `checkpoint_interval`
+            iterations. `Graph` keeps it in its `checkpoint_dir`
+        checkpoint_interval:
+            - The iterations between checkpoints
+        resume:
+            - Continue from the state in `checkpoint` if there is one
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
+
         Returns:
         --------
-        A list containing the component ID of each vertex
-        )pbdoc")
+        A NumPy array containing the component ID of each vertex
+        )pbdoc",
+                py::arg("checkpoint")="", py::arg("checkpoint_interval")=10,
+                py::arg("resume")=false, py::arg("out")=py::none())
 
         /*  Strongly connected components*/
         .def("strongly_connected_components",
-                &fg::CGraph::strongly_connected_components,
+                per_vertex(&Graph::strongly_connected_components),
         R"pbdoc(
         The strongly connected components of a directed graph form partitions
         of subgraphs that are connected via either in or out edges.
 
+        Optional arguments:
+        -------------------
+        out:
+            - (Optional) A preallocated array to write the result into, or
+                the path of a `.npy` file or `safs:<name>` to write it to
+                and return it memory-mapped
+
         Returns:
         --------
-        A list of vertex IDs comprising the strongly connected component
-        )pbdoc")
+        A NumPy array of vertex IDs comprising the strongly connected component
+        )pbdoc",
+                py::arg("out")=py::none())
+
+        /* Multi-source BFS */
+        .def("bfs", &Graph::bfs,
+        R"pbdoc(
+        Perform Breadth First traversals from many sources at once. Each
+        traversal serves up to 64 sources with bit-parallel frontiers, so the
+        adjacency list of a vertex is read once per level for all of them.
+
+        Positional arguments:
+        --------------------
+        sources:
+            - The vertex IDs from which to begin the BFS sweeps
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - The edge type: "in", "out" or "both"
+        distances:
+            - Also return the hop distance of every vertex from each source
+        iterations:
+            - A list to which a dict is appended for each level of the
+                traversals, holding the number of vertices expanded
+                (`active_vertices`) and the time it took (`seconds`)
+        control:
+            - A `graphyti.control.RunControl` that gets the progress of
+                every level and can stop the traversals, leaving what they
+                reached so far. `Graph` makes one from `timeout`, `cancel`
+                and `progress`
+
+        Returns:
+        --------
+        A NumPy array with the number of vertices visited from each source.
+        If `distances` is set, a 2-tuple of that array and a
+        (len(sources), vcount) uint16 matrix of hop distances, where
+        vertices a source can't reach are 65535.
+        )pbdoc",
+                py::arg("sources"), py::arg("edge_type")="both",
+                py::arg("distances")=false,
+                py::arg("iterations")=py::none(),
+                py::arg("control")=py::none())
+
+        /* Approximate centrality */
+        .def("approx_betweenness", &Graph::approx_betweenness,
+        R"pbdoc(
+        Estimate the betweenness centrality of every vertex from the shortest
+        paths out of a uniform sample of source vertices. Several sources
+        share each traversal, so a vertex's adjacency list is read once per
+        level for all of them.
+
+        Optional arguments:
+        -------------------
+        samples:
+            - The number of source vertices. All of them give the exact values
+        epsilon:
+            - Instead of `samples`, the largest error of an estimate relative
+                to the number of vertex pairs
+        delta:
+            - The probability of any estimate exceeding `epsilon`
+        batch:
+            - The number of sources per traversal, at most 16. Each one
+                keeps 14 bytes per vertex (224 bytes per vertex for 16), so
+                by default as many as fit in `memory` are used
+        memory:
+            - The memory the sources of a traversal may take, e.g. "1G",
+                when `batch` isn't given
+        seed:
+            - The seed of the random sample
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays: the estimated betweenness of each vertex
+        and its standard error
+        )pbdoc",
+                py::arg("samples")=0, py::arg("epsilon")=0,
+                py::arg("delta")=.1, py::arg("batch")=0,
+                py::arg("memory")="1G", py::arg("seed")=py::none())
+
+        .def("approx_closeness", &Graph::approx_closeness,
+        R"pbdoc(
+        Estimate the closeness centrality of every vertex as `closeness`
+        computes it, the inverse of the sum of its hop distances to the
+        vertices it reaches, from its distances to a uniform sample of pivot
+        vertices. The pivots are searched with the multi-source BFS.
+
+        Optional arguments:
+        -------------------
+        samples:
+            - The number of pivots
+        epsilon:
+            - Instead of `samples`, the largest error of an average distance
+                relative to the graph's diameter
+        delta:
+            - The probability of any estimate exceeding `epsilon`
+        edge_type:
+            - The edge type: "in", "out" or "both"
+        seed:
+            - The seed of the random sample
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays: the estimated closeness of each vertex and
+        its standard error. Vertices that reach no other pivot get 0 and a
+        NaN error
+        )pbdoc",
+                py::arg("samples")=0, py::arg("epsilon")=0,
+                py::arg("delta")=.1, py::arg("edge_type")="both",
+                py::arg("seed")=py::none())
+
+        /* Neighborhood measures */
+        .def("neighborhood", &Graph::neighborhood,
+        R"pbdoc(
+        Compute degrees, triangle counts and local scan statistics (of 1 hop)
+        together. Every vertex reads its own edge lists and then those of
+        its neighbors once for all of them.
+
+        Optional arguments:
+        -------------------
+        degrees:
+            - The edge types, "in", "out" or "both", to compute the degree of
+                each vertex for
+        triangles:
+            - Count the triangles of each vertex, edge direction disregarded
+        local_scan:
+            - Compute the scan statistic of each vertex
+
+        Returns:
+        --------
+        A 2-tuple of a dict of NumPy arrays, keyed by "degree:<edge_type>",
+        "triangles" and "local_scan", and the bytes of edge lists read
+        )pbdoc",
+                py::arg("degrees")=std::vector<std::string>(),
+                py::arg("triangles")=false, py::arg("local_scan")=false)
+
+        /* Neighbors */
+        .def("neighbors", &Graph::neighbors,
+        R"pbdoc(
+        Read the neighbor lists of a batch of vertices as the rows of a
+        compressed sparse row (CSR) matrix. Each distinct vertex's list is
+        read once.
+
+        Optional arguments:
+        -------------------
+        ids:
+            - The vertex IDs, which may repeat. All vertices in order if
+                omitted
+        edge_type:
+            - "out", "in" or "both" (in-neighbors, then out-neighbors).
+                Undirected graphs only have one list per vertex
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays (indptr, indices): the neighbors of ids[i]
+        are indices[indptr[i]:indptr[i + 1]]. They're int32 unless the graph
+        needs int64
+        )pbdoc",
+                py::arg("ids")=py::none(), py::arg("edge_type")="out")
+
+        /* Edges */
+        .def("edges", &Graph::edges,
+        R"pbdoc(
+        Read every edge of the graph back from its adjacency list
+
+        Optional arguments:
+        -------------------
+        edge_type:
+            - "out" for the (vertex, out-neighbor) pairs, "in" for the
+            (vertex, in-neighbor) pairs or "both" for both. Undirected graphs
+            list each edge under both of its endpoints
+
+        Returns:
+        --------
+        A 2-tuple of NumPy arrays holding the vertex and neighbor ID of each
+        edge, in no particular order
+        )pbdoc",
+                py::arg("edge_type")="out")
 
         /* BFS */
-        .def("bfs_vcount", &fg::CGraph::bfs_vcount,
+        .def("bfs_vcount", &Graph::bfs_vcount,
         R"pbdoc(
         Perform Breadth First traversal and count the number of vertices
         visited in the sweep.
@@ -417,42 +1953,65 @@ PYBIND11_MODULE(graphyti, m) {
         --------
         The BFS count of vertices visited
         )pbdoc",
-                py::arg("start_vertex"), py::arg("edge_type")="both")
+                py::arg("start_vertex"), py::arg("edge_type")="both",
+                py::call_guard<py::gil_scoped_release>())
 
-        .def("__repr__", &fg::CGraph::to_str,
+        .def("__repr__", &Graph::to_str,
         R"pbdoc(
         String representation of the graph
         )pbdoc")
-        .def("get_min_vertex_id", &fg::CGraph::min_id,
+        .def("get_min_vertex_id", &Graph::min_id,
         R"pbdoc(
         Get the minimum vertex ID of the graph
         )pbdoc")
-        .def("get_max_vertex_id", &fg::CGraph::max_id,
+        .def("get_max_vertex_id", &Graph::max_id,
         R"pbdoc(
         Get the maximum vertex ID of the graph
         )pbdoc")
-        .def("vcount", &fg::CGraph::vcount,
+        .def("vcount", &Graph::vcount,
         R"pbdoc(
         The number of vertices in the graph
         )pbdoc")
-        .def("ecount", &fg::CGraph::ecount,
+        .def("ecount", &Graph::ecount,
         R"pbdoc(
         The number of edges in the graph
         )pbdoc")
-        .def("vcount", &fg::CGraph::vcount,
+        .def("vcount", &Graph::vcount,
         R"pbdoc(
         The number of vertices in the graph
         )pbdoc")
-        .def("is_directed", &fg::CGraph::is_directed,
+        .def("is_directed", &Graph::is_directed,
         R"pbdoc(
         Determine if the graph directed
         )pbdoc")
-        .def("is_in_mem", &fg::CGraph::is_in_mem,
+        .def("is_in_mem", &Graph::is_in_mem,
         R"pbdoc(
         Determine if the graph is in memory
         )pbdoc");
 
     // File Manager
+        m.def("topk", &topk,
+        R"pbdoc(
+        Select the `k` largest values of a per-vertex result across threads
+        without sorting it. NaNs rank last and ties go to the lower vertex ID.
+
+        Positional arguments:
+        --------------------
+        values:
+            - A NumPy array with a value per vertex
+
+        Optional arguments:
+        -------------------
+        k:
+            - The top number of vertices
+
+        Returns:
+        --------
+        A list of 2-tuples with <vertex-ID, value> of the top k values in
+        decreasing order
+        )pbdoc",
+                py::arg("values"), py::arg("k")=10);
+
         py::class_<fg::FileManager>(m, "FileManager")
         .def(py::init<const std::string&>(),
         R"pbdoc(
@@ -475,7 +2034,11 @@ PYBIND11_MODULE(graphyti, m) {
             - The name of the file in SAFS
         )pbdoc",
         py::arg("filename"))
-        .def("export", &fg::FileManager::from_ex_mem,
+        .def("export", [](fg::FileManager& fm, const std::string& local_fn,
+                    const std::string& safs_fn) {
+                // from_ex_mem takes the SAFS file first
+                fm.from_ex_mem(safs_fn, local_fn);
+                },
         R"pbdoc(
         Export files from SAFS to the local file system
 
@@ -573,7 +2136,8 @@ PYBIND11_MODULE(graphyti, m) {
         --------------------
         edgelists:
             - A list of files that contains the edge lists for the graph
-                in plain text
+                in plain text. Directories (all the files in them) and glob
+                patterns are expanded
         adj_fn:
             - The requested adjacency list file name in
         index_fn:
@@ -582,25 +2146,308 @@ PYBIND11_MODULE(graphyti, m) {
             - Are the edges directed?
         thread:
             - Number of threads to use during conversion
+        tmpdir:
+            - The directory in which to stage a graph before reordering it.
+                Defaults to the system's temp dir
+        reorder:
+            - Renumber the vertices to improve locality: "degree" (hubs
+                first), "rcm" (reverse Cuthill-McKee, needs `scipy`) or
+                "community" (communities found by label propagation). The
+                permutation is saved as `<adj_fn>.perm` and used by `Graph`
+                to map results back to the original IDs
         )pbdoc",
                 py::arg("edgelists"), py::arg("adj_fn"),
                 py::arg("index_fn"),
-                py::arg("directed")=true, py::arg("nthread")=4)
+                py::arg("directed")=true, py::arg("nthread")=4,
+                py::arg("tmpdir")="", py::arg("reorder")="")
+        .def("array2graphyti", &Format::array2graphyti,
+        R"pbdoc(
+        Convert an edge list held in integer arrays to graphyti format. Any
+        object supporting the buffer protocol can be used, including
+        memory-mapped arrays. The edges are sorted in memory, taking 8 bytes
+        per directed and 16 bytes per undirected edge, and written straight
+        to the adjacency list. The graph is unweighted.
+
+        Positional arguments:
+        --------------------
+        src:
+            - The source vertex ID of each edge
+        dst:
+            - The destination vertex ID of each edge
+        adj_fn:
+            - The requested adjacency list file name
+        index_fn:
+            - The requested index list file name
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Are the edges directed?
+        nthread:
+            - Number of threads to use during conversion
+        tmpdir:
+            - Unused: the edges are relabelled in memory
+        reorder:
+            - Renumber the vertices to improve locality: "degree", "rcm" or
+                "community" (see `edge2graphyti`)
+        )pbdoc",
+                py::arg("src"), py::arg("dst"), py::arg("adj_fn"),
+                py::arg("index_fn"), py::arg("directed")=true,
+                py::arg("nthread")=4, py::arg("tmpdir")="",
+                py::arg("reorder")="")
+        .def("binary2graphyti", &Format::binary2graphyti,
+        R"pbdoc(
+        Convert a binary edge list file to graphyti format. The file is
+        memory-mapped rather than read into memory, and converted as by
+        `array2graphyti`.
+
+        Positional arguments:
+        --------------------
+        edgelist:
+            - Either a `.npy` file holding an (nedges, 2) integer array or a
+                raw file of consecutive (src, dst) pairs of type `dtype`.
+                Edge weights aren't supported
+        adj_fn:
+            - The requested adjacency list file name
+        index_fn:
+            - The requested index list file name
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Are the edges directed?
+        nthread:
+            - Number of threads to use during conversion
+        dtype:
+            - The integer type of the vertex IDs in a raw file
+        tmpdir:
+            - Unused: the edges are relabelled in memory
+        reorder:
+            - Renumber the vertices to improve locality: "degree", "rcm" or
+                "community" (see `edge2graphyti`)
+        )pbdoc",
+                py::arg("edgelist"), py::arg("adj_fn"), py::arg("index_fn"),
+                py::arg("directed")=true, py::arg("nthread")=4,
+                py::arg("dtype")="int64", py::arg("tmpdir")="",
+                py::arg("reorder")="")
+        .def("array2compressed", &Format::array2compressed,
+        R"pbdoc(
+        Write an edge list held in integer arrays as a compressed adjacency
+        list. It holds the same lists as a graphyti adjacency list, with each
+        list's neighbors sorted and stored as varint coded gaps. That usually
+        takes 2-4x less space, more so once the vertices are reordered for
+        locality. It's only a storage format: graphs are decoded to
+        graphyti format to be opened (see `decompress` and
+        `Graph.open_compressed`), so traversals read the decoded lists and
+        do no less I/O.
+
+        Positional arguments:
+        --------------------
+        src:
+            - The source vertex ID of each edge
+        dst:
+            - The destination vertex ID of each edge
+        fn:
+            - The requested compressed adjacency list file name
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Are the edges directed?
+        num_vertices:
+            - The number of vertices, if there are isolated vertices after
+                the largest ID in the edges
+        )pbdoc",
+                py::arg("src"), py::arg("dst"), py::arg("fn"),
+                py::arg("directed")=true, py::arg("num_vertices")=0)
+        .def("compress", &Format::compress,
+        R"pbdoc(
+        Write a graph in graphyti format as a compressed adjacency list (see
+        `array2compressed`). The permutation of a reordered graph is copied
+        to `<fn>.perm`.
+
+        Positional arguments:
+        --------------------
+        adj_fn:
+            - The graph's adjacency list file name
+        index_fn:
+            - The graph's index file name
+        fn:
+            - The requested compressed adjacency list file name
+        )pbdoc",
+                py::arg("adj_fn"), py::arg("index_fn"), py::arg("fn"))
+        .def("decompress", &Format::decompress,
+        R"pbdoc(
+        Convert a compressed adjacency list back to graphyti format. The
+        lists are decoded one at a time and written out as they are, so only
+        a block of the compressed file, the index and one list are held in
+        memory.
+
+        Positional arguments:
+        --------------------
+        fn:
+            - The compressed adjacency list file name
+        adj_fn:
+            - The requested adjacency list file name
+        index_fn:
+            - The requested index list file name
+        )pbdoc",
+                py::arg("fn"), py::arg("adj_fn"), py::arg("index_fn"))
+        .def("ingest", &Format::ingest,
+        R"pbdoc(
+        Convert many edge list files, e.g. the parts of an export, to
+        graphyti format while keeping memory use under a budget. Files are
+        parsed concurrently and their edges spilled to disk as sorted runs.
+        The runs are merged and the merged edges written straight to the
+        adjacency list, so beyond the budget only the index (8 bytes per
+        vertex) and one adjacency list are held in memory.
+
+        Positional arguments:
+        --------------------
+        edgelists:
+            - A directory, glob pattern or file, or a list of them, holding
+                edge lists in plain text or compressed with gzip or zstd
+                (needs the `zstandard` package)
+        adj_fn:
+            - The requested adjacency list file name
+        index_fn:
+            - The requested index list file name
+
+        Optional arguments:
+        -------------------
+        directed:
+            - Are the edges directed?
+        nthread:
+            - Number of threads parsing files and converting
+        memory_budget:
+            - The memory used to buffer edges, e.g. "8G" or a number of bytes
+        tmpdir:
+            - The directory in which sorted runs are spilled. Each edge is
+                spilled twice, so it needs 16 bytes per edge, twice that
+                while runs are merged. Defaults to the system's temp dir
+        reorder:
+            - Renumber the vertices to improve locality: "degree", "rcm" or
+                "community" (see `edge2graphyti`). The edges are then read
+                back into memory to be relabelled
+        progress:
+            - Called about twice a second with a dict holding the `phase`
+                ("parse", "merge", "write", "reorder" or "done") and the
+                number of `files`, `files_done`, `bytes` and `edges` parsed,
+                sorted `runs` and edges `merged` so far. Raising an
+                exception cancels the ingestion
+        )pbdoc",
+                py::arg("edgelists"), py::arg("adj_fn"), py::arg("index_fn"),
+                py::arg("directed")=true, py::arg("nthread")=4,
+                py::arg("memory_budget")="1G", py::arg("tmpdir")="",
+                py::arg("reorder")="", py::arg("progress")=py::none())
         .def("load", &Format::load,
         R"pbdoc(
-        Convert edge list(s) to graphyti format and load into SAFS
+        Convert edge list(s) to graphyti format and load into SAFS. The
+        edge lists are converted with `ingest`, which writes the adjacency
+        list and index straight into SAFS. Edge lists compressed with gzip
+        (`.gz`) or zstd (`.zst`, needs the `zstandard` package) are
+        decompressed as they are read. Each load also writes a new generation
+        to `<name>.adj.gen`, which `Graph.fingerprint` uses to tell graphs
+        loaded under the same name apart.
 
         Positional arguments:
         --------------------
         edgelist:
-            - An edge list file for a graph in plain text
+            - An edge list file for a graph in plain text, or a directory or
+                glob pattern holding the graph's edge lists
+
+        Optional arguments:
+        -------------------
         directed:
             - Are the edges directed?
-        thread:
+        nthread:
             - Number of threads to use during conversion
+        tmpdir:
+            - The directory in which `ingest` spills sorted runs. A
+                reordered graph is also staged there before it's relabelled.
+                Defaults to the system's temp dir
+        reorder:
+            - Renumber the vertices to improve locality: "degree", "rcm" or
+                "community" (see `edge2graphyti`). The permutation is loaded
+                into SAFS as `<name>.adj.perm`
+        memory_budget:
+            - The memory budget of `ingest`. Defaults to "1G"
+        progress:
+            - Report the progress of `ingest` to this callback
+        catalog:
+            - Look the edge lists up in the catalog kept next to `root_conf`
+                by the hash of their content, `directed` and `reorder`. If
+                they were loaded before and their files are still in SAFS,
+                unchanged, those are returned without converting again. A
+                graph whose name holds another graph in SAFS is loaded as
+                `<name>-<hash>` instead of overwriting it. When False the
+                graph is always converted and loaded as `<name>`, and the
+                catalog forgets the graph that was loaded there
+
+        Returns:
+        --------
+        A 2-tuple with the SAFS names of the adjacency list and index files
         )pbdoc",
                 py::arg("edgelist"),
-                py::arg("directed")=true, py::arg("nthread")=4);
+                py::arg("directed")=true, py::arg("nthread")=4,
+                py::arg("tmpdir")="", py::arg("reorder")="",
+                py::arg("memory_budget")=py::none(),
+                py::arg("progress")=py::none(), py::arg("catalog")=true);
+
+        py::class_<gt::adj_writer>(m, "AdjWriter")
+            .def(py::init([](const std::string& adj_fn,
+                            const std::string& index_fn, bool directed,
+                            size_t num_vertices) {
+                        return new gt::adj_writer(false, adj_fn, index_fn,
+                                directed, num_vertices);
+                    }),
+        R"pbdoc(
+        Write a graph to the local file system one batch of adjacency lists
+        at a time, in vertex ID order: for a directed graph every in-edge
+        list, then every out-edge list. Vertices whose list is never added
+        get an empty one. Only the degrees and the current list are held in
+        memory. Files written by a writer that isn't finished are removed.
+
+        Positional arguments:
+        --------------------
+        adj_fn:
+            - The adjacency list file
+        index_fn:
+            - The index file
+        directed:
+            - Whether the graph is directed
+        num_vertices:
+            - The number of vertices in the graph
+        )pbdoc",
+                py::arg("adj_fn"), py::arg("index_fn"), py::arg("directed"),
+                py::arg("num_vertices"))
+            .def("add", &add_adj_edges,
+        R"pbdoc(
+        Add the edges (src[i], dst[i]) to the list of their `src` vertex.
+        Edges must come sorted by `src`, across calls as well, and each list
+        is written in the order its edges are added.
+
+        Positional arguments:
+        --------------------
+        src:
+            - The vertex whose list each edge is in
+        dst:
+            - The neighbor of each edge
+        )pbdoc",
+                py::arg("src"), py::arg("dst"))
+            .def("next_part", &gt::adj_writer::next_part,
+        R"pbdoc(
+        End the in-edge lists of a directed graph and start its out-edge
+        lists
+        )pbdoc")
+            .def("finish", &gt::adj_writer::finish,
+        R"pbdoc(
+        Write the header and the index
+
+        Returns:
+        --------
+        The number of edges in the graph
+        )pbdoc");
 
     // Versioning information
 #ifdef VERSION_INFO
@@ -0,0 +1,509 @@
+#ifndef __GRAPHYTI_INGEST_H__
+#define __GRAPHYTI_INGEST_H__
+
+/*
+ * Ingest many text edge list files under a memory budget. Worker threads
+ * parse whole files, each filling its share of the budget with edges that
+ * are sorted and spilled to disk as a run once it is full. The runs are then
+ * merged (in several passes if there are too many to merge at once) and the
+ * last merge streams the sorted edges straight into an `adj_writer`, so the
+ * edges are never all in memory at once.
+ *
+ * A directed graph's in-edge lists are written before its out-edge lists, so
+ * each of its edges is spilled twice: keyed on its destination for the
+ * in-edge lists and on its source for the out-edge lists. An undirected edge
+ * is in the lists of both of its vertices and is also spilled twice, once
+ * keyed on each end.
+ *
+ * Files are read through zlib so they may be gzip compressed. Blank lines and
+ * lines starting with '#' or '%' are skipped, IDs may be separated by spaces,
+ * tabs or commas and any further columns are ignored.
+ */
+
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+#include <zlib.h>
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <exception>
+#include <functional>
+#include <limits>
+#include <mutex>
+#include <queue>
+#include <stdexcept>
+#include <string>
+#include <thread>
+#include <utility>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "adjwriter.h"
+
+namespace gt {
+
+// Each run being merged gets a buffer of at least this many edges
+const size_t INGEST_MIN_BUF_EDGES = 8192;
+const size_t INGEST_READ_SIZE = 1 << 20;
+
+class run_file {
+    FILE *f;
+    std::string fn;
+
+    public:
+    run_file(const std::string &fn, const char *mode): fn(fn) {
+        f = fopen(fn.c_str(), mode);
+        if (f == NULL)
+            throw std::runtime_error("Unable to open '" + fn + "': " +
+                    strerror(errno));
+    }
+
+    ~run_file() {
+        fclose(f);
+    }
+
+    void write(const edge_t *edges, size_t num) {
+        if (num && fwrite(edges, sizeof(edge_t), num, f) != num)
+            throw std::runtime_error("Failed to write '" + fn + "': " +
+                    strerror(errno));
+    }
+
+    size_t read(edge_t *edges, size_t num) {
+        size_t ret = fread(edges, sizeof(edge_t), num, f);
+        if (ret < num && ferror(f))
+            throw std::runtime_error("Failed to read '" + fn + "': " +
+                    strerror(errno));
+        return ret;
+    }
+};
+
+// A buffered reader over one sorted run
+class run_reader {
+    run_file f;
+    std::vector<edge_t> buf;
+    size_t pos;
+    size_t len;
+
+    public:
+    run_reader(const std::string &fn, size_t buf_edges): f(fn, "rb"),
+        buf(buf_edges), pos(0), len(0) {
+    }
+
+    // False once the run is exhausted
+    bool next(edge_t &e) {
+        if (pos == len) {
+            len = f.read(buf.data(), buf.size());
+            pos = 0;
+            if (len == 0)
+                return false;
+        }
+        e = buf[pos++];
+        return true;
+    }
+};
+
+class edge_ingester {
+    // Receives the sorted edges of a merge
+    typedef std::function<void(const edge_t *, size_t)> sink_t;
+
+    std::vector<std::string> files;
+    std::string scratch;
+    bool directed;
+    size_t budget_edges;
+    int nthread;
+
+    std::thread coordinator;
+    std::atomic<size_t> next_file;
+    std::atomic<size_t> next_run;
+    std::atomic<bool> cancelled;
+    std::mutex lock;
+    std::condition_variable done;
+    bool finished;
+    std::exception_ptr error;
+    // The runs for the lists written first (a directed graph's in-edge
+    // lists, or every list of an undirected graph), then the out-edge lists
+    std::vector<std::string> runs[2];
+    size_t num_vertices;
+
+    std::atomic<size_t> files_done;
+    std::atomic<size_t> bytes;
+    std::atomic<size_t> edges;
+    std::atomic<size_t> merged;
+    std::atomic<int> phase;
+
+    std::string run_name(size_t id) const {
+        char name[32];
+        snprintf(name, sizeof(name), "/run-%08zu.bin", id);
+        return scratch + name;
+    }
+
+    void spill_run(std::vector<edge_t> &buf, int part) {
+        std::sort(buf.begin(), buf.end());
+        std::string fn = run_name(next_run++);
+        {
+            run_file f(fn, "wb");
+            f.write(buf.data(), buf.size());
+        }
+        std::lock_guard<std::mutex> guard(lock);
+        runs[part].push_back(fn);
+    }
+
+    // The buffer of an undirected graph already holds both copies of each
+    // edge. A directed graph's buffer is spilled for its out-edge lists,
+    // then flipped and spilled again for its in-edge lists.
+    void spill(std::vector<edge_t> &buf) {
+        if (buf.empty())
+            return;
+        if (directed) {
+            spill_run(buf, 1);
+            for (size_t i = 0; i < buf.size(); i++)
+                std::swap(buf[i].first, buf[i].second);
+        }
+        spill_run(buf, 0);
+        buf.clear();
+    }
+
+    void push(std::vector<edge_t> &buf, const edge_t &e) {
+        buf.push_back(e);
+        if (buf.size() == buf.capacity())
+            spill(buf);
+    }
+
+    static bool parse_id(const char *&p, const char *end, uint64_t &id) {
+        const uint64_t max_id = std::numeric_limits<fg::vertex_id_t>::max();
+        if (p == end || *p < '0' || *p > '9')
+            return false;
+        id = 0;
+        for (; p < end && *p >= '0' && *p <= '9'; p++) {
+            id = id * 10 + (*p - '0');
+            if (id >= max_id)
+                return false;
+        }
+        return true;
+    }
+
+    static bool is_sep(char c) {
+        return c == ' ' || c == '\t' || c == ',' || c == '\r';
+    }
+
+    // Returns whether the line held an edge
+    bool parse_line(const char *p, const char *end, const std::string &fn,
+            size_t lineno, std::vector<edge_t> &buf, uint64_t &num_ids) {
+        while (p < end && is_sep(*p))
+            p++;
+        if (p == end || *p == '#' || *p == '%')
+            return false;
+
+        uint64_t src, dst;
+        bool valid = parse_id(p, end, src);
+        if (valid) {
+            const char *start = p;
+            while (p < end && is_sep(*p))
+                p++;
+            valid = p > start && parse_id(p, end, dst) &&
+                (p == end || is_sep(*p));
+        }
+        if (!valid)
+            throw std::runtime_error("Invalid edge on line " +
+                    std::to_string(lineno) + " of '" + fn + "'");
+
+        push(buf, edge_t(src, dst));
+        if (!directed)
+            push(buf, edge_t(dst, src));
+        num_ids = std::max(num_ids, std::max(src, dst) + 1);
+        return true;
+    }
+
+    // Parse `fn` into `buf`, raising `num_ids` past every ID seen
+    void parse_file(const std::string &fn, std::vector<edge_t> &buf,
+            uint64_t &num_ids) {
+        gzFile f = gzopen(fn.c_str(), "rb");
+        if (f == NULL)
+            throw std::runtime_error("Unable to open '" + fn + "'");
+        std::vector<char> chunk(INGEST_READ_SIZE);
+        std::string partial;
+        size_t lineno = 0;
+
+        try {
+            int len = 0;
+            while (!cancelled && (len = gzread(f, chunk.data(),
+                            chunk.size())) > 0) {
+                bytes += len;
+                size_t nedges = 0;
+                const char *p = chunk.data();
+                const char *end = p + len;
+                while (p < end) {
+                    const char *eol = (const char *) memchr(p, '\n', end - p);
+                    if (eol == NULL) {
+                        partial.append(p, end);
+                        break;
+                    }
+                    lineno++;
+                    if (partial.empty()) {
+                        nedges += parse_line(p, eol, fn, lineno, buf,
+                                num_ids);
+                    } else {
+                        partial.append(p, eol);
+                        nedges += parse_line(partial.data(),
+                                partial.data() + partial.size(), fn, lineno,
+                                buf, num_ids);
+                        partial.clear();
+                    }
+                    p = eol + 1;
+                }
+                edges += nedges;
+            }
+            if (len < 0) {
+                int errnum;
+                throw std::runtime_error("Failed to read '" + fn + "': " +
+                        gzerror(f, &errnum));
+            }
+            if (!partial.empty())
+                edges += parse_line(partial.data(),
+                        partial.data() + partial.size(), fn, lineno + 1, buf,
+                        num_ids);
+        } catch (...) {
+            gzclose(f);
+            throw;
+        }
+        gzclose(f);
+    }
+
+    void work(size_t buf_edges) {
+        try {
+            std::vector<edge_t> buf;
+            buf.reserve(buf_edges);
+            uint64_t num_ids = 0;
+            size_t i;
+            while (!cancelled && (i = next_file++) < files.size()) {
+                parse_file(files[i], buf, num_ids);
+                files_done++;
+            }
+            spill(buf);
+
+            std::lock_guard<std::mutex> guard(lock);
+            num_vertices = std::max<size_t>(num_vertices, num_ids);
+        } catch (...) {
+            fail();
+        }
+    }
+
+    void parse() {
+        // Each worker parses into its share of the budget
+        size_t buf_edges = std::max<size_t>(budget_edges / nthread,
+                INGEST_MIN_BUF_EDGES);
+        std::vector<std::thread> workers;
+        for (int i = 0; i < nthread; i++)
+            workers.push_back(std::thread(&edge_ingester::work, this,
+                        buf_edges));
+        for (size_t i = 0; i < workers.size(); i++)
+            workers[i].join();
+    }
+
+    void run(std::string adj_fn, std::string index_fn, bool safs) {
+        try {
+            parse();
+            if (!cancelled && edges == 0)
+                throw std::runtime_error("No edges found in the edge lists");
+            if (!cancelled) {
+                phase = MERGE;
+                adj_writer writer(safs, adj_fn, index_fn, directed,
+                        num_vertices);
+                merge_all(writer);
+            }
+        } catch (...) {
+            fail();
+        }
+
+        std::lock_guard<std::mutex> guard(lock);
+        if (!cancelled)
+            phase = DONE;
+        finished = true;
+        done.notify_all();
+    }
+
+    // Keep the first error and stop every thread
+    void fail() {
+        std::lock_guard<std::mutex> guard(lock);
+        if (!error)
+            error = std::current_exception();
+        cancelled = true;
+    }
+
+    // Merge `inputs` into `sink`, deleting the inputs
+    void merge(const std::vector<std::string> &inputs, sink_t sink,
+            size_t buf_edges) {
+        std::vector<run_reader *> readers;
+        typedef std::pair<edge_t, size_t> head_t;
+        std::priority_queue<head_t, std::vector<head_t>,
+            std::greater<head_t> > heads;
+        try {
+            for (size_t i = 0; i < inputs.size(); i++) {
+                readers.push_back(new run_reader(inputs[i], buf_edges));
+                edge_t e;
+                if (readers[i]->next(e))
+                    heads.push(head_t(e, i));
+            }
+
+            std::vector<edge_t> buf;
+            buf.reserve(buf_edges);
+            while (!heads.empty() && !cancelled) {
+                head_t head = heads.top();
+                heads.pop();
+                buf.push_back(head.first);
+                if (buf.size() == buf_edges) {
+                    sink(buf.data(), buf.size());
+                    merged += buf.size();
+                    buf.clear();
+                }
+                edge_t e;
+                if (readers[head.second]->next(e))
+                    heads.push(head_t(e, head.second));
+            }
+            sink(buf.data(), buf.size());
+            merged += buf.size();
+        } catch (...) {
+            for (size_t i = 0; i < readers.size(); i++)
+                delete readers[i];
+            throw;
+        }
+        for (size_t i = 0; i < readers.size(); i++)
+            delete readers[i];
+        for (size_t i = 0; i < inputs.size(); i++)
+            remove(inputs[i].c_str());
+    }
+
+    // Merge the runs of `part` into its lists in `writer`
+    void merge_part(int part, adj_writer &writer) {
+        // Merge as many runs at once as the budget can buffer, plus the output
+        size_t fan_in = std::max<size_t>(2,
+                budget_edges / INGEST_MIN_BUF_EDGES - 1);
+        std::vector<std::string> level;
+        {
+            std::lock_guard<std::mutex> guard(lock);
+            level.swap(runs[part]);
+            std::sort(level.begin(), level.end());
+        }
+        while (level.size() > fan_in && !cancelled) {
+            std::vector<std::string> next;
+            for (size_t i = 0; i < level.size(); i += fan_in) {
+                std::vector<std::string> group(level.begin() + i,
+                        level.begin() + std::min(level.size(), i + fan_in));
+                std::string fn = run_name(next_run++);
+                run_file out(fn, "wb");
+                merge(group, [&out](const edge_t *edges, size_t num) {
+                            out.write(edges, num);
+                        }, budget_edges / (group.size() + 1));
+                next.push_back(fn);
+            }
+            level.swap(next);
+            merged = 0;
+        }
+        if (cancelled)
+            return;
+
+        phase = WRITE;
+        merge(level, [&writer](const edge_t *edges, size_t num) {
+                    writer.add(edges, num);
+                }, budget_edges / (level.size() + 1));
+        merged = 0;
+    }
+
+    void merge_all(adj_writer &writer) {
+        merge_part(0, writer);
+        if (directed && !cancelled) {
+            phase = MERGE;
+            writer.next_part();
+            merge_part(1, writer);
+        }
+        if (!cancelled)
+            writer.finish();
+    }
+
+    public:
+    enum {
+        PARSE,
+        MERGE,
+        WRITE,
+        DONE,
+    };
+
+    edge_ingester(const std::vector<std::string> &files,
+            const std::string &scratch, bool directed, size_t memory_budget,
+            int nthread): files(files), scratch(scratch), directed(directed),
+        nthread(std::max(1, nthread)), next_file(0), next_run(0),
+        cancelled(false), finished(false), num_vertices(0), files_done(0),
+        bytes(0), edges(0), merged(0), phase(PARSE) {
+        budget_edges = std::max(memory_budget / sizeof(edge_t),
+                INGEST_MIN_BUF_EDGES * 4);
+    }
+
+    ~edge_ingester() {
+        cancel();
+        if (coordinator.joinable())
+            coordinator.join();
+    }
+
+    // Parse the files and write the graph to `adj_fn` and `index_fn`, in
+    // SAFS if `safs`, in the background
+    void start(const std::string &adj_fn, const std::string &index_fn,
+            bool safs=false) {
+        coordinator = std::thread(&edge_ingester::run, this, adj_fn,
+                index_fn, safs);
+    }
+
+    // Wait up to `timeout` for the ingestion to finish
+    bool wait(std::chrono::milliseconds timeout) {
+        std::unique_lock<std::mutex> guard(lock);
+        return done.wait_for(guard, timeout, [this] { return finished; });
+    }
+
+    // Wait for the ingestion to finish and rethrow any error it hit
+    void finish() {
+        if (coordinator.joinable())
+            coordinator.join();
+        if (error)
+            std::rethrow_exception(error);
+        if (cancelled)
+            throw std::runtime_error("Edge list ingestion was cancelled");
+    }
+
+    void cancel() {
+        cancelled = true;
+    }
+
+    int get_phase() const {
+        return phase;
+    }
+
+    size_t get_num_files() const {
+        return files.size();
+    }
+
+    size_t get_files_done() const {
+        return files_done;
+    }
+
+    size_t get_bytes() const {
+        return bytes;
+    }
+
+    size_t get_edges() const {
+        return edges;
+    }
+
+    size_t get_num_runs() const {
+        return next_run;
+    }
+
+    size_t get_merged() const {
+        return merged;
+    }
+};
+}
+
+#endif
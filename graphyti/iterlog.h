@@ -0,0 +1,92 @@
+#ifndef __GRAPHYTI_ITERLOG_H__
+#define __GRAPHYTI_ITERLOG_H__
+
+/*
+ * Per-iteration statistics of the vertex programs that live in this repo.
+ * The vertex program of each worker thread counts the vertices it runs and
+ * adds them to the log when the iteration ends. The log is also how a run is
+ * told to stop early: once `stop` is called the vertices stop doing any work,
+ * so the engine runs out of active vertices and ends.
+ */
+
+#include <sys/time.h>
+
+#include <algorithm>
+#include <atomic>
+#include <mutex>
+#include <vector>
+
+namespace gt {
+
+class iteration_log {
+    mutable std::mutex lock;
+    std::atomic<bool> stopping;
+    struct timeval start;
+    // Iterations of earlier engine runs, e.g. previous BFS batches
+    size_t offset;
+    std::vector<size_t> active;
+    // When each iteration ended, in seconds since the log was created
+    std::vector<double> ends;
+
+    double now() const {
+        struct timeval tv;
+        gettimeofday(&tv, NULL);
+        return (tv.tv_sec - start.tv_sec) +
+            (tv.tv_usec - start.tv_usec) / 1000000.0;
+    }
+
+    public:
+    iteration_log() {
+        gettimeofday(&start, NULL);
+        offset = 0;
+        stopping = false;
+    }
+
+    // Called by every worker thread at the end of iteration `iter`
+    void add(int iter, size_t nactive) {
+        double t = now();
+        std::lock_guard<std::mutex> guard(lock);
+        size_t i = offset + iter;
+        if (i >= active.size()) {
+            active.resize(i + 1, 0);
+            ends.resize(i + 1, 0);
+        }
+        active[i] += nactive;
+        ends[i] = std::max(ends[i], t);
+    }
+
+    // Log the iterations of the next engine run after the current ones
+    void next_run() {
+        std::lock_guard<std::mutex> guard(lock);
+        offset = active.size();
+    }
+
+    // Stop the engine runs that log here after the iteration they're in.
+    // It may be called from any thread.
+    void stop() {
+        stopping = true;
+    }
+
+    bool stopped() const {
+        return stopping.load(std::memory_order_relaxed);
+    }
+
+    // The accessors may be called while worker threads add iterations
+    size_t size() const {
+        std::lock_guard<std::mutex> guard(lock);
+        return active.size();
+    }
+
+    size_t get_active(size_t i) const {
+        std::lock_guard<std::mutex> guard(lock);
+        return active[i];
+    }
+
+    double get_seconds(size_t i) const {
+        std::lock_guard<std::mutex> guard(lock);
+        return ends[i] - (i == 0 ? 0 : ends[i - 1]);
+    }
+};
+}
+
+#endif
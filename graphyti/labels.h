@@ -0,0 +1,352 @@
+#ifndef __GRAPHYTI_LABELS_H__
+#define __GRAPHYTI_LABELS_H__
+
+/*
+ * Coreness and connected components with checkpoints.
+ *
+ * Both give every vertex a label that only ever drops until it settles. A
+ * component label is the smallest vertex ID connected to the vertex. A
+ * coreness label starts out unbounded and drops to the h-index of the
+ * neighbors' labels: the largest h such that h neighbors have a label of at
+ * least h. Edge direction is disregarded and a neighbor counts once per
+ * edge.
+ *
+ * In each iteration every active vertex reads its adjacency list and
+ * recomputes its label from its neighbors' labels; a vertex whose label drops
+ * activates its neighbors for the next iteration. The labels and the active
+ * vertices are the whole state between iterations, so a checkpoint holds just
+ * those two arrays.
+ */
+
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+#include <unistd.h>
+
+#include <algorithm>
+#include <atomic>
+#include <limits>
+#include <memory>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+namespace gt {
+
+enum label_rule {
+    // The smallest vertex ID in the component
+    MIN_LABEL,
+    // The coreness
+    H_INDEX,
+};
+
+// The labels and active vertices shared by all worker threads
+struct label_state {
+    label_rule rule;
+    bool directed;
+    size_t num_vertices;
+    std::unique_ptr<std::atomic<uint32_t>[]> labels;
+    // The vertices to recompute in the next iteration
+    std::unique_ptr<std::atomic<bool>[]> active;
+
+    label_state(label_rule rule, bool directed, size_t num_vertices):
+            labels(new std::atomic<uint32_t>[num_vertices]),
+            active(new std::atomic<bool>[num_vertices]) {
+        this->rule = rule;
+        this->directed = directed;
+        this->num_vertices = num_vertices;
+        for (size_t i = 0; i < num_vertices; i++) {
+            labels[i].store(rule == MIN_LABEL ? i :
+                    std::numeric_limits<uint32_t>::max(),
+                    std::memory_order_relaxed);
+            active[i].store(true, std::memory_order_relaxed);
+        }
+    }
+
+    uint32_t get(fg::vertex_id_t id) const {
+        return labels[id].load(std::memory_order_relaxed);
+    }
+};
+
+class label_vertex: public fg::compute_directed_vertex {
+    public:
+    label_vertex(fg::vertex_id_t id): fg::compute_directed_vertex(id) {
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+    }
+};
+
+class label_vertex_program: public fg::vertex_program_impl<label_vertex> {
+    label_state *state;
+    std::vector<fg::vertex_id_t> neighbors;
+    // The number of neighbors with each label, for the h-index
+    std::vector<size_t> counts;
+
+    void add(const fg::page_vertex &vertex, fg::edge_type type) {
+        size_t num_edges = vertex.get_num_edges(type);
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(type, 0,
+                num_edges);
+        while (it.has_next())
+            neighbors.push_back(it.next());
+    }
+
+    uint32_t min_label(uint32_t label) const {
+        for (size_t i = 0; i < neighbors.size(); i++)
+            label = std::min(label, state->get(neighbors[i]));
+        return label;
+    }
+
+    uint32_t h_index(uint32_t label) {
+        size_t cap = std::min<size_t>(label, neighbors.size());
+        counts.assign(cap + 1, 0);
+        for (size_t i = 0; i < neighbors.size(); i++)
+            counts[std::min<size_t>(state->get(neighbors[i]), cap)]++;
+        size_t at_least = 0;
+        for (size_t h = cap; h > 0; h--) {
+            at_least += counts[h];
+            if (at_least >= h)
+                return h;
+        }
+        return 0;
+    }
+
+    public:
+    label_vertex_program(label_state *state) {
+        this->state = state;
+    }
+
+    void request(fg::compute_directed_vertex &v, fg::vertex_id_t id) {
+        if (state->directed) {
+            fg::directed_vertex_request req(id, fg::BOTH_EDGES);
+            v.request_partial_vertices(&req, 1);
+        } else {
+            v.request_vertices(&id, 1);
+        }
+    }
+
+    void update(fg::vertex_id_t id, const fg::page_vertex &vertex) {
+        neighbors.clear();
+        add(vertex, fg::OUT_EDGE);
+        if (state->directed)
+            add(vertex, fg::IN_EDGE);
+
+        uint32_t label = state->get(id);
+        uint32_t next = state->rule == MIN_LABEL ? min_label(label) :
+            h_index(label);
+        if (next >= label)
+            return;
+        // Only the vertex itself lowers its label
+        state->labels[id].store(next, std::memory_order_relaxed);
+        for (size_t i = 0; i < neighbors.size(); i++)
+            state->active[neighbors[i]].store(true,
+                    std::memory_order_relaxed);
+    }
+};
+
+class label_vertex_program_creater: public fg::vertex_program_creater {
+    label_state *state;
+
+    public:
+    label_vertex_program_creater(label_state *state) {
+        this->state = state;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(new label_vertex_program(state));
+    }
+};
+
+inline void label_vertex::run(fg::vertex_program &prog) {
+    ((label_vertex_program &) prog).request(*this,
+            prog.get_vertex_id(*this));
+}
+
+inline void label_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    ((label_vertex_program &) prog).update(vertex.get_id(), vertex);
+}
+
+// Where and how often iterate_labels saves its state
+struct label_checkpoint {
+    // The checkpoint file, or empty for none
+    std::string path;
+    // Iterations between checkpoints
+    int interval;
+    // Start from the state in `path` if there is one
+    bool resume;
+
+    label_checkpoint(): interval(0), resume(false) {
+    }
+};
+
+// The header of a checkpoint file, which the label of every vertex follows
+// as a uint32 and then whether it's active as a byte
+struct label_checkpoint_header {
+    char magic[8];
+    uint64_t num_vertices;
+    // The iterations run so far
+    uint64_t iterations;
+    uint32_t rule;
+};
+
+static const char LABEL_CHECKPOINT_MAGIC[8] = {'G', 'T', 'L', 'B', 'C', 'K',
+    'P', '1'};
+
+static inline void throw_label_io_error(const std::string &action,
+        const std::string &path) {
+    throw std::runtime_error("Can't " + action + " checkpoint '" + path +
+            "': " + strerror(errno));
+}
+
+/*
+ * Write `state` to `ckpt.path`. The file is replaced atomically, so a crash
+ * leaves the previous checkpoint.
+ */
+static inline void save_label_checkpoint(const label_checkpoint &ckpt,
+        const label_state &state, size_t iterations) {
+    label_checkpoint_header header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, LABEL_CHECKPOINT_MAGIC, sizeof(header.magic));
+    header.num_vertices = state.num_vertices;
+    header.iterations = iterations;
+    header.rule = state.rule;
+
+    size_t num_vertices = state.num_vertices;
+    std::vector<uint32_t> labels(num_vertices);
+    std::vector<uint8_t> active(num_vertices);
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++) {
+        labels[i] = state.get(i);
+        active[i] = state.active[i].load(std::memory_order_relaxed);
+    }
+
+    std::string tmp = ckpt.path + ".tmp";
+    FILE *f = fopen(tmp.c_str(), "wb");
+    if (f == NULL)
+        throw_label_io_error("write", tmp);
+    bool ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+        fwrite(labels.data(), sizeof(uint32_t), num_vertices, f) ==
+        num_vertices &&
+        fwrite(active.data(), sizeof(uint8_t), num_vertices, f) ==
+        num_vertices && fflush(f) == 0 && fsync(fileno(f)) == 0;
+    int err = errno;
+    fclose(f);
+    errno = err;
+    if (!ok)
+        throw_label_io_error("write", tmp);
+    if (rename(tmp.c_str(), ckpt.path.c_str()) < 0)
+        throw_label_io_error("write", ckpt.path);
+}
+
+/*
+ * Load `state` from `ckpt.path` and return the iterations run before it was
+ * saved, or -1 if there's no checkpoint
+ */
+static inline long load_label_checkpoint(const label_checkpoint &ckpt,
+        label_state &state) {
+    FILE *f = fopen(ckpt.path.c_str(), "rb");
+    if (f == NULL) {
+        if (errno == ENOENT)
+            return -1;
+        throw_label_io_error("read", ckpt.path);
+    }
+
+    size_t num_vertices = state.num_vertices;
+    label_checkpoint_header header;
+    std::vector<uint32_t> labels(num_vertices);
+    std::vector<uint8_t> active(num_vertices);
+    bool ok = fread(&header, sizeof(header), 1, f) == 1 &&
+        memcmp(header.magic, LABEL_CHECKPOINT_MAGIC,
+                sizeof(header.magic)) == 0 &&
+        header.num_vertices == num_vertices && header.rule == state.rule &&
+        fread(labels.data(), sizeof(uint32_t), num_vertices, f) ==
+        num_vertices &&
+        fread(active.data(), sizeof(uint8_t), num_vertices, f) ==
+        num_vertices;
+    fclose(f);
+    if (!ok)
+        throw std::runtime_error("'" + ckpt.path + "' isn't a checkpoint " +
+                "of this algorithm on this graph");
+
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++) {
+        state.labels[i].store(labels[i], std::memory_order_relaxed);
+        state.active[i].store(active[i] != 0, std::memory_order_relaxed);
+    }
+    return header.iterations;
+}
+
+/*
+ * Lower the label of every vertex by `rule` until none changes. `labels`
+ * receives the label of every vertex.
+ *
+ * With a `ckpt` path the state is saved every `ckpt.interval` iterations. A
+ * resumed run continues from the saved state.
+ */
+template <typename T>
+inline void iterate_labels(fg::FG_graph::ptr fg, label_rule rule, T *labels,
+        const label_checkpoint &ckpt = label_checkpoint()) {
+    const fg::graph_header &header = fg->get_graph_header();
+    size_t num_vertices = header.get_num_vertices();
+    label_state state(rule, header.is_directed_graph(), num_vertices);
+
+    long done = -1;
+    if (!ckpt.path.empty() && ckpt.resume)
+        done = load_label_checkpoint(ckpt, state);
+
+    fg::graph_index::ptr index =
+        fg::NUMA_graph_index<label_vertex>::create(header);
+    fg::graph_engine::ptr graph = fg->create_engine(index);
+
+    if (done < 0) {
+        done = 0;
+        // The engine doesn't run vertices without edges. FlashGraph doesn't
+        // label their components.
+        for (size_t i = 0; i < num_vertices; i++) {
+            if (graph->get_num_edges(i) > 0)
+                continue;
+            state.labels[i].store(rule == MIN_LABEL ?
+                    std::numeric_limits<uint32_t>::max() : 0,
+                    std::memory_order_relaxed);
+            state.active[i].store(false, std::memory_order_relaxed);
+        }
+    }
+
+    std::vector<fg::vertex_id_t> starts;
+    while (true) {
+        starts.clear();
+        for (size_t i = 0; i < num_vertices; i++)
+            if (state.active[i].exchange(false, std::memory_order_relaxed))
+                starts.push_back(i);
+        if (starts.empty())
+            break;
+
+        // The vertices activate none themselves, so the engine stops after
+        // one iteration
+        graph->start(starts.data(), starts.size(),
+                fg::vertex_initializer::ptr(),
+                fg::vertex_program_creater::ptr(
+                    new label_vertex_program_creater(&state)));
+        graph->wait4complete();
+        done++;
+        if (!ckpt.path.empty() && ckpt.interval > 0 &&
+                done % ckpt.interval == 0)
+            save_label_checkpoint(ckpt, state, done);
+    }
+
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++)
+        labels[i] = state.get(i);
+}
+}
+
+#endif
@@ -0,0 +1,99 @@
+#ifndef __GRAPHYTI_MMAP_GRAPH_H__
+#define __GRAPHYTI_MMAP_GRAPH_H__
+
+/*
+ * Open a graph on the local file system for in-memory computation by mapping
+ * its adjacency list read-only instead of reading it into the heap. Every
+ * process that maps the same file shares its pages in the page cache, and
+ * the graph is only read as vertices are touched.
+ */
+
+#include <errno.h>
+#include <fcntl.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <memory>
+#include <stdexcept>
+#include <string>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/in_mem_storage.h"
+#include "src/flash-graph/vertex_index.h"
+
+namespace gt {
+
+struct mmap_options {
+    // Fault the whole file in when it's mapped rather than as it's read
+    bool populate;
+    // Ask for transparent huge pages. This needs a kernel that supports them
+    // for file mappings and is ignored otherwise.
+    bool hugepages;
+
+    mmap_options(bool populate, bool hugepages): populate(populate),
+        hugepages(hugepages) {
+    }
+};
+
+// Map `fn` read-only. The memory is unmapped when the last reference to it
+// goes.
+inline std::shared_ptr<char> map_file(const std::string& fn,
+        const mmap_options& opts, size_t& size) {
+    int fd = open(fn.c_str(), O_RDONLY);
+    if (fd < 0)
+        throw std::runtime_error("Can't open '" + fn + "': " +
+                strerror(errno));
+
+    struct stat st;
+    if (fstat(fd, &st) < 0) {
+        int err = errno;
+        close(fd);
+        throw std::runtime_error("Can't stat '" + fn + "': " + strerror(err));
+    }
+    size = st.st_size;
+    if (size == 0) {
+        close(fd);
+        throw std::runtime_error("'" + fn + "' is empty");
+    }
+
+    int flags = MAP_SHARED;
+    if (opts.populate)
+        flags |= MAP_POPULATE;
+    void* addr = mmap(NULL, size, PROT_READ, flags, fd, 0);
+    int err = errno;
+    // The mapping keeps the file open
+    close(fd);
+    if (addr == MAP_FAILED)
+        throw std::runtime_error("Can't map '" + fn + "': " + strerror(err));
+
+#ifdef MADV_HUGEPAGE
+    if (opts.hugepages)
+        madvise(addr, size, MADV_HUGEPAGE);
+#endif
+
+    size_t len = size;
+    return std::shared_ptr<char>((char*) addr, [len](char* p) {
+            munmap(p, len);
+            });
+}
+
+/*
+ * Open the graph in `graph_file` and `index_file` with its adjacency list
+ * mapped. The index is read as usual: it's a small fraction of the graph and
+ * FlashGraph keeps its own in-memory form of it.
+ */
+inline fg::FG_graph::ptr map_graph(const std::string& graph_file,
+        const std::string& index_file, config_map::ptr configs,
+        const mmap_options& opts) {
+    size_t size;
+    std::shared_ptr<char> data = map_file(graph_file, opts, size);
+    fg::in_mem_graph::ptr graph = fg::in_mem_graph::create(graph_file, data,
+            size);
+    fg::vertex_index::ptr index = fg::vertex_index::load(index_file);
+    return fg::FG_graph::create(graph, index, graph_file, configs);
+}
+}
+
+#endif
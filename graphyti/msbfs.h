@@ -0,0 +1,310 @@
+#ifndef __GRAPHYTI_MSBFS_H__
+#define __GRAPHYTI_MSBFS_H__
+
+/*
+ * Multi-source BFS with bit-parallel frontiers.
+ *
+ * Every vertex keeps one bit per source, so a single traversal serves up to
+ * MSBFS_WIDTH sources: a vertex's adjacency list is read once per level no
+ * matter how many of the searches reach it in that level.
+ */
+
+#include <stdint.h>
+
+#include <algorithm>
+#include <limits>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+#include "iterlog.h"
+
+namespace gt {
+
+typedef uint64_t source_mask_t;
+
+// The number of sources served by one traversal
+const size_t MSBFS_WIDTH = 64;
+// The hop distance of a vertex a source can't reach
+const uint16_t MSBFS_UNREACHED = std::numeric_limits<uint16_t>::max();
+
+// Running sums of the hop distances from the sources to each vertex, for
+// estimates that don't need every distance
+struct distance_sums {
+    std::vector<double> sum;
+    std::vector<double> sumsq;
+    // The number of sources other than itself that reached each vertex
+    std::vector<uint32_t> count;
+
+    distance_sums(size_t num_vertices): sum(num_vertices),
+        sumsq(num_vertices), count(num_vertices) {
+    }
+};
+
+class msbfs_message: public fg::vertex_message {
+    source_mask_t sources;
+    int level;
+
+    public:
+    msbfs_message(source_mask_t sources, int level):
+        fg::vertex_message(sizeof(msbfs_message), true) {
+        this->sources = sources;
+        this->level = level;
+    }
+
+    source_mask_t get_sources() const {
+        return sources;
+    }
+
+    int get_level() const {
+        return level;
+    }
+};
+
+class msbfs_vertex: public fg::compute_vertex {
+    source_mask_t visited;
+    // The sources reaching this vertex in the next levels, indexed by level
+    // parity. A message may arrive before or after the vertex runs in the
+    // current level, so keeping the levels apart stops a vertex from
+    // expanding a source one level early.
+    source_mask_t reached[2];
+    // The sources that reached this vertex in the current level
+    source_mask_t frontier;
+
+    public:
+    msbfs_vertex(fg::vertex_id_t id): fg::compute_vertex(id) {
+        visited = 0;
+        reached[0] = reached[1] = 0;
+        frontier = 0;
+    }
+
+    void seed(source_mask_t sources) {
+        reached[0] |= sources;
+    }
+
+    source_mask_t get_visited() const {
+        return visited;
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+        const msbfs_message &m = (const msbfs_message &) msg;
+        reached[m.get_level() % 2] |= m.get_sources() & ~visited;
+    }
+};
+
+class msbfs_vertex_program: public fg::vertex_program_impl<msbfs_vertex> {
+    fg::edge_type etype;
+    size_t num_vertices;
+    // One row of hop distances per source, or NULL
+    uint16_t *dists;
+    distance_sums *sums;
+    iteration_log *log;
+    // The vertices this thread expanded in the current level
+    size_t nactive;
+
+    public:
+    msbfs_vertex_program(fg::edge_type etype, size_t num_vertices,
+            uint16_t *dists, distance_sums *sums, iteration_log *log) {
+        this->etype = etype;
+        this->num_vertices = num_vertices;
+        this->dists = dists;
+        this->sums = sums;
+        this->log = log;
+        this->nactive = 0;
+    }
+
+    fg::edge_type get_edge_type() const {
+        return etype;
+    }
+
+    bool is_stopped() const {
+        return log && log->stopped();
+    }
+
+    void run_on_iteration_end() {
+        if (log)
+            log->add(get_graph().get_curr_level(), nactive);
+        nactive = 0;
+    }
+
+    // Every vertex only writes its own column, so no locking is needed
+    void record(fg::vertex_id_t id, source_mask_t sources, int level) {
+        nactive++;
+        if (sums && level > 0) {
+            int num = __builtin_popcountll(sources);
+            sums->sum[id] += (double) level * num;
+            sums->sumsq[id] += (double) level * level * num;
+            sums->count[id] += num;
+        }
+        if (dists == NULL)
+            return;
+
+        uint16_t hops = (uint16_t) std::min<int>(level, MSBFS_UNREACHED - 1);
+        while (sources) {
+            size_t src = __builtin_ctzll(sources);
+            dists[src * num_vertices + id] = hops;
+            sources &= sources - 1;
+        }
+    }
+};
+
+class msbfs_vertex_program_creater: public fg::vertex_program_creater {
+    fg::edge_type etype;
+    size_t num_vertices;
+    uint16_t *dists;
+    distance_sums *sums;
+    iteration_log *log;
+
+    public:
+    msbfs_vertex_program_creater(fg::edge_type etype, size_t num_vertices,
+            uint16_t *dists, distance_sums *sums, iteration_log *log) {
+        this->etype = etype;
+        this->num_vertices = num_vertices;
+        this->dists = dists;
+        this->sums = sums;
+        this->log = log;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(new msbfs_vertex_program(etype,
+                    num_vertices, dists, sums, log));
+    }
+};
+
+inline void msbfs_vertex::run(fg::vertex_program &prog) {
+    if (((msbfs_vertex_program &) prog).is_stopped())
+        return;
+
+    int level = prog.get_graph().get_curr_level();
+    frontier = reached[level % 2] & ~visited;
+    reached[level % 2] = 0;
+    if (frontier == 0)
+        return;
+
+    visited |= frontier;
+    fg::vertex_id_t id = prog.get_vertex_id(*this);
+    ((msbfs_vertex_program &) prog).record(id, frontier, level);
+    request_vertices(&id, 1);
+}
+
+inline void msbfs_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    fg::edge_type etype = ((msbfs_vertex_program &) prog).get_edge_type();
+    msbfs_message msg(frontier, prog.get_graph().get_curr_level() + 1);
+
+    if (etype == fg::BOTH_EDGES) {
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(fg::IN_EDGE, 0,
+                vertex.get_num_edges(fg::IN_EDGE));
+        prog.multicast_msg(it, msg);
+        it = vertex.get_neigh_seq_it(fg::OUT_EDGE, 0,
+                vertex.get_num_edges(fg::OUT_EDGE));
+        prog.multicast_msg(it, msg);
+    } else {
+        fg::edge_seq_iterator it = vertex.get_neigh_seq_it(etype, 0,
+                vertex.get_num_edges(etype));
+        prog.multicast_msg(it, msg);
+    }
+}
+
+// Count the vertices each source of a traversal reached
+class msbfs_count_query: public fg::vertex_query {
+    size_t counts[MSBFS_WIDTH];
+
+    public:
+    msbfs_count_query() {
+        std::fill(counts, counts + MSBFS_WIDTH, 0);
+    }
+
+    size_t get_count(size_t src) const {
+        return counts[src];
+    }
+
+    virtual void run(fg::graph_engine &graph, fg::compute_vertex &v) {
+        source_mask_t visited = ((msbfs_vertex &) v).get_visited();
+        while (visited) {
+            counts[__builtin_ctzll(visited)]++;
+            visited &= visited - 1;
+        }
+    }
+
+    virtual void merge(fg::graph_engine &graph, fg::vertex_query::ptr q) {
+        msbfs_count_query *other = (msbfs_count_query *) q.get();
+        for (size_t i = 0; i < MSBFS_WIDTH; i++)
+            counts[i] += other->counts[i];
+    }
+
+    virtual fg::vertex_query::ptr clone() {
+        return fg::vertex_query::ptr(new msbfs_count_query());
+    }
+};
+
+/*
+ * Run a BFS from every vertex in `sources`, MSBFS_WIDTH sources per
+ * traversal. `counts[i]` receives the number of vertices reached from
+ * `sources[i]`. If `dists` isn't NULL it must point to a
+ * (sources.size() x num_vertices) matrix filled with MSBFS_UNREACHED; row i
+ * receives the hop distance of every vertex from `sources[i]`. If `log`
+ * isn't NULL the levels of every traversal are added to it in turn, and
+ * stopping it ends the search after the current level: the sources of
+ * traversals that didn't start are left alone. If `sums` isn't NULL the
+ * distances to each vertex are added to it.
+ */
+inline void multi_source_bfs(fg::FG_graph::ptr fg,
+        const std::vector<fg::vertex_id_t> &sources, fg::edge_type etype,
+        size_t *counts, uint16_t *dists, iteration_log *log = NULL,
+        distance_sums *sums = NULL) {
+    const fg::graph_header &header = fg->get_graph_header();
+    size_t num_vertices = header.get_num_vertices();
+    if (!header.is_directed_graph())
+        etype = fg::OUT_EDGE;
+
+    for (size_t i = 0; i < sources.size(); i++)
+        if (sources[i] >= num_vertices)
+            throw std::out_of_range("Source vertex " +
+                    std::to_string(sources[i]) + " isn't in the graph");
+
+    for (size_t first = 0; first < sources.size(); first += MSBFS_WIDTH) {
+        if (log && log->stopped())
+            break;
+        size_t num = std::min(MSBFS_WIDTH, sources.size() - first);
+
+        fg::graph_index::ptr index =
+            fg::NUMA_graph_index<msbfs_vertex>::create(header);
+        fg::graph_engine::ptr graph = fg->create_engine(index);
+
+        std::vector<fg::vertex_id_t> starts(sources.begin() + first,
+                sources.begin() + first + num);
+        for (size_t i = 0; i < num; i++)
+            ((msbfs_vertex &) graph->get_vertex(starts[i])).seed(
+                    ((source_mask_t) 1) << i);
+        // The same vertex may be the source of several searches
+        std::sort(starts.begin(), starts.end());
+        starts.erase(std::unique(starts.begin(), starts.end()), starts.end());
+
+        graph->start(starts.data(), starts.size(),
+                fg::vertex_initializer::ptr(),
+                fg::vertex_program_creater::ptr(
+                    new msbfs_vertex_program_creater(etype, num_vertices,
+                        dists == NULL ? NULL : dists + first * num_vertices,
+                        sums, log)));
+        graph->wait4complete();
+        if (log)
+            log->next_run();
+
+        msbfs_count_query *query = new msbfs_count_query();
+        fg::vertex_query::ptr q(query);
+        graph->query_on_all(q);
+        for (size_t i = 0; i < num; i++)
+            counts[first + i] = query->get_count(i);
+    }
+}
+}
+
+#endif
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Per-vertex results written to disk rather than held in memory. An `out`
+# target is either the path of a `.npy` file or `safs:<name>` for a file in
+# SAFS, which is staged in the system's temp directory while it's written.
+#
+# The algorithms implemented in this package write straight into the mapped
+# target: `pagerank` when it runs the delta PageRank, and `coreness`,
+# `weakly_connected_components` and `connected_components` with a
+# `checkpoint_dir`. FlashGraph's algorithms return a std::vector, so every
+# other method holds its whole result in memory once before it's copied into
+# the target and freed.
+
+import os
+import tempfile
+
+__safs_prefix__ = "safs:"
+__chunk_size__ = 1 << 22
+
+def is_target(out):
+    """
+    Whether `out` names a file to write a result into
+    """
+    return isinstance(out, str)
+
+def _safs_name(target):
+    if target.startswith(__safs_prefix__):
+        name = target[len(__safs_prefix__):]
+        if not name:
+            raise RuntimeError("'{}' doesn't name a SAFS file".format(target))
+        return name
+    return None
+
+def _staging_file():
+    fd, path = tempfile.mkstemp(prefix="graphyti-", suffix=".npy")
+    os.close(fd)
+    return path
+
+def _map_and_unlink(path):
+    # The mapping keeps the data until the array is gone
+    import numpy as np
+
+    try:
+        return np.load(path, mmap_mode="r")
+    finally:
+        os.remove(path)
+
+def _path(target):
+    return _staging_file() if _safs_name(target) else \
+            os.path.abspath(os.path.expanduser(target))
+
+def open_output(target, dtype, size):
+    """
+    A writable memory-mapped array of `size` values of `dtype` backed by the
+    file `target` names
+    """
+    from numpy.lib.format import open_memmap
+
+    path = _path(target)
+    try:
+        return open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+    except Exception:
+        if _safs_name(target):
+            os.remove(path)
+        raise
+
+def finish_output(target, arr, configs=""):
+    """
+    Flush `arr`, opened with `open_output`, to `target` and map it back
+    read-only. A SAFS target is loaded into SAFS and its staged file removed
+    once mapped.
+    """
+    arr.flush()
+    path = arr.filename
+    del arr
+
+    name = _safs_name(target)
+    if name is None:
+        return load_result(path)
+
+    try:
+        if not configs:
+            raise RuntimeError("Writing '{}' needs the graph's configuration "
+                    "file".format(target))
+        from .graphyti import FileManager
+        fm = FileManager(configs)
+        if fm.file_exists(name):
+            fm.delete(name)
+        fm.load(name, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return _map_and_unlink(path)
+
+def store(out, values, configs="", index=None):
+    """
+    Write `values`, or `values[index]`, into `out`: either an array or a
+    target. A target is written in chunks so `values` can be mapped too.
+
+    `Graph` stores a result here that's already computed: one that comes
+    from its cache or a finished checkpoint, one it maps back to the
+    original vertex IDs of a reordered graph, and degrees with pending edge
+    changes applied. A method that runs with a `timeout` or `cancel` writes
+    a target from its child process directly.
+
+    Returns:
+    --------
+    `out`, or the target mapped read-only
+    """
+    import numpy as np
+
+    if not is_target(out):
+        np.copyto(out, values if index is None else values[index],
+                casting="no")
+        return out
+
+    size = len(values) if index is None else len(index)
+    arr = open_output(out, values.dtype, size)
+    try:
+        for start in range(0, size, __chunk_size__):
+            end = min(start + __chunk_size__, size)
+            arr[start:end] = values[start:end] if index is None else \
+                    values[index[start:end]]
+    except Exception:
+        path = arr.filename
+        del arr
+        if _safs_name(out):
+            os.remove(path)
+        raise
+    return finish_output(out, arr, configs)
+
+def scratch():
+    """
+    A target on the local file system for an intermediate result. Its file
+    can be removed as soon as the result is mapped.
+    """
+    return _staging_file()
+
+def load_result(target, configs=""):
+    """
+    Map a result written to `target` read-only, copying it out of SAFS for a
+    SAFS target
+
+    Positional arguments:
+    --------------------
+    target:
+        - The path of a `.npy` file or `safs:<name>`
+
+    Optional arguments:
+    -------------------
+    configs:
+        - The configuration file of the SAFS the result is in
+
+    Returns:
+    --------
+    A read-only `numpy.memmap` of the result
+    """
+    import numpy as np
+
+    name = _safs_name(target)
+    if name is None:
+        return np.load(os.path.expanduser(target), mmap_mode="r")
+
+    from .graphyti import FileManager
+    fm = FileManager(configs)
+    if not fm.file_exists(name):
+        raise RuntimeError("'{}' isn't in SAFS".format(name))
+    path = _staging_file()
+    try:
+        fm.export(path, name)
+    except Exception:
+        os.remove(path)
+        raise
+    return _map_and_unlink(path)
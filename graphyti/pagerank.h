@@ -0,0 +1,438 @@
+#ifndef __GRAPHYTI_PAGERANK_H__
+#define __GRAPHYTI_PAGERANK_H__
+
+/*
+ * Delta (push) PageRank with a convergence tolerance, warm starts,
+ * personalization and checkpoints.
+ *
+ * Every vertex keeps its rank and the residual: the change to its rank that
+ * it hasn't passed on yet. A vertex whose residual exceeds the tolerance adds
+ * it to its rank and pushes its damped share to its out-neighbors. Vertices
+ * whose residual stays below the tolerance have converged and don't read
+ * their adjacency lists again.
+ *
+ * Ranks are scaled like CGraph::pagerank: they sum to about the number of
+ * vertices.
+ *
+ * The ranks and residuals are the whole state of the computation between
+ * iterations, so a checkpoint holds just those two arrays.
+ */
+
+#include <errno.h>
+#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+#include <unistd.h>
+
+#include <algorithm>
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include <utility>
+
+#include "src/flash-graph/FGlib.h"
+#include "src/flash-graph/graph_engine.h"
+
+#include "iterlog.h"
+
+namespace gt {
+
+class pr_message: public fg::vertex_message {
+    float delta;
+
+    public:
+    pr_message(float delta, bool activate):
+        fg::vertex_message(sizeof(pr_message), activate) {
+        this->delta = delta;
+    }
+
+    float get_delta() const {
+        return delta;
+    }
+};
+
+class pr_vertex: public fg::compute_directed_vertex {
+    float rank;
+    float residual;
+    // The rank change pushed while the adjacency list is read
+    float pushing;
+
+    public:
+    pr_vertex(fg::vertex_id_t id): fg::compute_directed_vertex(id) {
+        rank = 0;
+        residual = 0;
+        pushing = 0;
+    }
+
+    void init(float rank, float residual) {
+        this->rank = rank;
+        this->residual = residual;
+    }
+
+    float get_residual() const {
+        return residual;
+    }
+
+    // Residuals below the tolerance are never pushed, but still count
+    float get_rank() const {
+        return rank + residual;
+    }
+
+    void run(fg::vertex_program &prog);
+    void run(fg::vertex_program &prog, const fg::page_vertex &vertex);
+
+    // Messages are delivered by the thread that owns the vertex
+    void run_on_message(fg::vertex_program &prog,
+            const fg::vertex_message &msg) {
+        residual += ((const pr_message &) msg).get_delta();
+    }
+};
+
+class pr_vertex_program: public fg::vertex_program_impl<pr_vertex> {
+    float damping_factor;
+    float tol;
+    // Only push the warm start ranks, which sets up the residuals
+    bool warmup;
+    bool directed;
+    // The iterations this engine run may take
+    int max_iters;
+    iteration_log *log;
+    size_t nactive;
+
+    public:
+    pr_vertex_program(float damping_factor, float tol, bool warmup,
+            bool directed, int max_iters, iteration_log *log) {
+        this->damping_factor = damping_factor;
+        this->tol = tol;
+        this->warmup = warmup;
+        this->directed = directed;
+        this->max_iters = max_iters;
+        this->log = log;
+        this->nactive = 0;
+    }
+
+    float get_damping_factor() const {
+        return damping_factor;
+    }
+
+    float get_tol() const {
+        return tol;
+    }
+
+    bool is_warmup() const {
+        return warmup;
+    }
+
+    bool is_directed() const {
+        return directed;
+    }
+
+    // Vertices do nothing once the run is out of iterations, so the engine
+    // runs out of active vertices and ends like FlashGraph's own PageRank
+    bool is_last_iter() {
+        return get_graph().get_curr_level() >= max_iters;
+    }
+
+    // The warm up always runs to the end so the residuals stay consistent
+    bool is_stopped() const {
+        return !warmup && log && log->stopped();
+    }
+
+    void count_active() {
+        nactive++;
+    }
+
+    void run_on_iteration_end() {
+        if (log && !warmup && !is_last_iter())
+            log->add(get_graph().get_curr_level(), nactive);
+        nactive = 0;
+    }
+};
+
+class pr_vertex_program_creater: public fg::vertex_program_creater {
+    float damping_factor;
+    float tol;
+    bool warmup;
+    bool directed;
+    int max_iters;
+    iteration_log *log;
+
+    public:
+    pr_vertex_program_creater(float damping_factor, float tol, bool warmup,
+            bool directed, int max_iters, iteration_log *log) {
+        this->damping_factor = damping_factor;
+        this->tol = tol;
+        this->warmup = warmup;
+        this->directed = directed;
+        this->max_iters = max_iters;
+        this->log = log;
+    }
+
+    fg::vertex_program::ptr create() const {
+        return fg::vertex_program::ptr(new pr_vertex_program(damping_factor,
+                    tol, warmup, directed, max_iters, log));
+    }
+};
+
+inline void pr_vertex::run(fg::vertex_program &prog) {
+    pr_vertex_program &pr_prog = (pr_vertex_program &) prog;
+    if (pr_prog.is_last_iter())
+        return;
+    if (pr_prog.is_warmup()) {
+        pushing = rank;
+    } else {
+        // A vertex that doesn't push keeps its residual, so the ranks are
+        // as good as the iterations that ran
+        if (pr_prog.is_stopped() || fabs(residual) <= pr_prog.get_tol())
+            return;
+        pushing = residual;
+        rank += residual;
+        residual = 0;
+    }
+    pr_prog.count_active();
+
+    fg::vertex_id_t id = prog.get_vertex_id(*this);
+    // Only the out-edges are needed
+    if (pr_prog.is_directed()) {
+        fg::directed_vertex_request req(id, fg::OUT_EDGE);
+        request_partial_vertices(&req, 1);
+    } else {
+        request_vertices(&id, 1);
+    }
+}
+
+inline void pr_vertex::run(fg::vertex_program &prog,
+        const fg::page_vertex &vertex) {
+    pr_vertex_program &pr_prog = (pr_vertex_program &) prog;
+    size_t num_edges = vertex.get_num_edges(fg::OUT_EDGE);
+    if (num_edges == 0)
+        return;
+
+    pr_message msg(pr_prog.get_damping_factor() * pushing / num_edges,
+            !pr_prog.is_warmup());
+    fg::edge_seq_iterator it = vertex.get_neigh_seq_it(fg::OUT_EDGE, 0,
+            num_edges);
+    prog.multicast_msg(it, msg);
+}
+
+// Where and how often delta_pagerank saves its state
+struct pr_checkpoint {
+    // The checkpoint file, or empty for none
+    std::string path;
+    // Iterations between checkpoints
+    int interval;
+    // Start from the state in `path` if there is one
+    bool resume;
+
+    pr_checkpoint(): interval(0), resume(false) {
+    }
+};
+
+// The header of a checkpoint file, which the rank and then the residual of
+// every vertex follow as floats
+struct pr_checkpoint_header {
+    char magic[8];
+    uint64_t num_vertices;
+    // The iterations run so far
+    uint64_t iterations;
+    float damping_factor;
+    float tol;
+};
+
+static const char PR_CHECKPOINT_MAGIC[8] = {'G', 'T', 'P', 'R', 'C', 'K',
+    'P', '1'};
+
+static inline void throw_io_error(const std::string &action,
+        const std::string &path) {
+    throw std::runtime_error("Can't " + action + " checkpoint '" + path +
+            "': " + strerror(errno));
+}
+
+/*
+ * Write the state of every vertex of `graph` to `ckpt.path`. The file is
+ * replaced atomically, so a crash leaves the previous checkpoint.
+ */
+static inline void save_pr_checkpoint(const pr_checkpoint &ckpt,
+        fg::graph_engine::ptr graph, size_t num_vertices, size_t iterations,
+        float damping_factor, float tol) {
+    pr_checkpoint_header header;
+    memcpy(header.magic, PR_CHECKPOINT_MAGIC, sizeof(header.magic));
+    header.num_vertices = num_vertices;
+    header.iterations = iterations;
+    header.damping_factor = damping_factor;
+    header.tol = tol;
+
+    std::vector<float> ranks(num_vertices), residuals(num_vertices);
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++) {
+        pr_vertex &v = (pr_vertex &) graph->get_vertex(i);
+        residuals[i] = v.get_residual();
+        ranks[i] = v.get_rank() - residuals[i];
+    }
+
+    std::string tmp = ckpt.path + ".tmp";
+    FILE *f = fopen(tmp.c_str(), "wb");
+    if (f == NULL)
+        throw_io_error("write", tmp);
+    bool ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+        fwrite(ranks.data(), sizeof(float), num_vertices, f) == num_vertices &&
+        fwrite(residuals.data(), sizeof(float), num_vertices, f) ==
+        num_vertices && fflush(f) == 0 && fsync(fileno(f)) == 0;
+    int err = errno;
+    fclose(f);
+    errno = err;
+    if (!ok)
+        throw_io_error("write", tmp);
+    if (rename(tmp.c_str(), ckpt.path.c_str()) < 0)
+        throw_io_error("write", ckpt.path);
+}
+
+/*
+ * Load the state of every vertex of `graph` from `ckpt.path` and return the
+ * iterations run before it was saved, or -1 if there's no checkpoint
+ */
+static inline long load_pr_checkpoint(const pr_checkpoint &ckpt,
+        fg::graph_engine::ptr graph, size_t num_vertices,
+        float damping_factor, float tol) {
+    FILE *f = fopen(ckpt.path.c_str(), "rb");
+    if (f == NULL) {
+        if (errno == ENOENT)
+            return -1;
+        throw_io_error("read", ckpt.path);
+    }
+
+    pr_checkpoint_header header;
+    std::vector<float> ranks(num_vertices), residuals(num_vertices);
+    bool ok = fread(&header, sizeof(header), 1, f) == 1 &&
+        memcmp(header.magic, PR_CHECKPOINT_MAGIC, sizeof(header.magic)) == 0 &&
+        header.num_vertices == num_vertices &&
+        fread(ranks.data(), sizeof(float), num_vertices, f) == num_vertices &&
+        fread(residuals.data(), sizeof(float), num_vertices, f) ==
+        num_vertices;
+    fclose(f);
+    if (!ok)
+        throw std::runtime_error("'" + ckpt.path + "' isn't a PageRank " +
+                "checkpoint of this graph");
+    if (header.damping_factor != damping_factor || header.tol != tol)
+        throw std::runtime_error("'" + ckpt.path + "' was saved with a " +
+                "different `damping_factor` or `tol`");
+
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++)
+        ((pr_vertex &) graph->get_vertex(i)).init(ranks[i], residuals[i]);
+    return header.iterations;
+}
+
+/*
+ * Compute PageRank, stopping once no vertex's rank changes by more than `tol`
+ * or after `max_iters` iterations.
+ *
+ * `warm_start` is NULL or a rank per vertex to start from, e.g. the result of
+ * an earlier run on a slightly different graph. `seeds` personalizes the
+ * ranks: random jumps land on the seeds only. `ranks` receives the rank of
+ * every vertex and `log` the vertices updated in each iteration.
+ *
+ * Stopping `log` ends the run after the current iteration with the ranks so
+ * far.
+ *
+ * With a `ckpt` path the state is saved every `ckpt.interval` iterations and
+ * once the ranks converge. A resumed run continues from the saved state and
+ * ignores `warm_start` and `seeds`, which that state already reflects.
+ */
+inline void delta_pagerank(fg::FG_graph::ptr fg, int max_iters,
+        float damping_factor, float tol, const float *warm_start,
+        const std::vector<fg::vertex_id_t> &seeds, float *ranks,
+        iteration_log &log, const pr_checkpoint &ckpt = pr_checkpoint()) {
+    const fg::graph_header &header = fg->get_graph_header();
+    size_t num_vertices = header.get_num_vertices();
+
+    // The rank each vertex receives from random jumps
+    std::vector<float> jumps;
+    if (seeds.empty()) {
+        jumps.assign(num_vertices, 1 - damping_factor);
+    } else {
+        jumps.assign(num_vertices, 0);
+        for (size_t i = 0; i < seeds.size(); i++) {
+            if (seeds[i] >= num_vertices)
+                throw std::out_of_range("Seed vertex " +
+                        std::to_string(seeds[i]) + " isn't in the graph");
+            jumps[seeds[i]] += (1 - damping_factor) * num_vertices /
+                seeds.size();
+        }
+    }
+
+    fg::graph_index::ptr index =
+        fg::NUMA_graph_index<pr_vertex>::create(header);
+    fg::graph_engine::ptr graph = fg->create_engine(index);
+
+    long done = -1;
+    if (!ckpt.path.empty() && ckpt.resume)
+        done = load_pr_checkpoint(ckpt, graph, num_vertices, damping_factor,
+                tol);
+
+    if (done < 0) {
+        done = 0;
+        // A warm start has the residuals of its ranks: the jumps plus the
+        // ranks pushed by the in-neighbors, minus the ranks themselves
+#pragma omp parallel for
+        for (size_t i = 0; i < num_vertices; i++) {
+            float start = warm_start ? warm_start[i] : 0;
+            ((pr_vertex &) graph->get_vertex(i)).init(start,
+                jumps[i] - start);
+        }
+
+        if (warm_start) {
+            graph->start_all(fg::vertex_initializer::ptr(),
+                    fg::vertex_program_creater::ptr(
+                        new pr_vertex_program_creater(damping_factor, tol,
+                            true, header.is_directed_graph(), 1, &log)));
+            graph->wait4complete();
+        }
+    }
+    // Only the seeds have anything to push at first
+    std::vector<fg::vertex_id_t> starts;
+    if (done == 0 && !warm_start && !seeds.empty()) {
+        starts = seeds;
+        std::sort(starts.begin(), starts.end());
+        starts.erase(std::unique(starts.begin(), starts.end()), starts.end());
+    }
+
+    // Without checkpoints all iterations run at once
+    int interval = ckpt.path.empty() || ckpt.interval <= 0 ? max_iters :
+        ckpt.interval;
+    while (done < max_iters && !log.stopped()) {
+        int num = std::min<long>(interval, max_iters - done);
+        size_t first = log.size();
+        fg::vertex_program_creater::ptr creater(new pr_vertex_program_creater(
+                    damping_factor, tol, false, header.is_directed_graph(),
+                    num, &log));
+        if (!starts.empty())
+            graph->start(starts.data(), starts.size(),
+                    fg::vertex_initializer::ptr(), std::move(creater));
+        else
+            graph->start_all(fg::vertex_initializer::ptr(),
+                    std::move(creater));
+        graph->wait4complete();
+        starts.clear();
+
+        size_t ran = log.size() - first;
+        log.next_run();
+        done += ran;
+        // The engine stops early once no vertex has anything to push
+        bool converged = ran < (size_t) num ||
+            (ran > 0 && log.get_active(log.size() - 1) == 0);
+        if (!ckpt.path.empty())
+            save_pr_checkpoint(ckpt, graph, num_vertices, done,
+                    damping_factor, tol);
+        if (converged || ran == 0)
+            break;
+    }
+
+#pragma omp parallel for
+    for (size_t i = 0; i < num_vertices; i++)
+        ranks[i] = ((pr_vertex &) graph->get_vertex(i)).get_rank();
+}
+}
+
+#endif
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Vertex reordering used by `Format` to improve the locality of the
+# adjacency lists it writes. A permutation maps each original vertex ID to
+# its new ID and is saved next to the adjacency list as `<adj_fn>.perm`.
+
+import os
+
+from .Exceptions.runtime import UnsupportedError
+
+__strategies__ = ("degree", "rcm", "community")
+__perm_ext__ = ".perm"
+
+def _degrees(src, dst, nvertices):
+    import numpy as np
+    return np.bincount(src, minlength=nvertices) + \
+            np.bincount(dst, minlength=nvertices)
+
+def degree_order(src, dst, nvertices):
+    """
+    Order vertices by decreasing degree so the hubs share pages
+    """
+    import numpy as np
+    return np.argsort(-_degrees(src, dst, nvertices), kind="stable")
+
+def rcm_order(src, dst, nvertices):
+    """
+    Order vertices by a reverse Cuthill-McKee traversal, which numbers the
+    neighbors of each vertex close to each other. Needs `scipy`.
+    """
+    import numpy as np
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+    except ImportError:
+        raise UnsupportedError("Reordering with 'rcm' requires the " +
+                "`scipy` package")
+
+    ones = np.ones(len(src), dtype=np.int8)
+    adj = csr_matrix((ones, (src, dst)), shape=(nvertices, nvertices))
+    return reverse_cuthill_mckee((adj + adj.T).tocsr(), symmetric_mode=True)
+
+def _communities(src, dst, nvertices, rounds=10):
+    """
+    Label each vertex with a community found by label propagation: every
+    round, all vertices take the label most of their neighbors and
+    themselves have, the smallest one on a tie. Edge direction is ignored.
+    """
+    import numpy as np
+
+    loops = np.arange(nvertices, dtype=np.uint64)
+    voters = np.concatenate((src, dst, loops)).astype(np.uint64)
+    voted = np.concatenate((dst, src, loops)).astype(np.uint64)
+    labels = np.arange(nvertices, dtype=np.uint64)
+    for _ in range(rounds):
+        votes, counts = np.unique(voted * nvertices + labels[voters],
+                return_counts=True)
+        vertex, label = np.divmod(votes, np.uint64(nvertices))
+        # Every vertex votes for itself, so each one has a winner
+        order = np.lexsort((label, -counts, vertex))
+        winners = order[np.r_[True, vertex[order[1:]] != vertex[order[:-1]]]]
+        new_labels = label[winners]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return labels
+
+def community_order(src, dst, nvertices):
+    """
+    Number the vertices of each community found by a quick label
+    propagation pass consecutively, hubs first
+    """
+    import numpy as np
+    return np.lexsort((-_degrees(src, dst, nvertices),
+        _communities(src, dst, nvertices)))
+
+def permutation(strategy, src, dst):
+    """
+    Compute a vertex permutation of the graph with edges (src[i], dst[i])
+
+    Positional arguments:
+    --------------------
+    strategy:
+        - "degree", "rcm" (reverse Cuthill-McKee) or "community"
+
+    Returns:
+    --------
+    A uint32 array with the new ID of each original vertex ID
+    """
+    import numpy as np
+
+    src = np.asarray(src)
+    dst = np.asarray(dst)
+    nvertices = int(max(src.max(), dst.max())) + 1 if len(src) else 0
+
+    if strategy == "degree":
+        order = degree_order(src, dst, nvertices)
+    elif strategy == "rcm":
+        order = rcm_order(src, dst, nvertices)
+    elif strategy == "community":
+        order = community_order(src, dst, nvertices)
+    else:
+        raise UnsupportedError("Unknown reordering '{}'. Use one of {}".format(
+            strategy, ", ".join(__strategies__)))
+
+    perm = np.empty(nvertices, dtype=np.uint32)
+    perm[order] = np.arange(nvertices, dtype=np.uint32)
+    return perm
+
+def inverse(perm):
+    """
+    The original ID of each new vertex ID
+    """
+    import numpy as np
+
+    order = np.empty_like(perm)
+    order[perm] = np.arange(len(perm), dtype=perm.dtype)
+    return order
+
+def permutation_file(adj_fn):
+    return adj_fn + __perm_ext__
+
+def clear_permutation(adj_fn):
+    """
+    Remove the permutation of an adjacency list that's rewritten without
+    reordering
+    """
+    try:
+        os.remove(permutation_file(adj_fn))
+    except OSError:
+        pass
+
+def save_permutation(perm, path):
+    import numpy as np
+    with open(path, "wb") as f:
+        np.save(f, perm)
+
+def load_permutation(path):
+    import numpy as np
+    with open(path, "rb") as f:
+        return np.load(f)
+
+def reorder_edges(src, dst, strategy, adj_fn):
+    """
+    Relabel the edges (src[i], dst[i]) by the permutation `strategy` gives
+    and save the permutation for the adjacency list `adj_fn`
+
+    Returns:
+    --------
+    A 2-tuple with the new source and destination ID of each edge
+    """
+    perm = permutation(strategy, src, dst)
+    save_permutation(perm, permutation_file(adj_fn))
+    return perm[src], perm[dst]
+
+def graph_edges(adj_fn, idx_fn, configs=""):
+    """
+    Read back the edges of a converted graph, listing each undirected edge
+    once
+    """
+    import numpy as np
+    from .graphyti import Graph
+
+    graph = Graph(adj_fn, idx_fn, configs)
+    src, dst = graph.edges("out")
+    if not graph.is_directed():
+        # A self loop is in its vertex's list twice, next to each other
+        loops = np.flatnonzero(src == dst)[::2]
+        keep = np.sort(np.concatenate((np.flatnonzero(src < dst), loops)))
+        src, dst = src[keep], dst[keep]
+    return src, dst
@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A server that keeps graphs open, with SAFS and its page cache warm, for
+many short-lived clients on the same machine:
+
+    python -m graphyti.server -c configs -g graph.adj graph.idx
+
+    from graphyti.server import Client
+    with Client() as client:
+        pr = client.graph("graph.adj", "graph.idx").pagerank(niters=10)
+
+Clients talk to the server over a Unix socket. Arrays, in either direction,
+are passed as `.npy` files in shared memory (/dev/shm) that the receiver
+maps and removes. Algorithm calls from all clients go through one queue,
+served by a fixed number of threads, and identical calls that are queued or
+running together are only run once.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+
+from .Exceptions.runtime import UnsupportedError
+
+# The calls a client may make on a graph besides its algorithms
+__queries__ = (
+        "ecount",
+        "is_directed",
+        "is_in_mem",
+        "vcount",
+)
+
+__header__ = struct.Struct("!I")
+
+def default_socket():
+    return os.path.join(os.path.expanduser("~"), ".graphyti", "server.sock")
+
+def _shm_dir():
+    # tmpfs where there is one, so arrays never touch a disk
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+############################### Protocol #######################################
+
+def _send(sock, msg):
+    data = json.dumps(msg).encode("UTF-8")
+    sock.sendall(__header__.pack(len(data)) + data)
+
+def _recv_exactly(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+def _recv(sock):
+    header = _recv_exactly(sock, __header__.size)
+    if header is None:
+        return None
+    data = _recv_exactly(sock, __header__.unpack(header)[0])
+    if data is None:
+        raise RuntimeError("The connection closed in the middle of a message")
+    return json.loads(data.decode("UTF-8"))
+
+def _encode(value, paths):
+    # Make `value` JSON serializable, writing its arrays to shared memory and
+    # adding their files to `paths`
+    import numpy as np
+
+    if isinstance(value, np.ndarray):
+        path = os.path.join(_shm_dir(), "graphyti-{}.npy".format(
+            uuid.uuid4().hex))
+        paths.append(path)
+        np.save(path, value)
+        return {"__array__": path}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v, paths) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v, paths) for v in value]
+    if isinstance(value, dict):
+        return dict((k, _encode(v, paths)) for k, v in value.items())
+    return value
+
+def _decode(value):
+    # Map the arrays `_encode` wrote, removing their files
+    import numpy as np
+
+    if isinstance(value, dict):
+        if "__array__" in value:
+            path = value["__array__"]
+            try:
+                return np.load(path, mmap_mode="r")
+            finally:
+                os.remove(path)
+        if "__tuple__" in value:
+            return tuple(_decode(v) for v in value["__tuple__"])
+        return dict((k, _decode(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+def _remove(paths):
+    # Files the other side didn't get to
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _error(e):
+    return {"error": {"type": type(e).__name__, "message": str(e)}}
+
+def _raise(error):
+    from concurrent.futures import CancelledError
+
+    types = {"TimeoutError": TimeoutError, "CancelledError": CancelledError,
+            "UnsupportedError": RuntimeError}
+    raise types.get(error["type"], RuntimeError)(error["message"])
+
+############################### Server #########################################
+
+class GraphServer(object):
+    def __init__(self, configs, path=None, workers=4, cache=None):
+        """
+        Serve the graphs in the SAFS or local file system of `configs` on the
+        Unix socket `path`, running up to `workers` algorithm calls at once.
+        Results are kept in `cache`, a `ResultCache`, if given.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.configs = configs
+        self.path = os.path.abspath(path or default_socket())
+        self.cache = cache
+        self.__graphs = {}
+        self.__lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        # Calls queued or running, by what they compute
+        self.__calls = {}
+        self.__served = 0
+        self.__coalesced = 0
+        self.__server = None
+
+    def graph(self, adj_fn, idx_fn):
+        """
+        The `Graph` in `adj_fn` and `idx_fn`, opened on first use
+        """
+        from .Graph import Graph
+
+        key = (adj_fn, idx_fn)
+        with self.__lock:
+            graph = self.__graphs.get(key)
+            if graph is None:
+                graph = Graph(adj_fn, idx_fn, self.configs, cache=self.cache)
+                self.__graphs[key] = graph
+            return graph
+
+    def submit(self, adj_fn, idx_fn, name, args, kwargs):
+        """
+        Queue a call of `name` on a graph. A call identical to one that's
+        queued or running shares its future.
+
+        Returns:
+        --------
+        A `concurrent.futures.Future` holding the result
+        """
+        from .Graph import __algorithms__
+
+        if name not in __algorithms__ + __queries__:
+            raise UnsupportedError("Unknown algorithm '{}'".format(name))
+        graph = self.graph(adj_fn, idx_fn)
+
+        # Calls taking arrays are never coalesced
+        try:
+            key = json.dumps([adj_fn, idx_fn, name, args, kwargs],
+                    sort_keys=True)
+        except TypeError:
+            key = None
+        with self.__lock:
+            self.__served += 1
+            future = self.__calls.get(key)
+            if future is not None:
+                self.__coalesced += 1
+                return future
+
+            future = self.__executor.submit(getattr(graph, name), *args,
+                    **kwargs)
+            if key is None:
+                return future
+            self.__calls[key] = future
+
+        def done(_):
+            with self.__lock:
+                self.__calls.pop(key, None)
+        future.add_done_callback(done)
+        return future
+
+    def status(self):
+        with self.__lock:
+            return {"graphs": [list(key) for key in self.__graphs],
+                    "pending": len(self.__calls), "served": self.__served,
+                    "coalesced": self.__coalesced}
+
+    def handle(self, request):
+        """
+        The response to one request, and the shared memory files it names
+        """
+        paths = []
+        op = request.get("op")
+        try:
+            if op == "ping":
+                return {"result": "pong"}, paths
+            if op == "status":
+                return {"result": self.status()}, paths
+            if op == "open":
+                graph = self.graph(request["graph"], request["index"])
+                return {"result": {"vcount": graph.vcount(),
+                    "ecount": graph.ecount(),
+                    "directed": graph.is_directed()}}, paths
+            if op == "run":
+                future = self.submit(request["graph"], request["index"],
+                        request["name"], _decode(request.get("args", [])),
+                        _decode(request.get("kwargs", {})))
+                return {"result": _encode(future.result(), paths)}, paths
+            if op == "shutdown":
+                threading.Thread(target=self.shutdown).start()
+                return {"result": None}, paths
+            raise UnsupportedError("Unknown request '{}'".format(op))
+        except Exception as e:
+            _remove(paths)
+            return _error(e), []
+
+    def serve_forever(self):
+        """
+        Accept clients until `shutdown`
+        """
+        import socketserver
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                unclaimed = []
+                try:
+                    while True:
+                        request = _recv(self.request)
+                        if request is None:
+                            break
+                        response, paths = server.handle(request)
+                        unclaimed.extend(paths)
+                        _send(self.request, response)
+                except (OSError, ValueError):
+                    pass
+                finally:
+                    # The client removes the files it maps, so what's left
+                    # was never mapped
+                    _remove(unclaimed)
+
+        class Server(socketserver.ThreadingMixIn,
+                socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        if os.path.exists(self.path):
+            # A socket nobody listens on is left over from a server that died
+            try:
+                Client(self.path).close()
+            except OSError:
+                os.remove(self.path)
+            else:
+                raise RuntimeError("A server is already listening on '{}'".
+                        format(self.path))
+
+        # Only the user that started the server may connect
+        umask = os.umask(0o177)
+        try:
+            self.__server = Server(self.path, Handler)
+        finally:
+            os.umask(umask)
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            _remove([self.path])
+            self.__executor.shutdown(wait=False)
+
+    def shutdown(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+
+############################### Client #########################################
+
+class RemoteGraph(object):
+    def __init__(self, client, adj_fn, idx_fn):
+        """
+        A graph opened by a server. Its algorithms take the same arguments
+        as `Graph`'s except for callbacks and events.
+        """
+        self.client = client
+        self.files = (adj_fn, idx_fn)
+
+    def __getattr__(self, name):
+        from .Graph import __algorithms__
+
+        if name not in __algorithms__ + __queries__:
+            raise AttributeError(name)
+
+        def run(*args, **kwargs):
+            return self.client.run(self.files[0], self.files[1], name,
+                    *args, **kwargs)
+        run.__name__ = name
+        return run
+
+class Client(object):
+    def __init__(self, path=None):
+        """
+        Connect to the server listening on the Unix socket `path`
+        """
+        self.path = path or default_socket()
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.__sock.connect(self.path)
+        except OSError:
+            self.__sock.close()
+            raise
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.__sock.close()
+
+    def request(self, op, **fields):
+        paths = []
+        fields["op"] = op
+        for arg in ("args", "kwargs"):
+            if arg in fields:
+                fields[arg] = _encode(fields[arg], paths)
+        try:
+            with self.__lock:
+                _send(self.__sock, fields)
+                response = _recv(self.__sock)
+        finally:
+            # The server removes the arguments it maps
+            _remove(paths)
+        if response is None:
+            raise RuntimeError("The server closed the connection")
+        if "error" in response:
+            _raise(response["error"])
+        return _decode(response["result"])
+
+    def graph(self, adj_fn, idx_fn):
+        """
+        Have the server open a graph if it hasn't yet
+
+        Returns:
+        --------
+        A `RemoteGraph` whose algorithms run in the server
+        """
+        self.request("open", graph=adj_fn, index=idx_fn)
+        return RemoteGraph(self, adj_fn, idx_fn)
+
+    def run(self, adj_fn, idx_fn, name, *args, **kwargs):
+        """
+        Run the algorithm `name` on a graph in the server. Array results are
+        returned as read-only memory-mapped arrays in shared memory.
+        """
+        return self.request("run", graph=adj_fn, index=idx_fn, name=name,
+                args=list(args), kwargs=kwargs)
+
+    def status(self):
+        """
+        The graphs the server has open, the calls queued or running
+        (`pending`), the calls served and how many of those shared the run
+        of an identical call (`coalesced`)
+        """
+        return self.request("status")
+
+    def shutdown(self):
+        """
+        Stop the server
+        """
+        self.request("shutdown")
+
+def main(argv=None):
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(prog="python -m graphyti.server",
+            description="Keep graphs open for local clients")
+    parser.add_argument("-c", "--configs", required=True,
+            help="The SAFS configuration file")
+    parser.add_argument("-s", "--socket", default=default_socket(),
+            help="The Unix socket to listen on")
+    parser.add_argument("-g", "--graph", nargs=2, action="append",
+            default=[], metavar=("ADJ", "IDX"),
+            help="Open this graph on start up")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+            help="The algorithm calls run at once")
+    parser.add_argument("--cache", help="Keep results in this directory")
+    parser.add_argument("--cache-size", default="4G",
+            help="The cache's size limit")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache:
+        from .ResultCache import ResultCache
+        cache = ResultCache(args.cache, max_size=args.cache_size)
+
+    server = GraphServer(args.configs, args.socket, args.workers, cache)
+    for adj_fn, idx_fn in args.graph:
+        server.graph(adj_fn, idx_fn)
+
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(
+        target=server.shutdown).start())
+    print("Serving on {}".format(server.path))
+    server.serve_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
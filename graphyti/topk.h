@@ -0,0 +1,93 @@
+#ifndef __GRAPHYTI_TOPK_H__
+#define __GRAPHYTI_TOPK_H__
+
+/*
+ * Select the k largest of a vertex-length array of values without sorting
+ * it. Each thread keeps a k-entry min-heap over its slice of the vertices;
+ * the heaps are merged and only the k survivors are sorted.
+ */
+
+#include <math.h>
+#include <stdint.h>
+
+#include <algorithm>
+#include <utility>
+#include <vector>
+
+#include <omp.h>
+
+#include "src/flash-graph/FGlib.h"
+
+namespace gt {
+
+// NaNs rank below every other value
+template <typename T>
+inline bool value_less(T a, T b) {
+    return a < b;
+}
+
+inline bool value_less(float a, float b) {
+    return isnan(a) ? !isnan(b) : a < b;
+}
+
+inline bool value_less(double a, double b) {
+    return isnan(a) ? !isnan(b) : a < b;
+}
+
+template <typename T>
+struct ranked_vertex {
+    fg::vertex_id_t id;
+    T value;
+
+    // Higher values first, ties go to the lower vertex ID
+    bool operator<(const ranked_vertex &other) const {
+        if (value_less(other.value, value))
+            return true;
+        if (value_less(value, other.value))
+            return false;
+        return id < other.id;
+    }
+};
+
+/*
+ * The `k` vertices with the largest of `values`, which holds one value per
+ * vertex, in decreasing order of value.
+ */
+template <typename T>
+std::vector<ranked_vertex<T> > top_k(const T *values, size_t num_vertices,
+        size_t k) {
+    typedef ranked_vertex<T> ranked_t;
+    k = std::min(k, num_vertices);
+    std::vector<ranked_t> res;
+    if (k == 0)
+        return res;
+
+    // With operator< above, a max-heap keeps the worst vertex on top
+    std::vector<std::vector<ranked_t> > heaps(omp_get_max_threads());
+#pragma omp parallel
+    {
+        std::vector<ranked_t> &heap = heaps[omp_get_thread_num()];
+        heap.reserve(k);
+#pragma omp for schedule(static)
+        for (size_t i = 0; i < num_vertices; i++) {
+            ranked_t v = { (fg::vertex_id_t) i, values[i] };
+            if (heap.size() < k) {
+                heap.push_back(v);
+                std::push_heap(heap.begin(), heap.end());
+            } else if (v < heap.front()) {
+                std::pop_heap(heap.begin(), heap.end());
+                heap.back() = v;
+                std::push_heap(heap.begin(), heap.end());
+            }
+        }
+    }
+
+    for (size_t i = 0; i < heaps.size(); i++)
+        res.insert(res.end(), heaps[i].begin(), heaps[i].end());
+    std::partial_sort(res.begin(), res.begin() + k, res.end());
+    res.resize(k);
+    return res;
+}
+}
+
+#endif
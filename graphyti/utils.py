@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+# Copyright 2019 neurodata (http://neurodata.io/)
+#
+# This file is part of graphyti.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Helpers shared by the Python modules
+
+__size_units__ = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+def parse_size(size):
+    """
+    Convert a size such as 4096, "512M" or "4G" to a number of bytes
+    """
+    if isinstance(size, int):
+        return size
+
+    size = str(size).strip().upper()
+    if size and size[-1] in __size_units__:
+        return int(float(size[:-1]) * __size_units__[size[-1]])
+    return int(size)
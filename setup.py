@@ -239,7 +239,12 @@ setup(
     license="Apache License, Version 2.0",
     keywords="graph parallel scalable machine-learning",
     install_requires=[
+        "numpy",
         ],
+    extras_require={
+        "zstd": ["zstandard"],
+        "rcm": ["scipy"],
+        },
     package_dir = {"graphyti": "graphyti"},
     packages=["graphyti", "graphyti.Exceptions"],
     libraries =libraries,
@@ -0,0 +1,14 @@
+import pytest
+
+from graphyti import Configuration
+
+
+@pytest.fixture
+def configs(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    fn = str(tmp_path / "conf")
+    Configuration.set_configs({"root_conf": str(data), "threads": "2",
+        "num_nodes": "1", "cache_size": "64M", "io_depth": "16",
+        "RAID_mapping": "RAID0"}, fn)
+    return fn
@@ -0,0 +1,52 @@
+import json
+
+from graphyti import bench
+
+
+def results(*runs):
+    # (algorithm, mode, seconds or a dict with the "error" or "skipped")
+    return {"results": [dict(run[2], algorithm=run[0], mode=run[1])
+        if isinstance(run[2], dict) else
+        {"algorithm": run[0], "mode": run[1], "seconds": run[2]}
+        for run in runs]}
+
+
+def test_compare_finds_regressions():
+    baseline = results(("bfs", "mem", 1.), ("pagerank", "mem", 2.),
+            ("triangles", "mem", .001), ("coreness", "mem", 1.),
+            ("diameter", "mem", 1.))
+    current = results(("bfs", "mem", 1.05), ("pagerank", "mem", 3.),
+            ("triangles", "mem", .005), ("coreness", "mmap", 5.),
+            ("diameter", "mem", {"error": "boom"}),
+            ("degree", "mem", 9.))
+    # Within the threshold, too short to time, another mode, failed and
+    # not in the baseline aren't regressions
+    assert bench.compare(baseline, current) == [("pagerank", "mem", 2., 3.)]
+    assert bench.compare(baseline, current, threshold=.01) == [
+            ("bfs", "mem", 1., 1.05), ("pagerank", "mem", 2., 3.)]
+    assert bench.compare(baseline, current, min_seconds=.0001) == [
+            ("pagerank", "mem", 2., 3.), ("triangles", "mem", .001, .005)]
+
+
+def test_compare_cli_exit_code(tmp_path, capsys):
+    baseline = results(("bfs", "mem", 1.), ("pagerank", "mem", 1.))
+    runs = {
+            "same": (results(("bfs", "mem", 1.), ("pagerank", "mem", 1.)), 0),
+            "slower": (results(("bfs", "mem", 2.),
+                ("pagerank", "mem", 1.)), 1),
+            "failed": (results(("bfs", "mem", 1.),
+                ("pagerank", "mem", {"error": "boom"})), 1),
+            "skipped": (results(("bfs", "mem", 1.),
+                ("pagerank", "mem", {"skipped": "directed only"})), 0),
+    }
+    base_fn = str(tmp_path / "base.json")
+    with open(base_fn, "w") as f:
+        json.dump(baseline, f)
+    for name, (current, code) in runs.items():
+        fn = str(tmp_path / (name + ".json"))
+        with open(fn, "w") as f:
+            json.dump(current, f)
+        assert bench.main(["compare", base_fn, fn]) == code, name
+    out = capsys.readouterr().out
+    assert "REGRESSION bfs (mem)" in out
+    assert "FAILED pagerank (mem): boom" in out
@@ -0,0 +1,67 @@
+import warnings
+
+import pytest
+
+from graphyti.catalog import Catalog
+
+
+@pytest.fixture
+def edgelists(tmp_path):
+    paths = []
+    for name, text in (("a.txt", "0 1\n1 2\n"), ("b.txt", "2 3\n"),
+            ("copy.txt", "0 1\n1 2\n")):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+
+def test_key_follows_content_and_options(configs, edgelists):
+    cat = Catalog(configs)
+    a, b, copy = edgelists
+    key = cat.key([a, b], directed=True)
+    assert cat.key([b, a], directed=True) == key
+    assert cat.key([copy, b], directed=True) == key
+    assert cat.key([a, b], directed=False) != key
+    assert cat.key([a], directed=True) != key
+
+
+def test_names_of_colliding_graphs(configs, edgelists):
+    cat = Catalog(configs)
+    a, b, _ = edgelists
+    key_a = cat.key([a], directed=True)
+    key_b = cat.key([b], directed=True)
+    assert cat.names(key_a, "g") == ("g.adj", "g.idx")
+    cat.add(key_a, "g.adj", "g.idx", [a], "gen-a", directed=True)
+    # The owner keeps its names
+    assert cat.names(key_a, "g") == ("g.adj", "g.idx")
+
+    # Another graph is named after its key as well
+    with pytest.warns(UserWarning):
+        names = cat.names(key_b, "g")
+    suffixed = "g-{}".format(key_b[:12])
+    assert names == (suffixed + ".adj", suffixed + ".idx")
+    cat.add(key_b, names[0], names[1], [b], "gen-b", directed=True)
+    with pytest.warns(UserWarning):
+        assert cat.names(key_b, "g") == names
+
+    # A third graph gets its own names
+    key_c = cat.key([a, b], directed=True)
+    with pytest.warns(UserWarning):
+        assert cat.names(key_c, "g")[0] == "g-{}.adj".format(key_c[:12])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert cat.names(key_c, "h") == ("h.adj", "h.idx")
+
+
+def test_graph_loaded_over_is_dropped(configs, edgelists):
+    cat = Catalog(configs)
+    a, b, _ = edgelists
+    key_a = cat.key([a], directed=True)
+    key_b = cat.key([b], directed=True)
+    cat.add(key_a, "g.adj", "g.idx", [a], "gen-a", directed=True)
+    cat.add(key_b, "g.adj", "g.idx", [b], "gen-b", directed=True)
+    with pytest.warns(UserWarning):
+        assert cat.names(key_a, "g") != ("g.adj", "g.idx")
+    cat.forget("g.adj")
+    assert cat.names(key_a, "g") == ("g.adj", "g.idx")
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from graphyti import Format, Graph
+
+
+@pytest.mark.parametrize("edge_type", ["out", "in"])
+def test_approx_closeness_with_every_pivot_is_exact(tmp_path, configs,
+        edge_type):
+    rng = np.random.default_rng(1)
+    src = rng.integers(0, 40, 120).astype(np.uint32)
+    dst = rng.integers(0, 40, 120).astype(np.uint32)
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, True)
+    g = Graph(adj, idx, configs)
+
+    exact = g.closeness(edge_type=edge_type)
+    approx, err = g.approx_closeness(samples=g.vcount(), edge_type=edge_type,
+            seed=0)
+    np.testing.assert_allclose(approx, exact)
+    np.testing.assert_array_equal(err[exact > 0], 0)
+
+
+def test_approx_closeness_is_near_exact(tmp_path, configs):
+    rng = np.random.default_rng(2)
+    src = rng.integers(0, 500, 3000).astype(np.uint32)
+    dst = rng.integers(0, 500, 3000).astype(np.uint32)
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, True)
+    g = Graph(adj, idx, configs)
+
+    ids = list(range(0, 500, 25))
+    exact = np.asarray(g.closeness(ids, edge_type="out"))
+    approx, err = g.approx_closeness(samples=200, edge_type="out", seed=0)
+    assert np.all(np.abs(approx[ids] - exact) < 4 * err[ids])
@@ -0,0 +1,93 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from graphyti import Format, Graph
+from graphyti.Exceptions.runtime import UnsupportedError
+
+# The header of a coreness or components checkpoint
+header_dtype = np.dtype([("magic", "S8"), ("num_vertices", "<u8"),
+    ("iterations", "<u8"), ("rule", "<u4")], align=True)
+
+
+def make_graph(tmp_path, configs, src, dst, directed):
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(np.asarray(src, dtype=np.uint32),
+            np.asarray(dst, dtype=np.uint32), adj, idx, directed)
+    return Graph(adj, idx, configs)
+
+
+def random_graph(tmp_path, configs, directed):
+    # Vertices 5 and 6 have no edges
+    rng = np.random.default_rng(1)
+    ids = np.setdiff1d(np.arange(80), [5, 6])
+    return make_graph(tmp_path, configs, rng.choice(ids, 150),
+            rng.choice(ids, 150), directed)
+
+
+@pytest.mark.parametrize("name,directed", [
+    ("coreness", True),
+    ("weakly_connected_components", True),
+    ("connected_components", False)])
+def test_checkpointed_matches_flashgraph(tmp_path, configs, name, directed):
+    g = random_graph(tmp_path, configs, directed)
+    ckpt = str(tmp_path / "ckpt")
+    res = getattr(g, name)(checkpoint_dir=ckpt, checkpoint_interval=1)
+    np.testing.assert_array_equal(res, getattr(g, name)())
+    # A finished call returns its saved result
+    np.testing.assert_array_equal(getattr(g, name)(checkpoint_dir=ckpt,
+        resume=True), res)
+    assert not os.path.exists(os.path.join(ckpt, name + ".state"))
+
+
+def test_resume_continues_from_saved_state(tmp_path, configs):
+    # A path, whose labels take an iteration per vertex to settle
+    g = make_graph(tmp_path, configs, np.arange(29), np.arange(1, 30), False)
+    ckpt = str(tmp_path / "ckpt")
+    np.testing.assert_array_equal(g.connected_components(checkpoint_dir=ckpt),
+            np.zeros(30))
+
+    # As if the call stopped once label 0 reached vertex 10
+    labels = np.arange(30, dtype=np.uint32)
+    labels[:10] = 0
+    active = np.zeros(30, dtype=np.uint8)
+    active[10] = 1
+    header = np.zeros(1, dtype=header_dtype)
+    header["magic"] = b"GTLBCKP1"
+    header["num_vertices"] = 30
+    header["iterations"] = 9
+    with open(os.path.join(ckpt, "connected_components.state"), "wb") as f:
+        f.write(header.tobytes() + labels.tobytes() + active.tobytes())
+    meta_fn = os.path.join(ckpt, "connected_components.json")
+    with open(meta_fn) as f:
+        meta = json.load(f)
+    with open(meta_fn, "w") as f:
+        json.dump(dict(meta, done=False), f)
+    np.testing.assert_array_equal(g.connected_components(checkpoint_dir=ckpt,
+        resume=True), np.zeros(30))
+
+    # A state with nothing left to do is returned as is
+    labels[10:] = 7
+    active[:] = 0
+    with open(os.path.join(ckpt, "connected_components.state"), "wb") as f:
+        f.write(header.tobytes() + labels.tobytes() + active.tobytes())
+    with open(meta_fn, "w") as f:
+        json.dump(dict(meta, done=False), f)
+    np.testing.assert_array_equal(g.connected_components(checkpoint_dir=ckpt,
+        resume=True), labels)
+
+
+def test_coreness_checkpoint_needs_every_core(tmp_path, configs):
+    g = random_graph(tmp_path, configs, True)
+    with pytest.raises(UnsupportedError):
+        g.coreness(kmin=2, checkpoint_dir=str(tmp_path / "ckpt"))
+
+
+def test_checkpointed_result_written_to_file(tmp_path, configs):
+    g = random_graph(tmp_path, configs, True)
+    out = str(tmp_path / "cores.npy")
+    res = g.coreness(checkpoint_dir=str(tmp_path / "ckpt"), out=out)
+    assert isinstance(res, np.memmap)
+    np.testing.assert_array_equal(np.load(out), g.coreness())
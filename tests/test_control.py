@@ -0,0 +1,46 @@
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from graphyti import Format, Graph
+from graphyti.Exceptions.runtime import UnsupportedError
+
+
+@pytest.fixture
+def graph(tmp_path, configs):
+    rng = np.random.default_rng(0)
+    src = rng.integers(0, 200, 1000).astype(np.uint32)
+    dst = rng.integers(0, 200, 1000).astype(np.uint32)
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, True)
+    return Graph(adj, idx, configs)
+
+
+def test_budgeted_call_in_child_process(graph, tmp_path):
+    np.testing.assert_array_equal(graph.coreness(timeout=60),
+            graph.coreness())
+    out = str(tmp_path / "scc.npy")
+    res = graph.strongly_connected_components(timeout=60, out=out)
+    np.testing.assert_array_equal(res, graph.strongly_connected_components())
+
+
+def test_budget_runs_out(graph):
+    with pytest.raises(TimeoutError):
+        graph.diameter(timeout=0)
+    # The graph is still usable
+    assert graph.diameter() >= 0
+
+
+def test_cancel(graph):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(concurrent.futures.CancelledError):
+        graph.coreness(cancel=cancel)
+
+
+def test_no_progress_outside_flashgraph(graph):
+    with pytest.raises(UnsupportedError):
+        graph.coreness(progress=print)
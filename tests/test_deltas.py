@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from graphyti import DeltaLog, Format, Graph
+
+
+def test_algorithms_see_pending_changes(tmp_path, configs):
+    src = np.array([0, 1, 2, 3, 4], dtype=np.uint32)
+    dst = np.array([1, 2, 0, 4, 5], dtype=np.uint32)
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, False)
+    g = Graph(adj, idx, configs)
+    g.add_edges([3, 5], [5, 6])
+    g.remove_edges([0], [1])
+
+    merged = g.compact(str(tmp_path / "m.adj"), str(tmp_path / "m.idx"))
+    g.add_edges([3, 5], [5, 6])
+    g.remove_edges([0], [1])
+    np.testing.assert_array_equal(g.triangles(), merged.triangles())
+    np.testing.assert_array_equal(g.coreness(), merged.coreness())
+    assert g.triangles().sum() == 3
+
+    # The scratch graph follows later changes
+    g.add_edges([0], [1])
+    assert g.triangles().sum() == 6
+
+
+def sorted_edges(src, dst):
+    return sorted(zip(np.asarray(src).tolist(), np.asarray(dst).tolist()))
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_overlay_applies_changes_in_order(tmp_path, directed):
+    base_src = np.array([0, 1, 2], dtype=np.int64)
+    base_dst = np.array([1, 2, 3], dtype=np.int64)
+    log = DeltaLog(str(tmp_path / "deltas"))
+    # A base edge removed and added back, and a new edge added and removed
+    log.append("remove", [0], [1])
+    log.append("add", [0, 4], [1, 5])
+    log.append("remove", [5], [4])
+    log.append("add", [3], [4])
+
+    expected = [(0, 1), (1, 2), (2, 3), (3, 4)]
+    if directed:
+        # (5, 4) isn't (4, 5), so it stays
+        expected.append((4, 5))
+    assert sorted_edges(*log.apply(base_src, base_dst, directed)) == expected
+
+    # Undirected edges are in the lists of both of their vertices
+    lists = lambda src, dst: (src, dst) if directed else \
+            (np.concatenate((src, dst)), np.concatenate((dst, src)))
+    overlay = log.overlay(directed)
+    src, dst = overlay.edges(lambda edge_type: lists(base_src, base_dst))
+    expected_src, expected_dst = (np.array(col) for col in zip(*expected))
+    assert sorted_edges(src, dst) == sorted_edges(*lists(expected_src,
+        expected_dst))
+    assert overlay.num_vertices == (6 if directed else 5)
+
+
+def test_overlay_readds_removed_edge_once(tmp_path):
+    log = DeltaLog(str(tmp_path / "deltas"))
+    log.append("add", [0], [1])
+    log.append("remove", [0], [1])
+    log.append("add", [0], [1])
+    overlay = log.overlay()
+    assert sorted_edges(overlay.src, overlay.dst) == [(0, 1)]
+
+    # Every copy made before the removal goes, the one made after stays
+    base = lambda edge_type: (np.array([0, 0]), np.array([1, 1]))
+    assert sorted_edges(*overlay.edges(base)) == [(0, 1)]
@@ -0,0 +1,20 @@
+import numpy as np
+
+from graphyti import Format, Graph
+
+
+def test_results_written_to_files(tmp_path, configs):
+    rng = np.random.default_rng(2)
+    src = rng.integers(0, 100, 400).astype(np.uint32)
+    dst = rng.integers(0, 100, 400).astype(np.uint32)
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, True)
+    g = Graph(adj, idx, configs)
+
+    # FlashGraph's degree, and the delta PageRank written in place
+    for name, kwargs in [("degree", {}), ("pagerank", {"tol": 1e-4})]:
+        out = str(tmp_path / (name + ".npy"))
+        res = getattr(g, name)(out=out, **kwargs)
+        assert isinstance(res, np.memmap)
+        np.testing.assert_allclose(np.load(out), getattr(g, name)(**kwargs),
+                rtol=1e-6)
@@ -0,0 +1,63 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from graphyti import reorder
+from graphyti.Exceptions.runtime import UnsupportedError
+
+
+def test_community_order_keeps_communities_together():
+    cliques = [range(0, 10), range(10, 20), range(20, 30)]
+    pairs = [pair for clique in cliques
+            for pair in itertools.combinations(clique, 2)]
+    pairs += [(0, 10), (10, 20)]
+    src, dst = (np.array(col) for col in zip(*pairs))
+
+    perm = reorder.permutation("community", src, dst)
+    np.testing.assert_array_equal(np.sort(perm), np.arange(30))
+    for clique in cliques:
+        ids = np.sort(perm[list(clique)])
+        assert ids[-1] - ids[0] == len(clique) - 1
+
+
+def random_edges(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 50, 200), rng.integers(0, 50, 200)
+
+
+@pytest.mark.parametrize("strategy", ["degree", "community"])
+def test_permutation_round_trip(tmp_path, strategy):
+    src, dst = random_edges()
+    perm = reorder.permutation(strategy, src, dst)
+    assert perm.dtype == np.uint32
+    np.testing.assert_array_equal(np.sort(perm), np.arange(len(perm)))
+
+    order = reorder.inverse(perm)
+    np.testing.assert_array_equal(order[perm], np.arange(len(perm)))
+    np.testing.assert_array_equal(perm[order], np.arange(len(perm)))
+
+    # Relabelled edges map back to the original ones
+    adj_fn = str(tmp_path / "g.adj")
+    new_src, new_dst = reorder.reorder_edges(src, dst, strategy, adj_fn)
+    saved = reorder.load_permutation(reorder.permutation_file(adj_fn))
+    np.testing.assert_array_equal(saved, perm)
+    np.testing.assert_array_equal(order[new_src], src)
+    np.testing.assert_array_equal(order[new_dst], dst)
+
+    reorder.clear_permutation(adj_fn)
+    assert not os.path.exists(reorder.permutation_file(adj_fn))
+
+
+def test_degree_order_puts_hubs_first():
+    src, dst = random_edges(1)
+    perm = reorder.permutation("degree", src, dst)
+    degrees = np.bincount(src, minlength=len(perm)) + \
+            np.bincount(dst, minlength=len(perm))
+    assert np.all(np.diff(degrees[reorder.inverse(perm)]) <= 0)
+
+
+def test_unknown_strategy():
+    with pytest.raises(UnsupportedError):
+        reorder.permutation("random", [0], [1])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from graphyti import Format, Graph
+
+
+def random_graph(tmp_path, configs, directed, seed=0):
+    # A simple graph, with some reciprocal edges when directed
+    rng = np.random.default_rng(seed)
+    pairs = set()
+    while len(pairs) < 300:
+        u, v = (int(x) for x in rng.integers(0, 60, 2))
+        if u != v and (directed or (v, u) not in pairs):
+            pairs.add((u, v))
+    src, dst = (np.array(col, dtype=np.uint32) for col in zip(*sorted(pairs)))
+    adj, idx = str(tmp_path / "g.adj"), str(tmp_path / "g.idx")
+    Format(configs).array2graphyti(src, dst, adj, idx, directed)
+    return Graph(adj, idx, configs)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_run_matches_standalone_calls(tmp_path, configs, directed):
+    g = random_graph(tmp_path, configs, directed)
+    plan = [("degree", {"edge_type": "in"}), "degree", "triangles",
+            "local_scan", "triangles"]
+    results, report = g.run(plan)
+
+    np.testing.assert_array_equal(results[0], g.degree(edge_type="in"))
+    np.testing.assert_array_equal(results[1], g.degree())
+    np.testing.assert_array_equal(results[2], g.triangles())
+    np.testing.assert_array_equal(results[4], results[2])
+    if directed:
+        np.testing.assert_array_equal(results[3], g.local_scan())
+    else:
+        # FlashGraph's local_scan only takes directed graphs. In a simple
+        # undirected graph a vertex's scan is its edges plus the edges
+        # among its neighbors, one per triangle.
+        np.testing.assert_array_equal(results[3], results[1] + results[2])
+    if directed:
+        assert report["fused"] == []
+        assert report["passes"] == 4
+    else:
+        assert sorted(report["fused"]) == ["degree", "degree", "local_scan",
+                "triangles"]
+        assert report["passes"] == 1